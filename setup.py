@@ -38,7 +38,8 @@ with codecs.open('README.rst', 'r', 'utf-8') as fd:
           install_requires=requirements(),
           extras_require={
               'json': 'ujson',
-              'socks': 'PySocks'
+              'socks': 'PySocks',
+              'async': 'aiohttp'
           },
           include_package_data=True,
           classifiers=[
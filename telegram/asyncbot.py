@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+#
+# A library that provides a Python interface to the Telegram Bot API
+# Copyright (C) 2015-2017
+# Leandro Toledo de Souza <devs@python-telegram-bot.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser Public License for more details.
+#
+# You should have received a copy of the GNU Lesser Public License
+# along with this program.  If not, see [http://www.gnu.org/licenses/].
+"""This module contains an object that represents a Telegram Bot for asyncio."""
+import functools
+import itertools
+from threading import local
+
+from telegram import Bot
+from telegram.error import TelegramError
+from telegram.utils.asyncrequest import AsyncRequest
+
+
+class _PendingCall(Exception):
+    """Raised by :class:`_ReplayRequest` when a Bot method needs a request it has no result for
+    yet."""
+
+    def __init__(self, method, args, kwargs):
+        super(_PendingCall, self).__init__(method)
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+
+
+class _ReplayRequest(object):
+    """Stands in for the request of a Bot method run by :class:`AsyncBot`. It answers the calls
+    with the outcomes of the requests already performed, in order, and raises
+    :class:`_PendingCall` for the first one it has no outcome for."""
+
+    def __init__(self, outcomes):
+        self._outcomes = iter(outcomes)
+
+    def _call(self, method, *args, **kwargs):
+        try:
+            result, error = next(self._outcomes)
+        except StopIteration:
+            raise _PendingCall(method, args, kwargs)
+        if error is not None:
+            raise error
+        return result
+
+    def __getattr__(self, method):
+        return functools.partial(self._call, method)
+
+
+def _file_positions(args, kwargs):
+    """The positions of the file arguments of a call, see :func:`_awaitable`."""
+    positions = []
+    for value in itertools.chain(args, kwargs.values()):
+        if hasattr(value, 'read') and hasattr(value, 'seek'):
+            try:
+                positions.append((value, value.tell()))
+            except (AttributeError, IOError, OSError):
+                pass
+    return positions
+
+
+def _awaitable(method):
+
+    @functools.wraps(method)
+    async def decorator(self, *args, **kwargs):
+        outcomes = []
+        # A request reads the files it uploads, so they are rewound for the runs replaying it,
+        # which e.g. compute the cache key of the file again
+        positions = _file_positions(args, kwargs)
+        while True:
+            if outcomes:
+                for fobj, position in positions:
+                    fobj.seek(position)
+            self._local.request = _ReplayRequest(outcomes)
+            try:
+                return method(self, *args, **kwargs)
+            except _PendingCall as call:
+                pending = call
+            finally:
+                self._local.request = None
+
+            try:
+                result = await getattr(self._async_request, pending.method)(*pending.args,
+                                                                            **pending.kwargs)
+                outcomes.append((result, None))
+            except TelegramError as error:
+                outcomes.append((None, error))
+
+    return decorator
+
+
+class AsyncBot(Bot):
+    """
+    This object represents a Telegram Bot whose API methods are coroutines. It accepts the same
+    arguments as :class:`telegram.Bot` and its methods return the same objects, but must be
+    awaited::
+
+        bot = AsyncBot(TOKEN)
+        await asyncio.gather(*(bot.send_message(chat_id, text) for chat_id in chat_ids))
+
+    The methods of :class:`telegram.Bot` build the URL and parameters of each call and decode its
+    result. To share that code, each coroutine runs the corresponding :class:`telegram.Bot`
+    method with a stand-in request object which stops at the first HTTP request, awaits that
+    request on the :class:`telegram.utils.asyncrequest.AsyncRequest` and runs the method again,
+    this time handing it the result.
+
+    Note:
+        Requires Python 3.5+ and ``aiohttp``. The :attr:`id`, :attr:`username` etc. properties
+        are only available after :attr:`get_me` has been awaited once. :attr:`request` is the
+        :class:`telegram.utils.asyncrequest.AsyncRequest`, so that e.g.
+        :attr:`telegram.File.download` must be awaited as well.
+
+    Args:
+        token (:obj:`str`): Bot's unique authentication.
+        base_url (:obj:`str`, optional): Telegram Bot API service URL.
+        base_file_url (:obj:`str`, optional): Telegram Bot API file URL.
+        request (:obj:`telegram.utils.asyncrequest.AsyncRequest`, optional): Pre initialized
+            :obj:`telegram.utils.asyncrequest.AsyncRequest`.
+        upload_cache (:obj:`telegram.utils.uploadcache.UploadCache`, optional): See
+            :class:`telegram.Bot`.
+    """
+
+    def __init__(self, token, base_url=None, base_file_url=None, request=None,
+                 upload_cache=None):
+        self._local = local()
+        super(AsyncBot, self).__init__(token, base_url=base_url, base_file_url=base_file_url,
+                                       request=request or AsyncRequest(),
+                                       upload_cache=upload_cache)
+
+    @property
+    def _request(self):
+        return getattr(self._local, 'request', None) or self._async_request
+
+    @_request.setter
+    def _request(self, request):
+        self._async_request = request
+
+
+for _name, _method in list(vars(Bot).items()):
+    if (callable(_method) and not _name.startswith('_') and _name != 'to_dict'
+            and not isinstance(_method, (staticmethod, classmethod))):
+        setattr(AsyncBot, _name, _awaitable(_method))
@@ -29,7 +29,7 @@ from telegram import (User, Message, Update, Chat, ChatMember, UserProfilePhotos
                       ReplyMarkup, TelegramObject, WebhookInfo, GameHighScore, StickerSet,
                       PhotoSize, Audio, Document, Sticker, Video, Voice, VideoNote, Location,
                       Venue, Contact)
-from telegram.error import InvalidToken, TelegramError
+from telegram.error import InvalidToken, TelegramError, BadRequest
 from telegram.utils.helpers import to_timestamp
 from telegram.utils.request import Request
 
@@ -81,9 +81,13 @@ class Bot(TelegramObject):
         base_file_url (:obj:`str`, optional): Telegram Bot API file URL.
         request (:obj:`telegram.utils.Request`, optional): Pre initialized
             :obj:`telegram.utils.Request`.
+        upload_cache (:obj:`telegram.utils.uploadcache.UploadCache`, optional): If set, files
+            sent with the ``send_*`` methods are uploaded only once and their file_id is reused
+            afterwards.
     """
 
-    def __init__(self, token, base_url=None, base_file_url=None, request=None):
+    def __init__(self, token, base_url=None, base_file_url=None, request=None,
+                 upload_cache=None):
         self.token = self._validate_token(token)
 
         if base_url is None:
@@ -96,6 +100,7 @@ class Bot(TelegramObject):
         self.base_file_url = str(base_file_url) + str(self.token)
         self.bot = None
         self._request = request or Request()
+        self.upload_cache = upload_cache
         self.logger = logging.getLogger(__name__)
 
     @property
@@ -172,12 +177,26 @@ class Bot(TelegramObject):
             else:
                 data['reply_markup'] = reply_markup
 
-        result = self._request.post(url, data, timeout=kwargs.get('timeout'))
+        upload = None
+        if self.upload_cache is not None:
+            upload = self.upload_cache.lookup(data)
+
+        try:
+            result = self._request.post(url, data, timeout=kwargs.get('timeout'))
+        except BadRequest as e:
+            if upload is None or upload.file_id is None or 'file' not in e.message.lower():
+                raise
+            # The cached file_id is not accepted anymore, upload the file again
+            self.upload_cache.forget(upload, data)
+            result = self._request.post(url, data, timeout=kwargs.get('timeout'))
 
         if result is True:
             return result
 
-        return Message.de_json(result, self)
+        message = Message.de_json(result, self)
+        if upload is not None:
+            self.upload_cache.record(upload, message)
+        return message
 
     @log
     def get_me(self, timeout=None, **kwargs):
@@ -1559,12 +1578,21 @@ class Bot(TelegramObject):
             :class:`telegram.TelegramError`
         """
 
-        url = '{0}/getUpdates'.format(self.base_url)
-
         if network_delay is not None:
             warnings.warn('network_delay is deprecated, use read_latency instead')
             read_latency = network_delay
 
+        result = self._get_updates_json(offset, limit, timeout, read_latency, allowed_updates,
+                                        **kwargs)
+
+        return [Update.de_json(u, self) for u in result]
+
+    def _get_updates_json(self, offset, limit, timeout, read_latency, allowed_updates,
+                          **kwargs):
+        # The updates as decoded from JSON, so that the caller can decide where to turn them
+        # into Update objects
+        url = '{0}/getUpdates'.format(self.base_url)
+
         data = {'timeout': timeout}
 
         if offset:
@@ -1587,7 +1615,7 @@ class Bot(TelegramObject):
         else:
             self.logger.debug('No new updates found.')
 
-        return [Update.de_json(u, self) for u in result]
+        return result
 
     @log
     def set_webhook(self,
@@ -51,6 +51,9 @@ class TelegramError(Exception):
     def __str__(self):
         return '%s' % (self.message)
 
+    def __reduce__(self):
+        return self.__class__, (self.message,)
+
 
 class Unauthorized(TelegramError):
     pass
@@ -61,6 +64,9 @@ class InvalidToken(TelegramError):
     def __init__(self):
         super(InvalidToken, self).__init__('Invalid token')
 
+    def __reduce__(self):
+        return self.__class__, ()
+
 
 class NetworkError(TelegramError):
     pass
@@ -75,6 +81,9 @@ class TimedOut(NetworkError):
     def __init__(self):
         super(TimedOut, self).__init__('Timed out')
 
+    def __reduce__(self):
+        return self.__class__, ()
+
 
 class ChatMigrated(TelegramError):
     """
@@ -88,6 +97,9 @@ class ChatMigrated(TelegramError):
               self).__init__('Group migrated to supergroup. New chat id: {}'.format(new_chat_id))
         self.new_chat_id = new_chat_id
 
+    def __reduce__(self):
+        return self.__class__, (self.new_chat_id,)
+
 
 class RetryAfter(TelegramError):
     """
@@ -100,3 +112,6 @@ class RetryAfter(TelegramError):
         super(RetryAfter,
               self).__init__('Flood control exceeded. Retry in {} seconds'.format(retry_after))
         self.retry_after = float(retry_after)
+
+    def __reduce__(self):
+        return self.__class__, (self.retry_after,)
@@ -19,8 +19,12 @@
 """Extensions over the Telegram Bot API to facilitate bot making"""
 
 from .dispatcher import Dispatcher, DispatcherHandlerContinue, DispatcherHandlerStop, run_async
+from .datastore import DataStore, SQLiteBackend
+from .persistence import BasePersistence, PicklePersistence, SQLitePersistence
 from .jobqueue import JobQueue, Job
 from .updater import Updater
+from .webhookrouter import WebhookRouter
+from .processdispatcher import ProcessDispatcher
 from .callbackqueryhandler import CallbackQueryHandler
 from .choseninlineresulthandler import ChosenInlineResultHandler
 from .commandhandler import CommandHandler
@@ -43,4 +47,6 @@ __all__ = ('Dispatcher', 'JobQueue', 'Job', 'Updater', 'CallbackQueryHandler',
            'MessageHandler', 'BaseFilter', 'Filters', 'RegexHandler', 'StringCommandHandler',
            'StringRegexHandler', 'TypeHandler', 'ConversationHandler',
            'PreCheckoutQueryHandler', 'ShippingQueryHandler', 'MessageQueue', 'DelayQueue',
-           'DispatcherHandlerContinue', 'DispatcherHandlerStop', 'run_async')
+           'DispatcherHandlerContinue', 'DispatcherHandlerStop', 'run_async', 'ProcessDispatcher',
+           'DataStore', 'SQLiteBackend', 'BasePersistence', 'PicklePersistence',
+           'SQLitePersistence', 'WebhookRouter')
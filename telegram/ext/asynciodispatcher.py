@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+#
+# A library that provides a Python interface to the Telegram Bot API
+# Copyright (C) 2015-2017
+# Leandro Toledo de Souza <devs@python-telegram-bot.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser Public License for more details.
+#
+# You should have received a copy of the GNU Lesser Public License
+# along with this program.  If not, see [http://www.gnu.org/licenses/].
+"""This module contains the AsyncioDispatcher class."""
+
+import asyncio
+import inspect
+from queue import Empty
+from threading import current_thread
+
+from telegram.ext.dispatcher import Dispatcher
+
+
+class AsyncioDispatcher(Dispatcher):
+    """
+    A :class:`telegram.ext.Dispatcher` which runs an asyncio event loop in its thread. Handler
+    callbacks and error handlers may be coroutine functions; ``check_update`` stays synchronous.
+    Every update is processed as a task of the event loop, so a handler waiting for I/O doesn't
+    hold up the other updates and doesn't need a thread of its own.
+
+    Updates are processed in order of arrival, but up to :attr:`concurrency` of them
+    concurrently. Plain functions are still called directly from the event loop and should not
+    block; ``@run_async`` keeps working for them.
+
+    Pass an instance to :class:`telegram.ext.Updater` with its ``dispatcher`` argument.
+    Use it together with :class:`telegram.asyncbot.AsyncBot` to await API calls from handlers.
+
+    Note:
+        Requires Python 3.5+.
+
+    Attributes:
+        concurrency (:obj:`int`): Maximum number of updates processed at the same time.
+        loop (:obj:`asyncio.AbstractEventLoop`): The event loop, while the dispatcher is running.
+
+    Args:
+        bot (:class:`telegram.Bot`): The bot object that should be passed to the handlers.
+        update_queue (:obj:`Queue`): The synchronized queue that will contain the updates.
+        job_queue (:class:`telegram.ext.JobQueue`, optional): The :class:`telegram.ext.JobQueue`
+                instance to pass onto handler callbacks.
+        workers (:obj:`int`, optional): Number of maximum concurrent worker threads for the
+            ``@run_async`` decorator. defaults to 4.
+        concurrency (:obj:`int`, optional): Maximum number of updates processed at the same
+            time. Defaults to 256.
+        persistence (:class:`telegram.ext.BasePersistence`, optional): See
+            :class:`telegram.ext.Dispatcher`.
+        dedup_window (:obj:`int`, optional): See :class:`telegram.ext.Dispatcher`.
+    """
+
+    def __init__(self, bot, update_queue, workers=4, exception_event=None, job_queue=None,
+                 concurrency=256, persistence=None, dedup_window=0):
+        super(AsyncioDispatcher, self).__init__(bot, update_queue, workers=workers,
+                                                exception_event=exception_event,
+                                                job_queue=job_queue, persistence=persistence,
+                                                dedup_window=dedup_window)
+        self.concurrency = concurrency
+        self.loop = None
+        self._loop_thread = None
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        self._loop_thread = current_thread()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._dispatch())
+        finally:
+            self.loop.close()
+            self.loop = None
+            self._loop_thread = None
+
+    async def _dispatch(self):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+
+        def done(task):
+            tasks.discard(task)
+            semaphore.release()
+
+        while 1:
+            await semaphore.acquire()
+            try:
+                # Pop update from update queue without blocking the event loop.
+                update = await self.loop.run_in_executor(None, self.update_queue.get, True, 1)
+            except Empty:
+                semaphore.release()
+                if self._should_stop():
+                    break
+                continue
+
+            self.logger.debug('Processing Update: %s' % update)
+            task = self.loop.create_task(self.process_update_async(update))
+            tasks.add(task)
+            task.add_done_callback(done)
+
+        if tasks:
+            self.logger.debug('Waiting for %d updates to be processed', len(tasks))
+            await asyncio.wait(tasks)
+
+    def process_update(self, update):
+        """
+        Processes a single update. If the dispatcher is running, the update is processed by its
+        event loop and a :obj:`concurrent.futures.Future` is returned, otherwise it is processed
+        by a temporary event loop before returning.
+
+        Args:
+            update (:obj:`str` | :class:`telegram.Update` | :class:`telegram.TelegramError`):
+                The update to process.
+        """
+
+        if self.loop is not None:
+            return asyncio.run_coroutine_threadsafe(self.process_update_async(update), self.loop)
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self.process_update_async(update))
+        finally:
+            loop.close()
+
+    async def process_update_async(self, update):
+        """
+        Processes a single update, awaiting the handler callbacks which are coroutine functions.
+        This is a coroutine.
+
+        Args:
+            update (:obj:`str` | :class:`telegram.Update` | :class:`telegram.TelegramError`):
+                The update to process.
+        """
+
+        steps = self._process_update(update)
+        try:
+            result = next(steps)
+            while 1:
+                try:
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as error:
+                    # Handled by _process_update like an error of handle_update
+                    result = steps.throw(error)
+                else:
+                    result = steps.send(None)
+        except StopIteration:
+            pass
+
+    def dispatch_error(self, update, error):
+        """
+        Dispatches an error. Error handlers which are coroutine functions are scheduled on the
+        event loop.
+
+        Args:
+            update (:obj:`str` | :class:`telegram.Update` | None): The update that caused the error
+            error (:class:`telegram.TelegramError`): The Telegram error that was raised.
+        """
+
+        for callback in self.error_handlers:
+            result = callback(self.bot, update, error)
+            if inspect.isawaitable(result):
+                self._schedule(result)
+
+    def _schedule(self, coroutine):
+        if self.loop is None:
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(coroutine)
+            finally:
+                loop.close()
+        elif current_thread() is self._loop_thread:
+            asyncio.ensure_future(coroutine)
+        else:
+            asyncio.run_coroutine_threadsafe(coroutine, self.loop)
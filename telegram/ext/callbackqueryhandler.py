@@ -81,6 +81,8 @@ class CallbackQueryHandler(Handler):
             ``chat_data`` will be passed to the callback function. Default is ``False``.
     """
 
+    update_types = ('callback_query',)
+
     def __init__(self,
                  callback,
                  pass_update_queue=False,
@@ -119,6 +121,8 @@ class CallbackQueryHandler(Handler):
             if self.pattern:
                 if update.callback_query.data:
                     match = re.match(self.pattern, update.callback_query.data)
+                    if match:
+                        self.store_check_result(update, match)
                     return bool(match)
             else:
                 return True
@@ -134,7 +138,8 @@ class CallbackQueryHandler(Handler):
 
         optional_args = self.collect_optional_args(dispatcher, update)
         if self.pattern:
-            match = re.match(self.pattern, update.callback_query.data)
+            match = (self.pop_check_result(update)
+                     or re.match(self.pattern, update.callback_query.data))
 
             if self.pass_groups:
                 optional_args['groups'] = match.groups()
@@ -62,6 +62,8 @@ class ChosenInlineResultHandler(Handler):
             ``chat_data`` will be passed to the callback function. Default is ``False``.
     """
 
+    update_types = ('chosen_inline_result',)
+
     def __init__(self,
                  callback,
                  pass_update_queue=False,
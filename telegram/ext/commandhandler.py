@@ -25,6 +25,25 @@ from .handler import Handler
 from telegram import Update
 
 
+def split_command(text):
+    """
+    Splits the text of a message into the command and the username of the bot it is addressed
+    to, e.g. ``'/Start@MyBot args'`` into ``('start', 'mybot')``.
+
+    Args:
+        text (:obj:`str`): The text of the message.
+
+    Returns:
+        (:obj:`str`, :obj:`str`): The lowercase command and bot username, the latter ``None`` if
+        the command isn't addressed to a bot. ``(None, None)`` if ``text`` isn't a command.
+    """
+
+    if not text or not text.startswith('/'):
+        return None, None
+    command = text[1:].split(' ')[0].split('@')
+    return command[0].lower(), command[1].lower() if len(command) > 1 else None
+
+
 class CommandHandler(Handler):
     """
     Handler class to handle Telegram commands. Commands are Telegram messages
@@ -118,6 +137,11 @@ class CommandHandler(Handler):
                           'deprecated, please use bitwise operators (& and |) '
                           'instead. More info: https://git.io/vPTbc.')
 
+    @property
+    def update_types(self):
+        """Tuple[:obj:`str`]: The kinds of updates accepted by this handler."""
+        return ('message', 'edited_message') if self.allow_edited else ('message',)
+
     def check_update(self, update):
         """
         Determines whether an update should be passed to this handlers :attr:`callback`.
@@ -133,22 +157,19 @@ class CommandHandler(Handler):
                 and (update.message or update.edited_message and self.allow_edited)):
             message = update.message or update.edited_message
 
-            if message.text:
-                command = message.text[1:].split(' ')[0].split('@')
-                command.append(
-                    message.bot.username)  # in case the command was send without a username
-
-                if self.filters is None:
-                    res = True
-                elif isinstance(self.filters, list):
-                    res = any(func(message) for func in self.filters)
-                else:
-                    res = self.filters(message)
+            command, username = split_command(message.text)
+            if command not in self.command:
+                return False
+            # The bot's username is only needed (and fetched) if the command is addressed to one
+            if username is not None and username != message.bot.username.lower():
+                return False
 
-                return res and (message.text.startswith('/') and command[0].lower() in self.command
-                                and command[1].lower() == message.bot.username.lower())
+            if self.filters is None:
+                return True
+            elif isinstance(self.filters, list):
+                return any(func(message) for func in self.filters)
             else:
-                return False
+                return self.filters(message)
 
         else:
             return False
@@ -18,13 +18,27 @@
 # along with this program.  If not, see [http://www.gnu.org/licenses/].
 """ This module contains the ConversationHandler """
 
+import inspect
 import logging
+import time
+from collections import deque
+from threading import Lock, RLock
 
-from telegram import Update
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+from telegram import Update, TelegramError
 from telegram.ext import (Handler, CallbackQueryHandler, InlineQueryHandler,
                           ChosenInlineResultHandler)
+from telegram.ext.dispatcher import Dispatcher, DispatcherHandlerFlow, _HandlerIndex
 from telegram.utils.promise import Promise
 
+# Names of the handler indexes of entry_points and fallbacks, which can't clash with any state
+_ENTRY_POINTS = object()
+_FALLBACKS = object()
+
 
 class ConversationHandler(Handler):
     """
@@ -47,16 +61,37 @@ class ConversationHandler(Handler):
     a regular text message is expected. You could use this for a ``/cancel`` command or to let the
     user know their message was not recognized.
 
+    The handler can be used with a dispatcher processing updates in parallel, e.g. with
+    ``chat_lanes``: the updates of one conversation are still handled one at a time.
+
+    If a callback is decorated with ``run_async``, the conversation stays in its previous state
+    until the function finished. Updates arriving meanwhile are parked instead of blocking the
+    dispatcher, and handled in order from the thread of the function once it finished. Errors
+    raised while handling them go to the error handlers of the dispatcher, like other ones.
+    Only updates which a handler of the conversation may accept by their kind (e.g. their
+    command) are parked. A parked update counts as handled by this conversation for the
+    dispatcher: if no handler of the state the function returned accepts it, it is dropped
+    rather than passed on to the handlers of later groups.
+
     The fourth, optional collection of handlers, a ``list`` named :attr:`timed_out_behavior` is
-    used if the wait for ``run_async`` takes longer than defined in :attr:`run_async_timeout`.
-    For example, you can let the user know that they should wait for a bit before they can
-    continue.
+    used for updates arriving when ``run_async`` has been running longer than defined in
+    :attr:`run_async_timeout`. For example, you can let the user know that they should wait for
+    a bit before they can continue. With
+    :class:`telegram.ext.asynciodispatcher.AsyncioDispatcher`, callbacks may also be coroutine
+    functions. As the event loop can't be blocked to wait for them, an update arriving while the
+    coroutine of the previous one is still running is passed to :attr:`timed_out_behavior` right
+    away.
 
     To change the state of conversation, the callback function of a handler must return the new
     state after responding to the user. If it does not return anything (returning ``None`` by
     default), the state will not change. To end the conversation, the callback function must
     return :attr`END` or ``-1``.
 
+    If :attr:`conversation_timeout` is set, conversations without any update handled for that
+    long are ended, so that abandoned ones don't pile up in :attr:`conversations`. The handlers
+    listed in :attr:`states` under :attr:`TIMEOUT` are then called with the last update of the
+    conversation, e.g. to tell the user. This uses the job queue of the dispatcher.
+
     Attributes:
         entry_points (List[:class:`telegram.ext.Handler`]): A list of ``Handler`` objects that can
             trigger the start of the conversation.
@@ -76,6 +111,15 @@ class ConversationHandler(Handler):
         per_user (:obj:`bool`): Optional. If the conversationkey should contain the User's ID.
         per_message (:obj:`bool`): Optional. If the conversationkey should contain the Message's
             ID.
+        conversation_timeout (:obj:`float`): Optional. Seconds after which an idle conversation
+            is ended.
+        timeout_jobs (Dict[:obj:`tuple`, :class:`telegram.ext.Job`]): The jobs ending the
+            conversations once they timed out, by conversation key.
+        name (:obj:`str`): Optional. The name of this conversation handler.
+        persistent (:obj:`bool`): Optional. If the conversations are stored by the
+            :attr:`telegram.ext.Dispatcher.persistence`.
+        persistence (:class:`telegram.ext.BasePersistence`): Optional. Where the conversations
+            are stored, set by :attr:`telegram.ext.Dispatcher.add_handler`.
 
     Args:
         entry_points (List[:class:`telegram.ext.Handler`]): A list of ``Handler`` objects that can
@@ -94,9 +138,10 @@ class ConversationHandler(Handler):
             conversation can restart the conversation by triggering one of the entry points.
         run_async_timeout (:obj:`float`, optional): If the previous handler for this user was
             running asynchronously using the ``run_async`` decorator, it might not be finished when
-            the next message arrives. This timeout defines how long the conversation handler should
-            wait for the next state to be computed. The default is ``None`` which means it will
-            wait indefinitely.
+            the next message arrives. Such updates are parked until the next state was computed,
+            unless it takes longer than this timeout, in which case they are passed to
+            :attr:`timed_out_behavior` instead. The default is ``None`` which means updates are
+            parked however long it takes.
         timed_out_behavior (List[:class:`telegram.ext.Handler`], optional): A list of handlers that
             might be used if the wait for ``run_async`` timed out. The first handler which
             :attr:`check_update` method returns ``True`` will be used. If all return ``False``,
@@ -107,6 +152,15 @@ class ConversationHandler(Handler):
             Default is ``True``.
         per_message (:obj:`bool`, optional): If the conversationkey should contain the Message's
             ID. Default is ``False``.
+        conversation_timeout (:obj:`float` | :obj:`datetime.timedelta`, optional): When a
+            conversation had no update handled for this long, it is ended and the handlers of the
+            :attr:`TIMEOUT` state are called. The default is ``None`` which means conversations
+            never time out.
+        name (:obj:`str`, optional): The name of this conversation handler. Required if it's
+            persistent, as the stored conversations are found by it.
+        persistent (:obj:`bool`, optional): If set to ``True``, the conversations are stored by
+            the :attr:`telegram.ext.Dispatcher.persistence` and loaded again when the handler is
+            added to a dispatcher. States must be picklable then. Default is ``False``.
 
     Raises:
         ValueError
@@ -114,6 +168,10 @@ class ConversationHandler(Handler):
 
     END = -1
     """:obj:`int`: Used as a constant to return when a conversation is ended."""
+    TIMEOUT = -2
+    """:obj:`int`: Used as the state of the handlers called when a conversation timed out."""
+    KEY_LOCKS = 64
+    """:obj:`int`: Number of locks the conversation keys are spread over."""
 
     def __init__(self,
                  entry_points,
@@ -124,7 +182,10 @@ class ConversationHandler(Handler):
                  timed_out_behavior=None,
                  per_chat=True,
                  per_user=True,
-                 per_message=False):
+                 per_message=False,
+                 conversation_timeout=None,
+                 name=None,
+                 persistent=False):
 
         self.entry_points = entry_points
         self.states = states
@@ -136,16 +197,32 @@ class ConversationHandler(Handler):
         self.per_user = per_user
         self.per_chat = per_chat
         self.per_message = per_message
+        self.conversation_timeout = conversation_timeout
+        self.name = name
+        self.persistent = persistent
+        self.persistence = None
 
         self.conversations = dict()
-        self.current_conversation = None
-        self.current_handler = None
+        # _lock guards the bookkeeping and is only held briefly, the lock of a conversation's
+        # key is held while its update is handled, so that updates of one conversation are
+        # handled one at a time even if the dispatcher processes updates in parallel
+        self._lock = Lock()
+        self._key_locks = [RLock() for _ in range(self.KEY_LOCKS)]
+        self._parked = dict()
+        self._draining = set()
+        self._pending_since = dict()
+        self.timeout_jobs = dict()
+        # The handlers of entry_points, fallbacks and each state by kind of update
+        self._indexes = dict()
 
         self.logger = logging.getLogger(__name__)
 
         if not any((self.per_user, self.per_chat, self.per_message)):
             raise ValueError("'per_user', 'per_chat' and 'per_message' can't all be 'False'")
 
+        if self.persistent and not self.name:
+            raise ValueError("Conversations can only be persistent if they have a 'name'")
+
         if self.per_message and not self.per_chat:
             logging.warning("If 'per_message=True' is used, 'per_chat=True' should also be used, "
                             "since message IDs are not globally unique.")
@@ -175,23 +252,36 @@ class ConversationHandler(Handler):
                     logging.warning("If 'per_chat=True', 'InlineQueryHandler' can not be used, "
                                     "since inline queries have no chat context.")
 
+    @property
+    def update_types(self):
+        """Tuple[:obj:`str`]: The kinds of updates accepted by any of the handlers of this
+        conversation, or ``None`` if one of them accepts any update."""
+        handlers = list(self.entry_points) + list(self.fallbacks)
+        handlers.extend(self.timed_out_behavior or [])
+        for state_handlers in self.states.values():
+            handlers.extend(state_handlers)
+
+        update_types = set()
+        for handler in handlers:
+            if handler.update_types is None:
+                return None
+            update_types.update(handler.update_types)
+        return tuple(sorted(update_types))
+
     def _get_key(self, update):
         chat = update.effective_chat
         user = update.effective_user
 
-        key = list()
-
-        if self.per_chat:
-            key.append(chat.id)
-
         if self.per_user and user is not None:
-            key.append(user.id)
+            key = (chat.id, user.id) if self.per_chat else (user.id,)
+        else:
+            key = (chat.id,) if self.per_chat else ()
 
         if self.per_message:
-            key.append(update.callback_query.inline_message_id
-                       or update.callback_query.message.message_id)
+            key += (update.callback_query.inline_message_id
+                    or update.callback_query.message.message_id,)
 
-        return tuple(key)
+        return key
 
     def check_update(self, update):
         """
@@ -213,76 +303,94 @@ class ConversationHandler(Handler):
             return False
 
         key = self._get_key(update)
-        state = self.conversations.get(key)
-
-        # Resolve promises
-        if isinstance(state, tuple) and len(state) is 2 and isinstance(state[1], Promise):
-            self.logger.debug('waiting for promise...')
+        with self._lock:
+            state = self.conversations.get(key)
 
-            old_state, new_state = state
-            error = False
-            try:
-                res = new_state.result(timeout=self.run_async_timeout)
-            except Exception as exc:
-                self.logger.exception("Promise function raised exception")
-                self.logger.exception("{}".format(exc))
-                error = True
-
-            if not error and new_state.done.is_set():
-                self.update_state(res, key)
+            # A run_async function which finished, but whose callbacks didn't run yet
+            if (self._is_promise_state(state) and state[1].done.is_set()
+                    and key not in self._parked):
+                self._settle_promise(key, state[1])
                 state = self.conversations.get(key)
 
-            else:
-                for candidate in (self.timed_out_behavior or []):
-                    if candidate.check_update(update):
-                        # Save the current user and the selected handler for handle_update
-                        self.current_conversation = key
-                        self.current_handler = candidate
-
-                        return True
+            # Park the updates of a conversation while its run_async function runs, and while
+            # the updates parked before are still being handled
+            if self._is_promise_state(state) or key in self._parked:
+                if (self._is_promise_state(state) and self.run_async_timeout is not None
+                        and time.time() - self._pending_since[key] > self.run_async_timeout):
+                    return self._check_timed_out(update, key, state)
 
-                else:
+                if not self._may_handle(update):
                     return False
+                self._park(update, key)
+                return True
 
-        self.logger.debug('selecting conversation %s with state %s' % (str(key), str(state)))
+        # Resolve coroutines of an asyncio dispatcher, which can't be waited for here
+        if isinstance(state, tuple) and len(state) == 2 and self._is_future(state[1]):
+            if not state[1].done():
+                return self._check_timed_out(update, key, state)
 
-        handler = None
+            self._resolve_future(key, state[1])
+            state = self.conversations.get(key)
+
+        handler = self._select_handler(update, key, state)
+        if handler is None:
+            return False
+
+        # The conversation and the selected handler travel with the update to handle_update, as
+        # other threads may check other updates meanwhile
+        self.store_check_result(update, (key, state, handler))
+
+        return True
+
+    def _may_handle(self, update):
+        # Whether any handler of the conversation may accept this kind of update, without
+        # calling check_update, whose result depends on the state the run_async function returns
+        route = Dispatcher._route(update)
+        lists = [(_ENTRY_POINTS, self.entry_points), (_FALLBACKS, self.fallbacks)]
+        lists.extend((state, handlers or []) for state, handlers in self.states.items())
+        return any(self._candidates(name, handlers, route) for name, handlers in lists)
+
+    def _park(self, update, key):
+        # Must be called with the lock held
+        self.logger.debug('parking update of conversation %s' % str(key))
+        self._parked.setdefault(key, deque()).append(update)
+        self.store_check_result(update, (key, None, None))
+
+    def _key_lock(self, key):
+        return self._key_locks[hash(key) % len(self._key_locks)]
+
+    def _select_handler(self, update, key, state):
+        self.logger.debug('selecting conversation %s with state %s', key, state)
+        route = Dispatcher._route(update)
 
         # Search entry points for a match
         if state is None or self.allow_reentry:
-            for entry_point in self.entry_points:
+            for entry_point in self._candidates(_ENTRY_POINTS, self.entry_points, route):
                 if entry_point.check_update(update):
-                    handler = entry_point
-                    break
+                    return entry_point
 
-            else:
-                if state is None:
-                    return False
+            if state is None:
+                return None
 
         # Get the handler list for current state, if we didn't find one yet and we're still here
-        if state is not None and not handler:
-            handlers = self.states.get(state)
-
-            for candidate in (handlers or []):
-                if candidate.check_update(update):
-                    handler = candidate
-                    break
+        for candidate in self._candidates(state, self.states.get(state) or [], route):
+            if candidate.check_update(update):
+                return candidate
 
-            # Find a fallback handler if all other handlers fail
-            else:
-                for fallback in self.fallbacks:
-                    if fallback.check_update(update):
-                        handler = fallback
-                        break
+        # Find a fallback handler if all other handlers fail
+        for fallback in self._candidates(_FALLBACKS, self.fallbacks, route):
+            if fallback.check_update(update):
+                return fallback
 
-                else:
-                    return False
+        return None
 
-        # Save the current user and the selected handler for handle_update
-        self.current_conversation = key
-        self.current_handler = handler
-
-        return True
+    def _candidates(self, name, handlers, route):
+        # Only the handlers which may accept this kind of update, e.g. the CommandHandlers of
+        # its command, looked up in a table per list of handlers
+        index = self._indexes.get(name)
+        if index is None or not index.indexes(handlers):
+            index = self._indexes[name] = _HandlerIndex(handlers)
+        return index.lookup(route)
 
     def handle_update(self, update, dispatcher):
         """
@@ -293,9 +401,190 @@ class ConversationHandler(Handler):
             dispatcher (:class:`telegram.ext.Dispatcher`): Dispatcher that originated the Update.
         """
 
-        new_state = self.current_handler.handle_update(update, dispatcher)
+        selected = self.pop_check_result(update)
+        if selected is None:
+            # check_update was called in another thread
+            if not self.check_update(update):
+                return
+            selected = self.pop_check_result(update)
+
+        key, state, handler = selected
+        if handler is None:
+            # The update was parked by check_update
+            return
+
+        with self._key_lock(key):
+            with self._lock:
+                current = self.conversations.get(key)
+                if current != state:
+                    # Another thread moved the conversation on since check_update
+                    if self._is_promise_state(current) or key in self._parked:
+                        self._park(update, key)
+                        return
+            if current != state:
+                handler = self._select_handler(update, key, current)
+                if handler is None:
+                    return
+
+            new_state = handler.handle_update(update, dispatcher)
+
+            if asyncio is not None and inspect.isawaitable(new_state):
+                # The callback is a coroutine function: the state is pending until it finishes,
+                # the dispatcher awaits the returned future
+                new_state = asyncio.ensure_future(new_state)
+                with self._lock:
+                    self.update_state(new_state, key)
+                self._set_timeout(key, update, dispatcher)
+                return new_state
+
+            self._set_state(new_state, key, update, dispatcher)
+
+    def _set_state(self, new_state, key, update, dispatcher):
+        with self._lock:
+            self.update_state(new_state, key)
+        self._set_timeout(key, update, dispatcher)
+        if isinstance(new_state, Promise):
+            new_state.add_done_callback(
+                lambda promise: self._resolve_promise(key, promise, dispatcher))
+
+    @staticmethod
+    def _is_promise_state(state):
+        return isinstance(state, tuple) and len(state) == 2 and isinstance(state[1], Promise)
+
+    def _settle_promise(self, key, promise):
+        # Must be called with the lock held
+        state = self.conversations.get(key)
+        if not (self._is_promise_state(state) and state[1] is promise):
+            return
 
-        self.update_state(new_state, self.current_conversation)
+        self._pending_since.pop(key, None)
+        old_state = state[0]
+        if old_state is None:
+            del self.conversations[key]
+        else:
+            self.conversations[key] = old_state
+
+        if promise.exception is not None:
+            self.logger.debug('keeping state %s, the run_async function raised an exception'
+                              % str(old_state))
+            self._persist(key)
+        else:
+            self.update_state(promise.result(), key)
+
+    def _resolve_promise(self, key, promise, dispatcher):
+        # Runs in the thread of the run_async function once it finished. The updates parked
+        # meanwhile are handled here one by one, until a handler starts a run_async function
+        # again, whose callback continues with the rest
+        with self._lock:
+            self._settle_promise(key, promise)
+            if key in self._draining:
+                return
+            self._draining.add(key)
+
+        while 1:
+            with self._lock:
+                parked = self._parked.get(key)
+                if not parked or self._is_promise_state(self.conversations.get(key)):
+                    if not parked:
+                        self._parked.pop(key, None)
+                    self._draining.discard(key)
+                    return
+                update = parked.popleft()
+
+            # Errors are handled like the dispatcher handles those of handle_update
+            try:
+                with self._key_lock(key):
+                    handler = self._select_handler(update, key, self.conversations.get(key))
+                    if handler is not None:
+                        self._set_state(handler.handle_update(update, dispatcher), key, update,
+                                        dispatcher)
+            except DispatcherHandlerFlow:
+                # There are no further handlers of the update to continue with or stop
+                pass
+            except TelegramError as te:
+                self.logger.warning('A TelegramError was raised while processing the parked '
+                                    'Update.')
+                try:
+                    dispatcher.dispatch_error(update, te)
+                except Exception:
+                    self.logger.exception('An uncaught error was raised while handling the '
+                                          'error')
+            except Exception:
+                self.logger.exception('An uncaught error was raised while processing the '
+                                      'parked update')
+
+    def _set_timeout(self, key, update, dispatcher):
+        if self.conversation_timeout is None:
+            return
+        if dispatcher.job_queue is None:
+            self.logger.warning('conversation_timeout needs a dispatcher with a job queue')
+            return
+
+        with self._lock:
+            job = self.timeout_jobs.pop(key, None)
+            if job is not None:
+                job.schedule_removal()
+            if key in self.conversations:
+                self.timeout_jobs[key] = dispatcher.job_queue.run_once(
+                    self._trigger_timeout, self.conversation_timeout,
+                    context=(key, update, dispatcher))
+
+    def _trigger_timeout(self, bot, job):
+        key, update, dispatcher = job.context
+        with self._key_lock(key):
+            with self._lock:
+                if self.timeout_jobs.get(key) is not job:
+                    return
+                del self.timeout_jobs[key]
+
+                state = self.conversations.get(key)
+                if (self._is_promise_state(state) or isinstance(state, tuple) and len(state) == 2
+                        and self._is_future(state[1]) or key in self._parked):
+                    # Still busy with an update, which is not idling
+                    self.timeout_jobs[key] = job.job_queue.run_once(
+                        self._trigger_timeout, self.conversation_timeout, context=job.context)
+                    return
+
+                self.logger.debug('conversation %s timed out' % str(key))
+                self.update_state(self.END, key)
+
+            for handler in self.states.get(self.TIMEOUT, []):
+                try:
+                    if handler.check_update(update):
+                        handler.handle_update(update, dispatcher)
+                except Exception:
+                    self.logger.exception('An uncaught error was raised while handling the '
+                                          'timeout of conversation %s' % str(key))
+
+    def _check_timed_out(self, update, key, state):
+        for candidate in (self.timed_out_behavior or []):
+            if candidate.check_update(update):
+                self.store_check_result(update, (key, state, candidate))
+
+                return True
+
+        return False
+
+    @staticmethod
+    def _is_future(obj):
+        return asyncio is not None and isinstance(obj, asyncio.Future)
+
+    def _resolve_future(self, key, future):
+        state = self.conversations.get(key)
+        if not (isinstance(state, tuple) and len(state) == 2 and state[1] is future):
+            return
+
+        old_state = state[0]
+        if old_state is None:
+            del self.conversations[key]
+        else:
+            self.conversations[key] = old_state
+
+        if future.cancelled() or future.exception() is not None:
+            self.logger.debug('keeping state %s, the coroutine did not finish' % str(old_state))
+            self._persist(key)
+        else:
+            self.update_state(future.result(), key)
 
     def update_state(self, new_state, key):
         if new_state == self.END:
@@ -306,6 +595,24 @@ class ConversationHandler(Handler):
 
         elif isinstance(new_state, Promise):
             self.conversations[key] = (self.conversations.get(key), new_state)
+            self._pending_since[key] = time.time()
+
+        elif self._is_future(new_state):
+            self.conversations[key] = (self.conversations.get(key), new_state)
+            new_state.add_done_callback(lambda future: self._resolve_future(key, future))
 
         elif new_state is not None:
             self.conversations[key] = new_state
+
+        self._persist(key)
+
+    def _persist(self, key):
+        if self.persistence is None:
+            return
+        state = self.conversations.get(key)
+        # A pending state is stored as the state it came from, the run_async function or
+        # coroutine won't be there anymore after a restart
+        if (isinstance(state, tuple) and len(state) == 2
+                and (isinstance(state[1], Promise) or self._is_future(state[1]))):
+            state = state[0]
+        self.persistence.conversation_changed(self.name, key, state)
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+#
+# A library that provides a Python interface to the Telegram Bot API
+# Copyright (C) 2015-2017
+# Leandro Toledo de Souza <devs@python-telegram-bot.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser Public License for more details.
+#
+# You should have received a copy of the GNU Lesser Public License
+# along with this program.  If not, see [http://www.gnu.org/licenses/].
+"""This module contains the DataStore class and its backends."""
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import RLock
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
+
+class SQLiteBackend(object):
+    """
+    Keeps the entries evicted from a :class:`DataStore` in an SQLite database. Keys and values
+    are pickled.
+
+    Args:
+        filename (:obj:`str`): Path of the database file. It is created if it doesn't exist.
+
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._lock = RLock()
+        self._conn = sqlite3.connect(filename, check_same_thread=False)
+        with self._conn:
+            self._conn.execute('CREATE TABLE IF NOT EXISTS data '
+                               '(key BLOB PRIMARY KEY, value BLOB NOT NULL)')
+
+    @staticmethod
+    def _dump(obj):
+        return sqlite3.Binary(pickle.dumps(obj, 2))
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM data WHERE key = ?',
+                                     (self._dump(key),)).fetchone()
+        return pickle.loads(bytes(row[0])) if row else None
+
+    def set(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO data (key, value) VALUES (?, ?)',
+                               (self._dump(key), self._dump(value)))
+
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM data WHERE key = ?', (self._dump(key),))
+
+    def keys(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT key FROM data').fetchall()
+        return [pickle.loads(bytes(row[0])) for row in rows]
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM data WHERE key = ? LIMIT 1',
+                                      (self._dump(key),)).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM data').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class DataStore(MutableMapping):
+    """
+    A mapping for :attr:`telegram.ext.Dispatcher.user_data` and
+    :attr:`telegram.ext.Dispatcher.chat_data` which, unlike the default ``defaultdict(dict)``,
+    doesn't grow forever. Like the latter, looking up a missing key creates an empty ``dict``.
+
+    Entries are evicted once more than :attr:`maxsize` are held in memory (least recently used
+    first) or when they weren't used for :attr:`ttl` seconds. Evicted entries are dropped, or
+    moved to the :attr:`backend` if there is one, from where they are loaded again the next time
+    they are looked up.
+
+    Note:
+        An entry can be evicted while a handler still holds its ``dict``. Choose :attr:`maxsize`
+        and :attr:`ttl` large enough that this doesn't happen while an update is handled.
+
+    Attributes:
+        maxsize (:obj:`int`): Maximum number of entries kept in memory.
+        ttl (:obj:`float`): Seconds after their last use entries are evicted.
+        backend (:obj:`object`): Where evicted entries are moved to.
+        evictions (:obj:`int`): Number of entries evicted so far.
+        loads (:obj:`int`): Number of entries loaded back from the backend so far.
+
+    Args:
+        maxsize (:obj:`int`, optional): Maximum number of entries kept in memory. Defaults to
+            ``None``, which means no limit.
+        ttl (:obj:`int` | :obj:`float`, optional): Evict entries which weren't used for this many
+            seconds. Defaults to ``None``, which means never.
+        backend (:obj:`object`, optional): An object with ``get(key)``, ``set(key, value)``,
+            ``delete(key)``, ``keys()``, ``__contains__(key)`` and ``__len__()`` methods, e.g. a
+            :class:`SQLiteBackend`. The latter two are used where the values aren't needed, so
+            they shouldn't load them. Defaults to ``None``, which means evicted entries are
+            dropped.
+
+    """
+
+    def __init__(self, maxsize=None, ttl=None, backend=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend
+        self.evictions = 0
+        self.loads = 0
+        # key -> [value, time of last use], in order of last use
+        self._data = OrderedDict()
+        self._lock = RLock()
+
+    def _touch(self, key, entry, now):
+        entry[1] = now
+        del self._data[key]
+        self._data[key] = entry
+
+    def _evict(self, now):
+        if self.ttl is not None:
+            while self._data:
+                key = next(iter(self._data))
+                if now - self._data[key][1] < self.ttl:
+                    break
+                self._evict_entry(key)
+        if self.maxsize is not None:
+            while len(self._data) > self.maxsize:
+                self._evict_entry(next(iter(self._data)))
+
+    def _evict_entry(self, key):
+        value = self._data.pop(key)[0]
+        self.evictions += 1
+        if self.backend is not None:
+            self.backend.set(key, value)
+
+    def _load(self, key):
+        if self.backend is None:
+            return None
+        value = self.backend.get(key)
+        if value is not None:
+            self.backend.delete(key)
+            self.loads += 1
+        return value
+
+    def __getitem__(self, key):
+        with self._lock:
+            now = time.time()
+            entry = self._data.get(key)
+            if entry is not None:
+                self._touch(key, entry, now)
+            else:
+                value = self._load(key)
+                entry = self._data[key] = [value if value is not None else {}, now]
+            self._evict(now)
+            return entry[0]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            now = time.time()
+            self._data.pop(key, None)
+            self._data[key] = [value, now]
+            if self.backend is not None:
+                self.backend.delete(key)
+            self._evict(now)
+
+    def __delitem__(self, key):
+        with self._lock:
+            found = self._data.pop(key, None) is not None
+            if self.backend is not None and key in self.backend:
+                self.backend.delete(key)
+                found = True
+            if not found:
+                raise KeyError(key)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data or (self.backend is not None and key in self.backend)
+
+    def get(self, key, default=None):
+        """Returns the value of ``key`` without creating it if it's missing."""
+        with self._lock:
+            return self[key] if key in self else default
+
+    def __iter__(self):
+        with self._lock:
+            keys = list(self._data)
+            if self.backend is not None:
+                keys.extend(self.backend.keys())
+        return iter(keys)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data) + (len(self.backend) if self.backend is not None else 0)
+
+    @property
+    def in_memory(self):
+        """:obj:`int`: Number of entries held in memory."""
+        return len(self._data)
+
+    def expire(self):
+        """Evicts the entries which weren't used for :attr:`ttl` seconds. Entries are also
+        evicted whenever the store is used, so calling this is only needed to free memory while
+        the bot is idle, e.g. from a :class:`telegram.ext.Job`."""
+        with self._lock:
+            self._evict(time.time())
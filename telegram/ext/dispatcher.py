@@ -19,6 +19,7 @@
 """This module contains the Dispatcher class."""
 
 import logging
+import re
 import weakref
 from functools import wraps
 from threading import Thread, Lock, Event, current_thread, BoundedSemaphore
@@ -30,12 +31,25 @@ from queue import Queue, Empty
 
 from future.builtins import range
 
-from telegram import TelegramError
+from telegram import TelegramError, Update
+from telegram.ext.commandhandler import CommandHandler, split_command
+from telegram.ext.filters import cached_results
 from telegram.ext.handler import Handler
+from telegram.ext.regexhandler import RegexHandler
+from telegram.utils import webhookreply
 from telegram.utils.promise import Promise
 
 logging.getLogger(__name__).addHandler(logging.NullHandler())
 DEFAULT_GROUP = 0
+UPDATE_TYPES = ('message', 'edited_message', 'channel_post', 'edited_channel_post',
+                'inline_query', 'chosen_inline_result', 'callback_query', 'shipping_query',
+                'pre_checkout_query')
+# Consecutive RegexHandlers of a group are matched with a single regex from this many on
+REGEX_RUN_MIN = 4
+REGEX_RUN_MAX = 50
+# Backreferences, conditional group references and inline flags don't survive being combined
+# with other patterns
+_UNCOMBINABLE = re.compile(r'\\[1-9]|\(\?P=|\(\?\(|\(\?[aiLmsux]')
 
 
 def run_async(func):
@@ -88,6 +102,8 @@ class Dispatcher(object):
             instance to pass onto handler callbacks.
         workers (:obj:`int`): Number of maximum concurrent worker threads for the ``@run_async``
             decorator.
+        chat_lanes (:obj:`int`): Number of threads processing updates in parallel, ``0`` if
+            updates are processed one by one by the dispatcher thread.
 
     Args:
         bot (:class:`telegram.Bot`): The bot object that should be passed to the handlers.
@@ -96,6 +112,33 @@ class Dispatcher(object):
                 instance to pass onto handler callbacks.
         workers (:obj:`int`, optional): Number of maximum concurrent worker threads for the
             ``@run_async`` decorator. defaults to 4.
+        chat_lanes (:obj:`int`, optional): If greater than 0, updates are processed by that many
+            threads ("lanes") in parallel. Every update is assigned to a lane by the id of its
+            :attr:`telegram.Update.effective_chat` (or :attr:`telegram.Update.effective_user` if
+            it has no chat), so that the updates of one chat are still processed in order and
+            never concurrently, while different chats don't wait for each other. Defaults to 0.
+        user_data (:obj:`dict`, optional): The mapping to use as :attr:`user_data`, e.g. a
+            :class:`telegram.ext.DataStore` limiting its size. Looking up a missing user must
+            create an empty ``dict``. Defaults to a ``defaultdict(dict)``.
+        chat_data (:obj:`dict`, optional): The mapping to use as :attr:`chat_data`, see
+            ``user_data``. Defaults to a ``defaultdict(dict)``.
+        persistence (:class:`telegram.ext.BasePersistence`, optional): Where to store
+            :attr:`user_data`, :attr:`chat_data` and the states of persistent
+            :class:`telegram.ext.ConversationHandler` s. The stored data is loaded here, and the
+            data changed by updates is written by a background thread while the dispatcher is
+            running and when it stops.
+        dedup_window (:obj:`int`, optional): If greater than 0, the ids of that many of the latest
+            updates are remembered, and an update with one of these ids is dropped. Telegram
+            sends an update again if the response to the webhook request was too slow, and
+            polling fetches it again after a restart which didn't confirm it. The ids are only
+            remembered by this dispatcher, so with the ``processes`` of
+            :attr:`telegram.ext.Updater.start_webhook` each process has its own window, and an
+            update sent again to another process isn't dropped. Defaults to 0, which means off.
+
+    Note:
+        With a ``persistence``, the data of the user and chat of an update is written once the
+        update was processed. Changes made later by ``@run_async`` functions are only written
+        with the next update of the same user or chat.
     """
 
     __singleton_lock = Lock()
@@ -103,20 +146,42 @@ class Dispatcher(object):
     __singleton = None
     logger = logging.getLogger(__name__)
 
-    def __init__(self, bot, update_queue, workers=4, exception_event=None, job_queue=None):
+    def __init__(self,
+                 bot,
+                 update_queue,
+                 workers=4,
+                 exception_event=None,
+                 job_queue=None,
+                 chat_lanes=0,
+                 user_data=None,
+                 chat_data=None,
+                 persistence=None,
+                 dedup_window=0):
         self.bot = bot
         self.update_queue = update_queue
         self.job_queue = job_queue
         self.workers = workers
+        self.chat_lanes = chat_lanes
 
-        self.user_data = defaultdict(dict)
+        self.user_data = user_data if user_data is not None else defaultdict(dict)
         """:obj:`dict`: A dictionary handlers can use to store data for the user."""
-        self.chat_data = defaultdict(dict)
+        self.chat_data = chat_data if chat_data is not None else defaultdict(dict)
         """:obj:`dict`: A dictionary handlers can use to store data for the chat."""
+        self.persistence = persistence
+        """:class:`telegram.ext.BasePersistence`: Optional. Where the data is stored."""
+        if persistence is not None:
+            for user_id, data in persistence.get_user_data().items():
+                self.user_data[user_id] = data
+            for chat_id, data in persistence.get_chat_data().items():
+                self.chat_data[chat_id] = data
+        self._recent_ids = _RecentIds(dedup_window) if dedup_window > 0 else None
         self.handlers = {}
         """Dict[:obj:`int`, List[:class:`telegram.ext.Handler`]]: Holds the handlers per group."""
         self.groups = []
         """List[:obj:`int`]: A list with all groups."""
+        self._handler_index = {}
+        # The lowercase username of the bot, once a command addressed to a bot needed it
+        self._bot_username = None
         self.error_handlers = []
         """List[:obj:`callable`]: A list of errorHandlers."""
 
@@ -124,6 +189,7 @@ class Dispatcher(object):
         """:obj:`bool`: Indicates if this dispatcher is running."""
         self.__stop_event = Event()
         self.__exception_event = exception_event or Event()
+        self.__persistence_lock = Lock()
         self.__async_queue = Queue()
         self.__async_threads = set()
 
@@ -226,24 +292,116 @@ class Dispatcher(object):
         self.running = True
         self.logger.debug('Dispatcher started')
 
+        flusher = None
+        if self.persistence is not None:
+            stop_flushing = Event()
+            flusher = Thread(target=self._flush_persistence_loop, args=(stop_flushing,),
+                             name='{0}_persistence'.format(current_thread().name))
+            flusher.start()
+
+        self._run()
+
+        if flusher is not None:
+            stop_flushing.set()
+            flusher.join()
+            self.flush_persistence()
+
+        self.running = False
+        self.logger.debug('Dispatcher thread stopped')
+
+    def _run(self):
+        lanes = [Queue() for _ in range(self.chat_lanes)]
+        threads = [
+            Thread(target=self._lane, args=(lane,), name='{0}_lane_{1}'.format(
+                current_thread().name, i)) for i, lane in enumerate(lanes)
+        ]
+        for thread in threads:
+            thread.start()
+
         while 1:
             try:
                 # Pop update from update queue.
                 update = self.update_queue.get(True, 1)
             except Empty:
-                if self.__stop_event.is_set():
-                    self.logger.debug('orderly stopping')
-                    break
-                elif self.__exception_event.is_set():
-                    self.logger.critical('stopping due to exception in another thread')
+                if self._should_stop():
                     break
                 continue
 
+            if lanes:
+                lanes[self._lane_key(update) % len(lanes)].put(update)
+            else:
+                self.logger.debug('Processing Update: %s' % update)
+                self.process_update(update)
+
+        # Let the lanes finish the updates they were already given
+        for lane in lanes:
+            lane.put(None)
+        for thread in threads:
+            thread.join()
+
+    def _lane(self, lane):
+        while 1:
+            update = lane.get()
+            if update is None:
+                break
+
             self.logger.debug('Processing Update: %s' % update)
             self.process_update(update)
 
-        self.running = False
-        self.logger.debug('Dispatcher thread stopped')
+    @staticmethod
+    def _lane_key(update):
+        if isinstance(update, Update):
+            chat = update.effective_chat
+            if chat is not None:
+                return chat.id
+            user = update.effective_user
+            if user is not None:
+                return user.id
+        return 0
+
+    def _flush_persistence_loop(self, stop_flushing):
+        while not stop_flushing.wait(self.persistence.flush_interval):
+            try:
+                self.flush_persistence()
+            except Exception:
+                self.logger.exception('An uncaught error was raised while flushing the '
+                                      'persistence')
+
+    def flush_persistence(self):
+        """
+        Writes the data changed since the last call to the :attr:`persistence`. This is done
+        periodically while the dispatcher is running and when it stops, so it only needs to be
+        called when updates are processed with :attr:`process_update` directly.
+        """
+
+        if self.persistence is None:
+            return
+        with self.__persistence_lock:
+            user_ids, chat_ids, conversations = self.persistence.take_dirty()
+            # .get() doesn't create missing entries in a defaultdict or a DataStore. A handler
+            # can change the data while it's written, which is then written again next time
+            for user_id in user_ids:
+                try:
+                    self.persistence.update_user_data(user_id, self.user_data.get(user_id))
+                except RuntimeError:
+                    self.persistence.mark_dirty(user_id=user_id)
+            for chat_id in chat_ids:
+                try:
+                    self.persistence.update_chat_data(chat_id, self.chat_data.get(chat_id))
+                except RuntimeError:
+                    self.persistence.mark_dirty(chat_id=chat_id)
+            for (name, key), new_state in conversations.items():
+                self.persistence.update_conversation(name, key, new_state)
+            self.persistence.flush()
+
+    def _should_stop(self):
+        if self.__stop_event.is_set():
+            self.logger.debug('orderly stopping')
+            return True
+        elif self.__exception_event.is_set():
+            self.logger.critical('stopping due to exception in another thread')
+            return True
+        return False
 
     def stop(self):
         """
@@ -271,6 +429,11 @@ class Dispatcher(object):
             self.__async_threads.remove(thr)
             self.logger.debug('async thread {0}/{1} has ended'.format(i + 1, total))
 
+    @property
+    def exception_event(self):
+        """:obj:`threading.Event`: Set when a thread of the Updater died of an exception."""
+        return self.__exception_event
+
     @property
     def has_running_threads(self):
         return self.running or bool(self.__async_threads)
@@ -284,41 +447,77 @@ class Dispatcher(object):
                 The update to process.
         """
 
+        for _ in self._process_update(update):
+            pass
+
+    def _process_update(self, update):
+        # The processing of an update, shared with AsyncioDispatcher. It's a generator yielding
+        # the result of each handle_update call, so that e.g. a coroutine can be awaited by the
+        # caller. An exception raised by that is thrown back into the generator by the caller,
+        # which handles it like one raised by handle_update itself.
+
         # An error happened while polling
         if isinstance(update, TelegramError):
             self.dispatch_error(None, update)
             return
-        for group in self.groups:
-            try:
-                for handler in self.handlers[group]:
-                    try:
-                        if handler.check_update(update):
-                            try:
-                                handler.handle_update(update, self)
-                            except DispatcherHandlerContinue:
-                                continue
-                            break
-                    except DispatcherHandlerFlow:
-                        raise
-                    except TelegramError as te:
-                        self.logger.warning('A TelegramError was raised while processing the '
-                                            'Update.')
-
+        with cached_results(), webhookreply.replying(update, self.bot):
+            # Leaving replying answers the webhook request of a duplicate at once, if it waits
+            # for a reply
+            if self._is_duplicate(update):
+                return
+            route = self._route(update, self._username_for)
+            for group in self.groups:
+                try:
+                    for handler in self._handlers_for(group, route):
                         try:
-                            self.dispatch_error(update, te)
+                            if handler.check_update(update):
+                                try:
+                                    yield handler.handle_update(update, self)
+                                except DispatcherHandlerContinue:
+                                    continue
+                                break
+                        except DispatcherHandlerFlow:
+                            raise
+                        except TelegramError as te:
+                            self.logger.warning('A TelegramError was raised while processing the '
+                                                'Update.')
+
+                            try:
+                                self.dispatch_error(update, te)
+                            except Exception:
+                                self.logger.exception('An uncaught error was raised while '
+                                                      'handling the error')
+                            finally:
+                                break
+
+                        # Errors should not stop the thread
                         except Exception:
                             self.logger.exception('An uncaught error was raised while '
-                                                  'handling the error')
-                        finally:
+                                                  'processing the update')
                             break
+                except DispatcherHandlerStop:
+                    break
+        self._mark_dirty(update)
 
-                    # Errors should not stop the thread
-                    except Exception:
-                        self.logger.exception('An uncaught error was raised while '
-                                              'processing the update')
-                        break
-            except DispatcherHandlerStop:
-                break
+    @property
+    def duplicates(self):
+        """:obj:`int`: Number of updates dropped because of the ``dedup_window``."""
+        return self._recent_ids.duplicates if self._recent_ids is not None else 0
+
+    def _is_duplicate(self, update):
+        if (self._recent_ids is not None and isinstance(update, Update)
+                and not self._recent_ids.add(update.update_id)):
+            self.logger.debug('Dropping Update with ID %d, which was processed already',
+                              update.update_id)
+            return True
+        return False
+
+    def _mark_dirty(self, update):
+        if self.persistence is not None and isinstance(update, Update):
+            user = update.effective_user
+            chat = update.effective_chat
+            self.persistence.mark_dirty(user.id if user is not None else None,
+                                        chat.id if chat is not None else None)
 
     def add_handler(self, handler, group=DEFAULT_GROUP):
         """
@@ -344,15 +543,35 @@ class Dispatcher(object):
           * If :class:`telegram.DispatcherHandlerStop` was raised, then zero handlers (even
             from other groups) will called.
 
+        Handlers are only checked for the kinds of updates listed in their
+        :attr:`telegram.ext.Handler.update_types`, and a :class:`telegram.ext.CommandHandler` only
+        for messages starting with one of its commands, which are looked up in a table instead of
+        asking every handler.
+
+        The stored conversations of a persistent :class:`telegram.ext.ConversationHandler` are
+        loaded from the :attr:`persistence` when it is added.
+
         Args:
             handler (:class:`telegram.ext.Handler`): A Handler instance.
             group (:obj:`int`, optional): The group identifier. Default is 0.
+
+        Raises:
+            TypeError: If ``handler`` is not a :class:`telegram.ext.Handler` or ``group`` not an
+                :obj:`int`.
+            ValueError: If ``handler`` is a persistent conversation handler, but there is no
+                :attr:`persistence`.
         """
 
         if not isinstance(handler, Handler):
             raise TypeError('handler is not an instance of {0}'.format(Handler.__name__))
         if not isinstance(group, int):
             raise TypeError('group is not int')
+        if getattr(handler, 'persistent', False):
+            if self.persistence is None:
+                raise ValueError('persistent conversation handler {0!r} can not be added to a '
+                                 'dispatcher without persistence'.format(handler.name))
+            handler.persistence = self.persistence
+            handler.conversations = self.persistence.get_conversations(handler.name)
 
         if group not in self.handlers:
             self.handlers[group] = list()
@@ -360,6 +579,7 @@ class Dispatcher(object):
             self.groups = sorted(self.groups)
 
         self.handlers[group].append(handler)
+        self._handler_index.pop(group, None)
 
     def remove_handler(self, handler, group=DEFAULT_GROUP):
         """
@@ -372,10 +592,62 @@ class Dispatcher(object):
 
         if handler in self.handlers[group]:
             self.handlers[group].remove(handler)
+            self._handler_index.pop(group, None)
             if not self.handlers[group]:
                 del self.handlers[group]
                 self.groups.remove(group)
 
+    def _username_for(self, message):
+        # Bot.username may have to call get_me, so it's only read once
+        if self._bot_username is None:
+            try:
+                self._bot_username = message.bot.username.lower()
+            except Exception:
+                # e.g. no bot, or get_me failed. Routing must not raise, so the CommandHandlers
+                # check the username themselves, where errors are handled like any other
+                return None
+        return self._bot_username
+
+    @staticmethod
+    def _route(update, bot_username=None):
+        """Returns the kind of ``update`` its handlers are looked up by: the attribute of
+        :class:`telegram.Update` set on it and, for messages, the command they start with (or
+        ``None``). ``None`` if it can't be told.
+
+        If ``bot_username`` is passed, a function returning the lowercase username of the bot of
+        a message (or ``None`` if it's unknown), commands addressed to another bot are routed
+        like other messages, i.e. past the :class:`telegram.ext.CommandHandler` s."""
+        if not isinstance(update, Update):
+            return None
+        found = None
+        for update_type in UPDATE_TYPES:
+            if getattr(update, update_type) is not None:
+                if found is not None:
+                    return None
+                found = update_type
+
+        if found is None:
+            return None
+        elif found in ('message', 'edited_message'):
+            message = getattr(update, found)
+            command, username = split_command(message.text)
+            if username is not None and bot_username is not None:
+                own = bot_username(message)
+                if own is not None and username != own:
+                    command = None
+            return found, command
+        return found, None
+
+    def _handlers_for(self, group, route):
+        """Returns the handlers of ``group`` which may handle an update of kind ``route``, in
+        order. The lists are built once per group and kind of update."""
+        handlers = self.handlers[group]
+        index = self._handler_index.get(group)
+        if index is None or not index.indexes(handlers):
+            # Also rebuilt if the list of the group was changed without add_handler
+            index = self._handler_index[group] = _HandlerIndex(handlers)
+        return index.lookup(route)
+
     def add_error_handler(self, callback):
         """
         Registers an error handler in the Dispatcher.
@@ -409,3 +681,150 @@ class Dispatcher(object):
 
         for callback in self.error_handlers:
             callback(self.bot, update, error)
+
+
+class _RecentIds(object):
+    """The latest ``size`` update ids, in a ring buffer with a set for the lookups."""
+
+    def __init__(self, size):
+        self.duplicates = 0
+        self._ring = [None] * size
+        self._next = 0
+        self._ids = set()
+        self._lock = Lock()
+
+    def add(self, update_id):
+        """Remembers ``update_id``. Returns ``False`` if it's remembered already."""
+        with self._lock:
+            if update_id in self._ids:
+                self.duplicates += 1
+                return False
+            oldest = self._ring[self._next]
+            if oldest is not None:
+                self._ids.discard(oldest)
+            self._ring[self._next] = update_id
+            self._next = (self._next + 1) % len(self._ring)
+            self._ids.add(update_id)
+            return True
+
+
+class _HandlerIndex(object):
+    """Looks up which of a list of handlers may handle an update of a kind, as returned by
+    :attr:`Dispatcher._route`, by the :attr:`telegram.ext.Handler.update_types` and the commands
+    of :class:`telegram.ext.CommandHandler` s. The filtered lists are built on first use."""
+
+    def __init__(self, handlers):
+        self.handlers = handlers
+        self.size = len(handlers)
+        self.commands = set()
+        for handler in handlers:
+            if self._routes_command(handler):
+                self.commands.update(handler.command)
+        self.routes = {}
+
+    def indexes(self, handlers):
+        """Tells if this index is still up to date for ``handlers``."""
+        return self.handlers is handlers and self.size == len(handlers)
+
+    @staticmethod
+    def _routes_command(handler):
+        # Subclasses which override check_update may accept other messages as well
+        return (isinstance(handler, CommandHandler)
+                and type(handler).check_update == CommandHandler.check_update)
+
+    def lookup(self, route):
+        if route is None:
+            return self.handlers
+
+        update_type, command = route
+        if command not in self.commands:
+            # Commands no CommandHandler listens for are routed like any other message
+            command = None
+            route = update_type, None
+        try:
+            return self.routes[route]
+        except KeyError:
+            selected = [
+                handler for handler in self.handlers
+                if (handler.update_types is None or update_type in handler.update_types)
+                and (command in handler.command if self._routes_command(handler) else True)
+            ]
+            if update_type in ('message', 'edited_message', 'channel_post'):
+                selected = self._combine_regex_handlers(selected)
+            self.routes[route] = selected
+            return selected
+
+    @staticmethod
+    def _combine_regex_handlers(handlers):
+        """Replaces runs of consecutive RegexHandlers in ``handlers`` by :class:`_RegexRun` s."""
+        combined = []
+        run = []
+
+        def flush():
+            if len(run) >= REGEX_RUN_MIN:
+                try:
+                    combined.append(_RegexRun(run))
+                except (re.error, AssertionError):
+                    # e.g. the same group name in two patterns, or too many groups for py2
+                    combined.extend(run)
+            else:
+                combined.extend(run)
+            del run[:]
+
+        for handler in handlers:
+            if (isinstance(handler, RegexHandler)
+                    and type(handler).check_update == RegexHandler.check_update
+                    and not handler.pattern.flags & re.VERBOSE
+                    and not _UNCOMBINABLE.search(handler.pattern.pattern)):
+                if run and (len(run) == REGEX_RUN_MAX
+                            or handler.pattern.flags != run[0].pattern.flags):
+                    flush()
+                run.append(handler)
+            else:
+                flush()
+                combined.append(handler)
+        flush()
+        return combined
+
+
+class _RegexRun(Handler):
+    """Stands in for consecutive :class:`telegram.ext.RegexHandler` s of a group. Their patterns
+    are joined into one alternation, which finds the first of them matching a message in a single
+    scan. Behaves exactly like the RegexHandlers would one after another."""
+
+    def __init__(self, handlers):
+        super(_RegexRun, self).__init__(None)
+        self.handlers = list(handlers)
+        self.pattern = re.compile(
+            '|'.join('(?:{0})(?P<_r{1}>)'.format(handler.pattern.pattern, i)
+                     for i, handler in enumerate(self.handlers)),
+            self.handlers[0].pattern.flags)
+
+    def check_update(self, update):
+        text = update.effective_message.text
+        if not text:
+            return False
+        match = self.pattern.match(text)
+        if match is None:
+            return False
+        # The empty group closing the matching alternative is the last one matched
+        first = int(match.lastgroup[2:])
+        return self._check(update, first)
+
+    def _check(self, update, start):
+        for handler in self.handlers[start:]:
+            if handler.check_update(update):
+                self.store_check_result(update, handler)
+                return True
+        return False
+
+    def handle_update(self, update, dispatcher):
+        handler = self.pop_check_result(update)
+        while 1:
+            try:
+                return handler.handle_update(update, dispatcher)
+            except DispatcherHandlerContinue:
+                # The following handlers of the run are next in line
+                if not self._check(update, self.handlers.index(handler) + 1):
+                    raise
+                handler = self.pop_check_result(update)
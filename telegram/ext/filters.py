@@ -17,9 +17,57 @@
 # You should have received a copy of the GNU Lesser Public License
 # along with this program.  If not, see [http://www.gnu.org/licenses/].
 """ This module contains the Filters for use with the MessageHandler class """
+import os
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import local, Lock
+
 from telegram import Chat
 from future.utils import string_types
 
+try:
+    from collections.abc import MutableSequence
+except ImportError:
+    from collections import MutableSequence
+
+try:
+    array('q')
+    _ID_TYPECODE = 'q'
+except ValueError:
+    # Python 2 has no long long arrays
+    _ID_TYPECODE = 'l'
+
+
+class _ResultCache(local):
+    """The results of the filters for the message being dispatched, per thread."""
+
+    def __init__(self):
+        self.depth = 0
+        self.message = None
+        self.results = {}
+
+
+_cache = _ResultCache()
+
+
+@contextmanager
+def cached_results():
+    """
+    Context manager within which every filter is evaluated at most once per message. The
+    :class:`telegram.ext.Dispatcher` uses it while an update is checked by its handlers, so that
+    e.g. ``Filters.text`` used by many handlers only looks at the message once.
+    """
+
+    _cache.depth += 1
+    try:
+        yield
+    finally:
+        _cache.depth -= 1
+        if not _cache.depth:
+            _cache.message = None
+            _cache.results = {}
+
 
 class BaseFilter(object):
     """
@@ -53,14 +101,31 @@ class BaseFilter(object):
     will be the class name. If you want to overwrite this assign a better name to the `name`
     class variable.
 
+    The filters combined by ``&`` or ``|`` are evaluated in the order of their `cost`, those with
+    the same cost in the order they were written in. Filters which do more than looking at the
+    attributes of the message (e.g. database lookups) should set a higher `cost`, so that the
+    cheaper ones can rule out a message first.
+
     Attributes:
         name (:obj:`str`): Name for this filter. Defaults to the type of filter.
+        cost (:obj:`int`): Relative cost of evaluating this filter. Defaults to 1.
     """
 
     name = None
+    cost = 1
 
     def __call__(self, message):
-        return self.filter(message)
+        if not _cache.depth:
+            return self.filter(message)
+
+        if _cache.message is not message:
+            _cache.message = message
+            _cache.results = {}
+        try:
+            return _cache.results[id(self)]
+        except KeyError:
+            result = _cache.results[id(self)] = self.filter(message)
+            return result
 
     def __and__(self, other):
         return MergedFilter(self, and_filter=other)
@@ -101,9 +166,15 @@ class InvertedFilter(BaseFilter):
     def __init__(self, f):
         self.f = f
 
-    def filter(self, message):
+    def __call__(self, message):
         return not self.f(message)
 
+    filter = __call__
+
+    @property
+    def cost(self):
+        return self.f.cost
+
     def __repr__(self):
         return "<inverted {}>".format(self.f)
 
@@ -121,18 +192,301 @@ class MergedFilter(BaseFilter):
         self.base_filter = base_filter
         self.and_filter = and_filter
         self.or_filter = or_filter
+        self._operands = None
+
+    def _flatten(self):
+        """Returns the filters of the chain of ``&`` (or ``|``) this filter is part of, cheapest
+        first."""
+        operands = []
+        for f in (self.base_filter, self.and_filter or self.or_filter):
+            if isinstance(f, MergedFilter) and bool(f.and_filter) == bool(self.and_filter):
+                operands.extend(f._flatten())
+            else:
+                operands.append(f)
+        return sorted(operands, key=lambda f: f.cost)
+
+    @property
+    def cost(self):
+        return self.base_filter.cost + (self.and_filter or self.or_filter).cost
+
+    def __call__(self, message):
+        # The tree of merged filters is flattened on first use and only its leaves are cached
+        if self._operands is None:
+            self._operands = self._flatten()
 
-    def filter(self, message):
         if self.and_filter:
-            return self.base_filter(message) and self.and_filter(message)
-        elif self.or_filter:
-            return self.base_filter(message) or self.or_filter(message)
+            for f in self._operands:
+                if not f(message):
+                    return False
+            return True
+        else:
+            for f in self._operands:
+                if f(message):
+                    return True
+            return False
+
+    filter = __call__
 
     def __repr__(self):
         return "<{} {} {}>".format(self.base_filter, "and" if self.and_filter else "or",
                                    self.and_filter or self.or_filter)
 
 
+class _SortedArray(object):
+    """An immutable collection of values kept in a sorted sequence. Takes a fraction of the memory
+    of a :obj:`frozenset` for millions of values; lookups take O(log n) instead of O(1)."""
+
+    def __init__(self, values):
+        self._values = values
+
+    def __contains__(self, value):
+        i = bisect_left(self._values, value)
+        return i != len(self._values) and self._values[i] == value
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+
+class _Members(object):
+    """The ids or usernames of a :class:`Filters.user` or :class:`Filters.chat`.
+
+    They are kept in a set, which :attr:`update` changes in place, as lookups by other threads
+    are safe meanwhile. If ``compact`` is used, they are kept in a :class:`_SortedArray` instead.
+    Changes of it are collected in a set of additions and one of removals, which are merged into
+    a new array by the first lookup after them, so that a batch of changes costs one rebuild."""
+
+    def __init__(self, values, compact, typecode=None):
+        self.compact = compact
+        self._typecode = typecode
+        self._lock = Lock()
+        self._added = set()
+        self._removed = set()
+        self._values = self._build(values)
+
+    def _build(self, values):
+        if not self.compact:
+            return set(values)
+        values = sorted(set(values))
+        return _SortedArray(array(self._typecode, values) if self._typecode else tuple(values))
+
+    def _merge(self):
+        with self._lock:
+            if self._added or self._removed:
+                values = set(self._values)
+                values.difference_update(self._removed)
+                values.update(self._added)
+                self._values = self._build(values)
+                self._added.clear()
+                self._removed.clear()
+
+    def __contains__(self, value):
+        if self._added or self._removed:
+            self._merge()
+        return value in self._values
+
+    def update(self, values, add):
+        with self._lock:
+            if not self.compact:
+                if add:
+                    self._values.update(values)
+                else:
+                    self._values.difference_update(values)
+            elif add:
+                self._added.update(values)
+                self._removed.difference_update(values)
+            else:
+                self._removed.update(values)
+                self._added.difference_update(values)
+
+    def replace(self, values):
+        values = self._build(values)
+        with self._lock:
+            self._values = values
+            self._added.clear()
+            self._removed.clear()
+
+    def as_list(self):
+        self._merge()
+        with self._lock:
+            return list(self._values)
+
+    def __len__(self):
+        self._merge()
+        return len(self._values)
+
+
+class _MembersView(MutableSequence):
+    """The list of ids or usernames of a :class:`Filters.user` or :class:`Filters.chat`, as
+    returned by e.g. :attr:`Filters.user.user_ids`. Like the plain lists of former versions, it
+    can be changed in place to change whom the filter lets through: ``append``, ``extend``,
+    ``remove`` and ``in`` take O(1) per value, the other operations O(n). Each value is held
+    once, in no particular order."""
+
+    def __init__(self, members, normalize=None):
+        self._members = members
+        self._normalize = normalize or (lambda value: value)
+
+    def __len__(self):
+        return len(self._members)
+
+    def __iter__(self):
+        return iter(self._members.as_list())
+
+    def __contains__(self, value):
+        return self._normalize(value) in self._members
+
+    def __getitem__(self, index):
+        return self._members.as_list()[index]
+
+    def __setitem__(self, index, value):
+        values = self._members.as_list()
+        if isinstance(index, slice):
+            values[index] = [self._normalize(v) for v in value]
+        else:
+            values[index] = self._normalize(value)
+        self._members.replace(values)
+
+    def __delitem__(self, index):
+        values = self._members.as_list()
+        del values[index]
+        self._members.replace(values)
+
+    def insert(self, index, value):
+        self._members.update((self._normalize(value),), True)
+
+    def append(self, value):
+        self._members.update((self._normalize(value),), True)
+
+    def extend(self, values):
+        self._members.update([self._normalize(value) for value in values], True)
+
+    def remove(self, value):
+        if value not in self:
+            raise ValueError('{0!r} is not in the list'.format(value))
+        self._members.update((self._normalize(value),), False)
+
+    def clear(self):
+        self._members.replace(())
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple, _MembersView)):
+            return sorted(self) == sorted(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self._members.as_list())
+
+
+class _MemberFilter(BaseFilter):
+    """Base class of :class:`Filters.user` and :class:`Filters.chat`, which let through the
+    messages whose user (or chat) has one of a collection of ids or usernames.
+
+    The collections can be changed by :attr:`add`, :attr:`remove` and :attr:`reload` while the
+    filter is in use by other threads."""
+
+    def _init_members(self, ids, usernames, filename, compact, kind):
+        if filename is not None:
+            if ids or usernames:
+                raise ValueError('filename can not be combined with {0}_id or '
+                                 'username'.format(kind))
+        elif not (bool(ids) ^ bool(usernames)):
+            raise ValueError('One and only one of {0}_id or username must be used'.format(kind))
+
+        self.filename = filename
+        self.compact = compact
+        self._lock = Lock()
+        self._mtime = None
+        self._ids = _Members(self._as_ids(ids), compact, typecode=_ID_TYPECODE)
+        self._usernames = _Members(self._as_usernames(usernames), compact)
+        if filename is not None:
+            self.reload()
+
+    @staticmethod
+    def _as_ids(ids):
+        if ids is None:
+            return ()
+        return (ids,) if isinstance(ids, int) else list(ids)
+
+    @staticmethod
+    def _as_usernames(usernames):
+        if usernames is None:
+            return ()
+        if isinstance(usernames, string_types):
+            usernames = (usernames,)
+        return [username.replace('@', '') for username in usernames]
+
+    def add(self, ids=None, usernames=None):
+        """
+        Lets through the messages of more ids and/or usernames.
+
+        Args:
+            ids (:obj:`int` | List[:obj:`int`], optional): The ids to add.
+            usernames (:obj:`str` | List[:obj:`str`], optional): The usernames to add, optionally
+                starting with '@'.
+        """
+        self._ids.update(self._as_ids(ids), True)
+        self._usernames.update(self._as_usernames(usernames), True)
+
+    def remove(self, ids=None, usernames=None):
+        """
+        Stops letting through the messages of some ids and/or usernames.
+
+        Args:
+            ids (:obj:`int` | List[:obj:`int`], optional): The ids to remove.
+            usernames (:obj:`str` | List[:obj:`str`], optional): The usernames to remove,
+                optionally starting with '@'.
+        """
+        self._ids.update(self._as_ids(ids), False)
+        self._usernames.update(self._as_usernames(usernames), False)
+
+    def reload(self, force=False):
+        """
+        Replaces the ids and usernames by the contents of :attr:`filename`, if it was modified
+        since it was last read. Each line of the file holds an id or a username, blank lines and
+        lines starting with '#' are ignored. Can be called from a :class:`telegram.ext.Job` to
+        pick up changes while the bot is running.
+
+        Args:
+            force (:obj:`bool`, optional): Read the file even if it wasn't modified.
+
+        Returns:
+            :obj:`bool`: Whether the file was read.
+        """
+        with self._lock:
+            mtime = os.stat(self.filename).st_mtime
+            if not force and mtime == self._mtime:
+                return False
+
+            ids = []
+            usernames = []
+            with open(self.filename) as fobj:
+                for line in fobj:
+                    line = line.strip()
+                    if not line or line.startswith('#'):
+                        continue
+                    try:
+                        ids.append(int(line))
+                    except ValueError:
+                        usernames.append(line.replace('@', ''))
+
+            self._ids.replace(ids)
+            self._usernames.replace(usernames)
+            self._mtime = mtime
+            return True
+
+    def _allows(self, entity_id, username):
+        return bool(entity_id in self._ids or username and username in self._usernames)
+
+
 class Filters(object):
     """
     Predefined filters for use with the `filter` argument of :class:`telegram.ext.MessageHandler`.
@@ -410,48 +764,68 @@ class Filters(object):
     group = _Group()
     """:obj:`Filter`: Messages sent in a group chat."""
 
-    class user(BaseFilter):
+    class user(_MemberFilter):
         """
         Filters messages to allow only those which are from specified user ID.
 
+        The ids and usernames are kept in sets (or sorted arrays, if ``compact`` is used), so
+        that lists of hundreds of thousands of users are fine. They can be changed with
+        :attr:`add` and :attr:`remove` or loaded from a file while the bot is running.
+
         Examples:
             ``MessageHandler(Filters.user(1234), callback_method)``
 
+            ``admins = Filters.user(filename='admins.txt')`` and
+            ``job_queue.run_repeating(lambda bot, job: admins.reload(), 60)``
+
         Args:
             user_id(:obj:`int` | List[:obj:`int`], optional): Which user ID(s) to allow through.
             username(:obj:`str` | List[:obj:`str`], optional): Which username(s) to allow through.
                 If username starts with '@' symbol, it will be ignored.
+            filename(:obj:`str`, optional): A file holding one user ID or username per line. See
+                :attr:`reload`.
+            compact(:obj:`bool`, optional): Keep the user IDs and usernames in sorted arrays
+                instead of sets. Uses a lot less memory for millions of them, but each message
+                takes O(log n) to check. Default is ``False``.
 
         Raises:
-            ValueError: If chat_id and username are both present, or neither is.
+            ValueError: If user_id and username are both present, or neither is.
         """
 
-        def __init__(self, user_id=None, username=None):
-            if not (bool(user_id) ^ bool(username)):
-                raise ValueError('One and only one of user_id or username must be used')
-            if user_id is not None and isinstance(user_id, int):
-                self.user_ids = [user_id]
-            else:
-                self.user_ids = user_id
-            if username is None:
-                self.usernames = username
-            elif isinstance(username, string_types):
-                self.usernames = [username.replace('@', '')]
-            else:
-                self.usernames = [user.replace('@', '') for user in username]
+        def __init__(self, user_id=None, username=None, filename=None, compact=False):
+            self._init_members(user_id, username, filename, compact, 'user')
+
+        @property
+        def user_ids(self):
+            """List[:obj:`int`]: The user IDs to allow through. Changing the list, or assigning
+            to it, changes them. Empty instead of ``None`` if there are none."""
+            return _MembersView(self._ids)
+
+        @user_ids.setter
+        def user_ids(self, user_ids):
+            self._ids.replace(self._as_ids(user_ids))
+
+        @property
+        def usernames(self):
+            """List[:obj:`str`]: The usernames to allow through. Changing the list, or assigning
+            to it, changes them. Empty instead of ``None`` if there are none."""
+            return _MembersView(self._usernames, lambda username: username.replace('@', ''))
+
+        @usernames.setter
+        def usernames(self, usernames):
+            self._usernames.replace(self._as_usernames(usernames))
 
         def filter(self, message):
-            if self.user_ids is not None:
-                return bool(message.from_user and message.from_user.id in self.user_ids)
-            else:
-                # self.usernames is not None
-                return bool(message.from_user and message.from_user.username and
-                            message.from_user.username in self.usernames)
+            user = message.from_user
+            return bool(user and self._allows(user.id, user.username))
 
-    class chat(BaseFilter):
+    class chat(_MemberFilter):
         """
         Filters messages to allow only those which are from specified chat ID.
 
+        Like :class:`Filters.user`, the chat IDs and usernames can be changed while the bot is
+        running.
+
         Examples:
             ``MessageHandler(Filters.chat(-1234), callback_method)``
 
@@ -459,31 +833,40 @@ class Filters(object):
             chat_id(:obj:`int` | List[:obj:`int`], optional): Which chat ID(s) to allow through.
             username(:obj:`str` | List[:obj:`str`], optional): Which username(s) to allow through.
                 If username start swith '@' symbol, it will be ignored.
+            filename(:obj:`str`, optional): A file holding one chat ID or username per line. See
+                :attr:`reload`.
+            compact(:obj:`bool`, optional): Keep the chat IDs and usernames in sorted arrays
+                instead of sets. Default is ``False``.
 
         Raises:
             ValueError: If chat_id and username are both present, or neither is.
         """
 
-        def __init__(self, chat_id=None, username=None):
-            if not (bool(chat_id) ^ bool(username)):
-                raise ValueError('One and only one of chat_id or username must be used')
-            if chat_id is not None and isinstance(chat_id, int):
-                self.chat_ids = [chat_id]
-            else:
-                self.chat_ids = chat_id
-            if username is None:
-                self.usernames = username
-            elif isinstance(username, string_types):
-                self.usernames = [username.replace('@', '')]
-            else:
-                self.usernames = [chat.replace('@', '') for chat in username]
+        def __init__(self, chat_id=None, username=None, filename=None, compact=False):
+            self._init_members(chat_id, username, filename, compact, 'chat')
+
+        @property
+        def chat_ids(self):
+            """List[:obj:`int`]: The chat IDs to allow through. Changing the list, or assigning
+            to it, changes them. Empty instead of ``None`` if there are none."""
+            return _MembersView(self._ids)
+
+        @chat_ids.setter
+        def chat_ids(self, chat_ids):
+            self._ids.replace(self._as_ids(chat_ids))
+
+        @property
+        def usernames(self):
+            """List[:obj:`str`]: The usernames to allow through. Changing the list, or assigning
+            to it, changes them. Empty instead of ``None`` if there are none."""
+            return _MembersView(self._usernames, lambda username: username.replace('@', ''))
+
+        @usernames.setter
+        def usernames(self, usernames):
+            self._usernames.replace(self._as_usernames(usernames))
 
         def filter(self, message):
-            if self.chat_ids is not None:
-                return bool(message.chat_id in self.chat_ids)
-            else:
-                # self.usernames is not None
-                return bool(message.chat.username and message.chat.username in self.usernames)
+            return self._allows(message.chat_id, message.chat.username)
 
     class _Invoice(BaseFilter):
         name = 'Filters.invoice'
@@ -18,6 +18,10 @@
 # along with this program.  If not, see [http://www.gnu.org/licenses/].
 """ This module contains the base class for handlers as used by the
 Dispatcher """
+from threading import local
+
+# The results of check_update waiting for handle_update, per thread
+_check_results = local()
 
 
 class Handler(object):
@@ -35,6 +39,11 @@ class Handler(object):
             the callback function.
         pass_chat_data (:obj:`bool`): Optional. Determines whether ``chat_data`` will be passed to
             the callback function.
+        update_types (Tuple[:obj:`str`]): The attributes of :class:`telegram.Update` (e.g.
+            ``'message'`` or ``'callback_query'``) of the updates this handler can handle, or
+            ``None`` if it may handle any update. The :class:`telegram.ext.Dispatcher` doesn't call
+            :attr:`check_update` for other kinds of :class:`telegram.Update`. Defaults to ``None``,
+            subclasses should override it if they can.
 
     Note:
         :attr:`pass_user_data` and :attr:`pass_chat_data` determine whether a ``dict`` you
@@ -42,6 +51,9 @@ class Handler(object):
         either the user or the chat that the update was sent in. For each update from the same user
         or in the same chat, it will be the same ``dict``.
 
+        The dispatcher reads :attr:`update_types` when the handler is added, so changing the
+        attributes it depends on afterwards requires adding the handler again.
+
     Args:
         callback (:obj:`callable`): A function that takes ``bot, update`` as positional arguments.
             It will be called when the :attr:`check_update` has determined that an update should be
@@ -60,6 +72,8 @@ class Handler(object):
             ``chat_data`` will be passed to the callback function. Default is ``False``.
     """
 
+    update_types = None
+
     def __init__(self,
                  callback,
                  pass_update_queue=False,
@@ -100,6 +114,41 @@ class Handler(object):
         """
         raise NotImplementedError
 
+    def store_check_result(self, update, result):
+        """
+        Keeps a by-product of :attr:`check_update` (e.g. a match object) for the following
+        :attr:`handle_update` of the same update, so it doesn't have to be computed twice. The
+        result is stored per thread, so handlers can be used by several threads at once.
+
+        Args:
+            update (:obj:`str` | :class:`telegram.Update`): The update which was checked.
+            result (:obj:`object`): The result to keep.
+        """
+
+        results = getattr(_check_results, 'results', None)
+        if results is None:
+            results = _check_results.results = {}
+        results[id(self)] = (update, result)
+
+    def pop_check_result(self, update):
+        """
+        Returns the result stored by :attr:`store_check_result` for ``update`` in this thread.
+
+        Args:
+            update (:obj:`str` | :class:`telegram.Update`): The update being handled.
+
+        Returns:
+            :obj:`object`: The result, or ``None`` if there is none for ``update``.
+        """
+
+        results = getattr(_check_results, 'results', None)
+        if not results:
+            return None
+        stored = results.pop(id(self), None)
+        if stored is None or stored[0] is not update:
+            return None
+        return stored[1]
+
     def collect_optional_args(self, dispatcher, update=None):
         """
         Prepares the optional arguments that are the same for all types of
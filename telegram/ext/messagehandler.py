@@ -124,6 +124,14 @@ class MessageHandler(Handler):
                           'deprecated, please use bitwise operators (& and |) '
                           'instead. More info: https://git.io/vPTbc.')
 
+    @property
+    def update_types(self):
+        """Tuple[:obj:`str`]: The kinds of updates accepted by this handler."""
+        return tuple(kind for kind, allowed in (('message', self.message_updates),
+                                                ('edited_message', self.edited_updates),
+                                                ('channel_post', self.channel_post_updates))
+                     if allowed)
+
     def _is_allowed_update(self, update):
         return any([(self.message_updates and update.message),
                     (self.edited_updates and update.edited_message),
@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+#
+# A library that provides a Python interface to the Telegram Bot API
+# Copyright (C) 2015-2017
+# Leandro Toledo de Souza <devs@python-telegram-bot.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser Public License for more details.
+#
+# You should have received a copy of the GNU Lesser Public License
+# along with this program.  If not, see [http://www.gnu.org/licenses/].
+"""This module contains the persistence classes which store the data of a Dispatcher."""
+import os
+import pickle
+import sqlite3
+from copy import deepcopy
+from threading import Lock
+
+
+class BasePersistence(object):
+    """
+    Base class for the objects which store the ``user_data``, ``chat_data`` and the states of
+    persistent :class:`telegram.ext.ConversationHandler` s of a :class:`telegram.ext.Dispatcher`,
+    so that they survive restarts of the bot.
+
+    Pass an instance to the :class:`telegram.ext.Dispatcher` with its ``persistence`` argument.
+    The data is loaded when the dispatcher is created. Handlers don't write to the persistence
+    themselves: the dispatcher only notes which users, chats and conversations an update may have
+    changed, and a background thread writes those entries every :attr:`flush_interval` seconds
+    and when the dispatcher is stopped.
+
+    Subclasses implement the ``get_*`` and ``update_*`` methods and :attr:`flush`.
+
+    Attributes:
+        flush_interval (:obj:`float`): Seconds between writes of the changed data.
+
+    Args:
+        flush_interval (:obj:`int` | :obj:`float`, optional): Seconds between writes of the
+            changed data. Defaults to 60.
+
+    """
+
+    def __init__(self, flush_interval=60):
+        self.flush_interval = flush_interval
+        self._lock = Lock()
+        self._dirty_users = set()
+        self._dirty_chats = set()
+        self._dirty_conversations = {}
+
+    def mark_dirty(self, user_id=None, chat_id=None):
+        """
+        Notes that the ``user_data`` of ``user_id`` and the ``chat_data`` of ``chat_id`` may
+        have changed. Called by the dispatcher for every update.
+
+        Args:
+            user_id (:obj:`int`, optional): The id of the user.
+            chat_id (:obj:`int`, optional): The id of the chat.
+        """
+
+        with self._lock:
+            if user_id is not None:
+                self._dirty_users.add(user_id)
+            if chat_id is not None:
+                self._dirty_chats.add(chat_id)
+
+    def conversation_changed(self, name, key, new_state):
+        """
+        Notes the new state of a conversation. Called by
+        :class:`telegram.ext.ConversationHandler`.
+
+        Args:
+            name (:obj:`str`): The name of the conversation handler.
+            key (:obj:`tuple`): The key of the conversation.
+            new_state (:obj:`object`): The new state, ``None`` if the conversation ended.
+        """
+
+        with self._lock:
+            self._dirty_conversations[(name, key)] = new_state
+
+    def take_dirty(self):
+        """
+        Returns and forgets the entries noted by :attr:`mark_dirty` and
+        :attr:`conversation_changed`.
+
+        Returns:
+            (:obj:`set`, :obj:`set`, :obj:`dict`): The user ids, chat ids and the new states by
+            ``(name, key)``.
+        """
+
+        with self._lock:
+            dirty = self._dirty_users, self._dirty_chats, self._dirty_conversations
+            self._dirty_users = set()
+            self._dirty_chats = set()
+            self._dirty_conversations = {}
+        return dirty
+
+    def get_user_data(self):
+        """
+        Returns:
+            :obj:`dict`: The stored ``user_data`` by user id.
+        """
+        raise NotImplementedError
+
+    def get_chat_data(self):
+        """
+        Returns:
+            :obj:`dict`: The stored ``chat_data`` by chat id.
+        """
+        raise NotImplementedError
+
+    def get_conversations(self, name):
+        """
+        Args:
+            name (:obj:`str`): The name of the conversation handler.
+
+        Returns:
+            :obj:`dict`: The stored states of the conversations of the handler by key.
+        """
+        raise NotImplementedError
+
+    def update_user_data(self, user_id, data):
+        """
+        Stores the ``user_data`` of a user. Called by the flushing thread.
+
+        Args:
+            user_id (:obj:`int`): The id of the user.
+            data (:obj:`dict`): The data, or ``None`` if it was deleted.
+        """
+        raise NotImplementedError
+
+    def update_chat_data(self, chat_id, data):
+        """
+        Stores the ``chat_data`` of a chat. Called by the flushing thread.
+
+        Args:
+            chat_id (:obj:`int`): The id of the chat.
+            data (:obj:`dict`): The data, or ``None`` if it was deleted.
+        """
+        raise NotImplementedError
+
+    def update_conversation(self, name, key, new_state):
+        """
+        Stores the state of a conversation. Called by the flushing thread.
+
+        Args:
+            name (:obj:`str`): The name of the conversation handler.
+            key (:obj:`tuple`): The key of the conversation.
+            new_state (:obj:`object`): The state, or ``None`` if the conversation ended.
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """Makes the updates since the last call durable. Called by the flushing thread."""
+        raise NotImplementedError
+
+
+class PicklePersistence(BasePersistence):
+    """
+    Stores the data of a :class:`telegram.ext.Dispatcher` in a pickle file. The whole file is
+    written on each flush with changes, so use :class:`SQLitePersistence` for many users.
+
+    Args:
+        filename (:obj:`str`): Path of the file. It is created if it doesn't exist.
+        flush_interval (:obj:`int` | :obj:`float`, optional): See :class:`BasePersistence`.
+
+    """
+
+    def __init__(self, filename, flush_interval=60):
+        super(PicklePersistence, self).__init__(flush_interval=flush_interval)
+        self.filename = filename
+        self._changed = False
+        try:
+            with open(filename, 'rb') as fobj:
+                self._data = pickle.load(fobj)
+        except (IOError, OSError):
+            self._data = {'user_data': {}, 'chat_data': {}, 'conversations': {}}
+
+    def get_user_data(self):
+        return deepcopy(self._data['user_data'])
+
+    def get_chat_data(self):
+        return deepcopy(self._data['chat_data'])
+
+    def get_conversations(self, name):
+        return dict(self._data['conversations'].get(name, {}))
+
+    def _update(self, store, key, value):
+        if value is None:
+            store.pop(key, None)
+        else:
+            # A copy, as the handlers keep changing the original
+            store[key] = deepcopy(value)
+        self._changed = True
+
+    def update_user_data(self, user_id, data):
+        self._update(self._data['user_data'], user_id, data)
+
+    def update_chat_data(self, chat_id, data):
+        self._update(self._data['chat_data'], chat_id, data)
+
+    def update_conversation(self, name, key, new_state):
+        self._update(self._data['conversations'].setdefault(name, {}), key, new_state)
+
+    def flush(self):
+        if not self._changed:
+            return
+        tmp = '{0}.tmp'.format(self.filename)
+        with open(tmp, 'wb') as fobj:
+            pickle.dump(self._data, fobj, 2)
+        # Replace the old file at once, so that a crash doesn't leave half of a file behind
+        if os.name == 'nt' and os.path.exists(self.filename):
+            os.remove(self.filename)
+        os.rename(tmp, self.filename)
+        self._changed = False
+
+
+class SQLitePersistence(BasePersistence):
+    """
+    Stores the data of a :class:`telegram.ext.Dispatcher` in an SQLite database, one row per
+    user, chat and conversation, so that a flush only writes the changed ones.
+
+    Args:
+        filename (:obj:`str`): Path of the database file. It is created if it doesn't exist.
+        flush_interval (:obj:`int` | :obj:`float`, optional): See :class:`BasePersistence`.
+
+    """
+
+    def __init__(self, filename, flush_interval=60):
+        super(SQLitePersistence, self).__init__(flush_interval=flush_interval)
+        self.filename = filename
+        self._conn = sqlite3.connect(filename, check_same_thread=False)
+        with self._conn:
+            for table in ('user_data', 'chat_data'):
+                self._conn.execute('CREATE TABLE IF NOT EXISTS {0} '
+                                   '(id BLOB PRIMARY KEY, data BLOB NOT NULL)'.format(table))
+            self._conn.execute('CREATE TABLE IF NOT EXISTS conversations '
+                               '(name TEXT, key BLOB, state BLOB NOT NULL, '
+                               'PRIMARY KEY (name, key))')
+
+    @staticmethod
+    def _dump(obj):
+        return sqlite3.Binary(pickle.dumps(obj, 2))
+
+    @staticmethod
+    def _load(blob):
+        return pickle.loads(bytes(blob))
+
+    def _get(self, table):
+        rows = self._conn.execute('SELECT id, data FROM {0}'.format(table)).fetchall()
+        return dict((self._load(key), self._load(data)) for key, data in rows)
+
+    def get_user_data(self):
+        return self._get('user_data')
+
+    def get_chat_data(self):
+        return self._get('chat_data')
+
+    def get_conversations(self, name):
+        rows = self._conn.execute('SELECT key, state FROM conversations WHERE name = ?',
+                                  (name,)).fetchall()
+        return dict((self._load(key), self._load(state)) for key, state in rows)
+
+    def _update(self, table, key, data):
+        if data is None:
+            self._conn.execute('DELETE FROM {0} WHERE id = ?'.format(table), (self._dump(key),))
+        else:
+            self._conn.execute('INSERT OR REPLACE INTO {0} (id, data) VALUES (?, ?)'.format(table),
+                               (self._dump(key), self._dump(data)))
+
+    def update_user_data(self, user_id, data):
+        self._update('user_data', user_id, data)
+
+    def update_chat_data(self, chat_id, data):
+        self._update('chat_data', chat_id, data)
+
+    def update_conversation(self, name, key, new_state):
+        if new_state is None:
+            self._conn.execute('DELETE FROM conversations WHERE name = ? AND key = ?',
+                               (name, self._dump(key)))
+        else:
+            self._conn.execute('INSERT OR REPLACE INTO conversations (name, key, state) '
+                               'VALUES (?, ?, ?)', (name, self._dump(key), self._dump(new_state)))
+
+    def flush(self):
+        self._conn.commit()
+
+    def close(self):
+        """Closes the database."""
+        self._conn.close()
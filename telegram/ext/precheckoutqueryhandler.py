@@ -61,6 +61,8 @@ class PreCheckoutQueryHandler(Handler):
             ``chat_data`` will be passed to the callback function. Default is ``False``.
     """
 
+    update_types = ('pre_checkout_query',)
+
     def __init__(self,
                  callback,
                  pass_update_queue=False,
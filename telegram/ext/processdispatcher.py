@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+#
+# A library that provides a Python interface to the Telegram Bot API
+# Copyright (C) 2015-2017
+# Leandro Toledo de Souza <devs@python-telegram-bot.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser Public License for more details.
+#
+# You should have received a copy of the GNU Lesser Public License
+# along with this program.  If not, see [http://www.gnu.org/licenses/].
+"""This module contains the ProcessDispatcher class."""
+
+import json
+import logging
+import multiprocessing
+import signal
+from queue import Queue, Empty
+from threading import Thread, current_thread
+
+from telegram import TelegramError, Update
+from telegram.ext.dispatcher import Dispatcher
+from telegram.ext.jobqueue import JobQueue
+
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+
+def _worker(bot, setup, inbox, outbox, workers):
+    """Target of the worker processes of :class:`ProcessDispatcher`."""
+    # Shutting down is up to the parent process, e.g. on Ctrl-C in the terminal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # With the fork start method the bot is the one of the parent process, whose connections
+    # must not be used by two processes
+    bot.request.stop()
+
+    job_queue = JobQueue(bot)
+    dispatcher = Dispatcher(bot, Queue(), workers=workers, job_queue=job_queue)
+    # This is the only dispatcher of the process, so @run_async can be used by its handlers
+    Dispatcher._set_singleton(dispatcher)
+    setup(dispatcher)
+
+    def report_error(bot, update, error):
+        if isinstance(update, Update):
+            outbox.put((update.to_json(), True, error))
+        else:
+            outbox.put((update, False, error))
+
+    dispatcher.add_error_handler(report_error)
+    dispatcher._init_async_threads('{0}_async'.format(multiprocessing.current_process().name),
+                                   workers)
+    job_queue.start()
+    try:
+        while 1:
+            payload = inbox.get()
+            if payload is None:
+                break
+            if isinstance(payload, tuple):
+                payload = Update.de_json(json.loads(payload[0]), bot)
+            dispatcher.process_update(payload)
+    finally:
+        job_queue.stop()
+        dispatcher.stop()
+
+
+class ProcessDispatcher(Dispatcher):
+    """
+    A :class:`telegram.ext.Dispatcher` which processes the updates in worker processes instead
+    of threads, so that CPU bound handlers aren't limited by the GIL.
+
+    Every worker process runs its own :class:`telegram.ext.Dispatcher`, on which
+    :attr:`setup` registers the handlers. The updates are sent to the workers as JSON and
+    sharded by the id of their :attr:`telegram.Update.effective_chat` (or
+    :attr:`telegram.Update.effective_user`), so the updates of a chat are always processed in
+    order by the same worker and its ``chat_data`` stays consistent. A worker which dies is
+    restarted.
+
+    :class:`telegram.TelegramError` s raised by handlers in a worker are passed to the error
+    handlers registered on this dispatcher. Errors raised while polling are handled here as
+    well.
+
+    Pass an instance to :class:`telegram.ext.Updater` with its ``dispatcher`` argument; stopping
+    the updater stops the workers after they processed the updates already sent to them.
+
+    Note:
+        ``user_data``, ``chat_data`` and the job queue passed to handlers belong to the worker
+        process. With the default ``fork`` start method on Linux, the workers, including the ones
+        restarted later, inherit the bot of this process; each of them closes the connections
+        it inherited from the pool of the bot and opens its own. With the ``spawn`` start method
+        (e.g. on Windows), the bot is pickled instead, and :attr:`setup` must be a module level
+        function.
+
+    Attributes:
+        setup (:obj:`callable`): Called with the dispatcher of each worker process.
+        processes (:obj:`int`): Number of worker processes.
+
+    Args:
+        bot (:class:`telegram.Bot`): The bot object that should be passed to the handlers.
+        update_queue (:obj:`Queue`): The synchronized queue that will contain the updates.
+        setup (:obj:`callable`): A picklable function taking a :class:`telegram.ext.Dispatcher`
+            which adds the handlers to it.
+        processes (:obj:`int`, optional): Number of worker processes. Defaults to the number of
+            CPUs.
+        workers (:obj:`int`, optional): Number of maximum concurrent worker threads for the
+            ``@run_async`` decorator, in each worker process. defaults to 4.
+        job_queue (:class:`telegram.ext.JobQueue`, optional): The :class:`telegram.ext.JobQueue`
+                of the main process.
+    """
+
+    def __init__(self,
+                 bot,
+                 update_queue,
+                 setup,
+                 processes=None,
+                 workers=4,
+                 exception_event=None,
+                 job_queue=None):
+        super(ProcessDispatcher, self).__init__(
+            bot, update_queue, workers=workers, exception_event=exception_event,
+            job_queue=job_queue)
+        self.setup = setup
+        self.processes = processes or multiprocessing.cpu_count()
+        self._inboxes = []
+        self._processes = []
+        self._outbox = None
+
+    def _start_process(self, shard):
+        process = multiprocessing.Process(
+            target=_worker,
+            name='{0}_{1}'.format(current_thread().name, shard),
+            args=(self.bot, self.setup, self._inboxes[shard], self._outbox, self.workers))
+        process.daemon = True
+        process.start()
+        return process
+
+    def _run(self):
+        self._outbox = multiprocessing.Queue()
+        self._inboxes = [multiprocessing.Queue() for _ in range(self.processes)]
+        self._processes = [self._start_process(shard) for shard in range(self.processes)]
+        errors = Thread(target=self._read_errors, name='{0}_errors'.format(current_thread().name))
+        errors.start()
+
+        while 1:
+            try:
+                # Pop update from update queue.
+                update = self.update_queue.get(True, 1)
+            except Empty:
+                if self._should_stop():
+                    break
+                self._restart_dead_processes()
+                continue
+
+            # An error happened while polling
+            if isinstance(update, TelegramError):
+                self.dispatch_error(None, update)
+                continue
+
+            shard = self._lane_key(update) % self.processes
+            # Checked for every update, so that a process dying while updates keep coming is
+            # restarted before its inbox fills up. is_alive() is a non-blocking waitpid().
+            if not self._processes[shard].is_alive():
+                self._restart_process(shard)
+            if isinstance(update, Update):
+                # Sent as JSON, as it is smaller and faster to pickle than the objects
+                update = (update.to_json(),)
+            self._inboxes[shard].put(update)
+
+        # Let the workers finish the updates they were already given
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for process in self._processes:
+            process.join()
+        self._outbox.put(None)
+        errors.join()
+
+    def _restart_dead_processes(self):
+        for shard, process in enumerate(self._processes):
+            if not process.is_alive():
+                self._restart_process(shard)
+
+    def _restart_process(self, shard):
+        process = self._processes[shard]
+        self.logger.error('Worker process %s died with exit code %s, restarting it',
+                          process.name, process.exitcode)
+        # The dead process may still hold the lock of its queue, so the new one gets a new queue
+        # with whatever can be recovered from the old one
+        inbox, self._inboxes[shard] = self._inboxes[shard], multiprocessing.Queue()
+        try:
+            while 1:
+                self._inboxes[shard].put(inbox.get_nowait())
+        except Empty:
+            pass
+        self._processes[shard] = self._start_process(shard)
+
+    def _read_errors(self):
+        while 1:
+            error = self._outbox.get()
+            if error is None:
+                break
+
+            update, is_json, error = error
+            if is_json:
+                update = Update.de_json(json.loads(update), self.bot)
+            try:
+                self.dispatch_error(update, error)
+            except Exception:
+                self.logger.exception('An uncaught error was raised while handling the error')
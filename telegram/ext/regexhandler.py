@@ -132,6 +132,14 @@ class RegexHandler(Handler):
         self.channel_post_updates = channel_post_updates
         self.edited_updates = edited_updates
 
+    @property
+    def update_types(self):
+        """Tuple[:obj:`str`]: The kinds of updates accepted by this handler."""
+        return tuple(kind for kind, allowed in (('message', self.message_updates),
+                                                ('edited_message', self.edited_updates),
+                                                ('channel_post', self.channel_post_updates))
+                     if allowed)
+
     def check_update(self, update):
         """
         Determines whether an update should be passed to this handlers :attr:`callback`.
@@ -149,6 +157,8 @@ class RegexHandler(Handler):
                 (self.channel_post_updates and update.channel_post)]) and \
                 update.effective_message.text:
             match = re.match(self.pattern, update.effective_message.text)
+            if match:
+                self.store_check_result(update, match)
             return bool(match)
         return False
 
@@ -162,7 +172,8 @@ class RegexHandler(Handler):
         """
 
         optional_args = self.collect_optional_args(dispatcher, update)
-        match = re.match(self.pattern, update.effective_message.text)
+        match = (self.pop_check_result(update)
+                 or re.match(self.pattern, update.effective_message.text))
 
         if self.pass_groups:
             optional_args['groups'] = match.groups()
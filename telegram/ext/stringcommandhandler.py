@@ -62,6 +62,8 @@ class StringCommandHandler(Handler):
             which can be used to schedule new jobs. Default is ``False``.
     """
 
+    update_types = ()
+
     def __init__(self,
                  command,
                  callback,
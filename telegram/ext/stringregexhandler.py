@@ -69,6 +69,8 @@ class StringRegexHandler(Handler):
             which can be used to schedule new jobs. Default is ``False``.
     """
 
+    update_types = ()
+
     def __init__(self,
                  pattern,
                  callback,
@@ -97,7 +99,12 @@ class StringRegexHandler(Handler):
             :obj:`bool`
         """
 
-        return isinstance(update, string_types) and bool(re.match(self.pattern, update))
+        if not isinstance(update, string_types):
+            return False
+        match = re.match(self.pattern, update)
+        if match:
+            self.store_check_result(update, match)
+        return bool(match)
 
     def handle_update(self, update, dispatcher):
         """
@@ -109,7 +116,7 @@ class StringRegexHandler(Handler):
         """
 
         optional_args = self.collect_optional_args(dispatcher)
-        match = re.match(self.pattern, update)
+        match = self.pop_check_result(update) or re.match(self.pattern, update)
 
         if self.pass_groups:
             optional_args['groups'] = match.groups()
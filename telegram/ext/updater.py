@@ -20,16 +20,18 @@
 Telegram bots intuitive."""
 
 import logging
+import multiprocessing
 import os
+import socket
 import ssl
 import warnings
 from threading import Thread, Lock, current_thread, Event
 from time import sleep
 import subprocess
-from signal import signal, SIGINT, SIGTERM, SIGABRT
+from signal import signal, SIGINT, SIGTERM, SIGABRT, SIG_IGN
 from queue import Queue
 
-from telegram import Bot, TelegramError
+from telegram import Bot, TelegramError, Update
 from telegram.ext import Dispatcher, JobQueue
 from telegram.error import Unauthorized, InvalidToken, RetryAfter
 from telegram.utils.request import Request
@@ -72,12 +74,22 @@ class Updater(object):
             SIGTERM, SIGABRT) setable with :attr:`idle`.
         request_kwargs (:obj:`dict`, optional): Keyword args to control the creation of a request
             object (ignored if `bot` argument is used).
+        dispatcher (:class:`telegram.ext.Dispatcher`, optional): A pre-initialized dispatcher,
+            e.g. a :class:`telegram.ext.asynciodispatcher.AsyncioDispatcher`. Its bot, update
+            queue and job queue are used by the updater.
+        persistence (:class:`telegram.ext.BasePersistence`, optional): Passed to the
+            :class:`telegram.ext.Dispatcher` the updater creates. Its data is written at the
+            latest when the updater is stopped.
+        dedup_window (:obj:`int`, optional): Passed to the :class:`telegram.ext.Dispatcher` the
+            updater creates, to drop the updates Telegram sends again.
 
     Note:
-        You must supply either a :attr:`bot` or a :attr:`token` argument.
+        You must supply either a :attr:`bot`, a :attr:`token` or a :attr:`dispatcher` argument.
 
     Raises:
-        ValueError: If both :attr:`token` and :attr:`bot` are passed or none of them.
+        ValueError: If more than one of :attr:`token`, :attr:`bot` and :attr:`dispatcher` are
+            passed or none of them, or if :attr:`dispatcher` is passed together with
+            :attr:`persistence` or :attr:`dedup_window`.
     """
 
     _request = None
@@ -88,14 +100,25 @@ class Updater(object):
                  workers=4,
                  bot=None,
                  user_sig_handler=None,
-                 request_kwargs=None):
+                 request_kwargs=None,
+                 dispatcher=None,
+                 persistence=None,
+                 dedup_window=0):
 
-        if (token is None) and (bot is None):
-            raise ValueError('`token` or `bot` must be passed')
+        if (token is None) and (bot is None) and (dispatcher is None):
+            raise ValueError('`token`, `bot` or `dispatcher` must be passed')
         if (token is not None) and (bot is not None):
             raise ValueError('`token` and `bot` are mutually exclusive')
-
-        if bot is not None:
+        if (dispatcher is not None) and ((token is not None) or (bot is not None)):
+            raise ValueError('`dispatcher` is mutually exclusive with `token` and `bot`')
+        if (dispatcher is not None) and (persistence is not None):
+            raise ValueError('`persistence` must be passed to the `dispatcher` instead')
+        if (dispatcher is not None) and dedup_window:
+            raise ValueError('`dedup_window` must be passed to the `dispatcher` instead')
+
+        if dispatcher is not None:
+            self.bot = dispatcher.bot
+        elif bot is not None:
             self.bot = bot
         else:
             # we need a connection pool the size of:
@@ -111,20 +134,34 @@ class Updater(object):
             self._request = Request(**request_kwargs)
             self.bot = Bot(token, base_url, request=self._request)
         self.user_sig_handler = user_sig_handler
-        self.update_queue = Queue()
-        self.job_queue = JobQueue(self.bot)
-        self.__exception_event = Event()
-        self.dispatcher = Dispatcher(
-            self.bot,
-            self.update_queue,
-            job_queue=self.job_queue,
-            workers=workers,
-            exception_event=self.__exception_event)
+        if dispatcher is not None:
+            if dispatcher.job_queue is None:
+                dispatcher.job_queue = JobQueue(self.bot)
+            self.update_queue = dispatcher.update_queue
+            self.job_queue = dispatcher.job_queue
+            self.__exception_event = dispatcher.exception_event
+            self.dispatcher = dispatcher
+        else:
+            self.update_queue = Queue()
+            self.job_queue = JobQueue(self.bot)
+            self.__exception_event = Event()
+            self.dispatcher = Dispatcher(
+                self.bot,
+                self.update_queue,
+                job_queue=self.job_queue,
+                workers=workers,
+                exception_event=self.__exception_event,
+                persistence=persistence,
+                dedup_window=dedup_window)
         self.last_update_id = 0
         self.logger = logging.getLogger(__name__)
         self.running = False
         self.is_idle = False
         self.httpd = None
+        # (router, path) of the updates received by a WebhookRouter
+        self._route = None
+        # The processes started by start_webhook(processes=...)
+        self._processes = []
         self.__lock = Lock()
         self.__threads = []
 
@@ -151,7 +188,8 @@ class Updater(object):
                       clean=False,
                       bootstrap_retries=0,
                       read_latency=2.,
-                      allowed_updates=None):
+                      allowed_updates=None,
+                      pipelined=False):
         """
         Starts polling updates from Telegram.
 
@@ -175,6 +213,10 @@ class Updater(object):
                 timeout from server (Default: 2).
             network_delay: Deprecated. Will be honoured as :attr:`read_latency` for a while but
                 will be removed in the future.
+            pipelined (:obj:`bool`, optional): If ``True``, the next request for updates is sent
+                as soon as a batch arrived, while another thread turns the batch into
+                :class:`telegram.Update` s and puts them into the update queue. ``poll_interval``
+                is then only waited after errors. Default is ``False``.
 
         Returns:
             :obj:`Queue`: The update queue that can be filled from the main thread.
@@ -191,8 +233,15 @@ class Updater(object):
                 # Create & start threads
                 self.job_queue.start()
                 self._init_thread(self.dispatcher.start, "dispatcher")
-                self._init_thread(self._start_polling, "updater", poll_interval, timeout,
-                                  read_latency, bootstrap_retries, clean, allowed_updates)
+                if pipelined:
+                    batches = Queue()
+                    self._init_thread(self._decode_updates, "updater_decoder", batches)
+                    self._init_thread(self._start_pipelined_polling, "updater", poll_interval,
+                                      timeout, read_latency, bootstrap_retries, clean,
+                                      allowed_updates, batches)
+                else:
+                    self._init_thread(self._start_polling, "updater", poll_interval, timeout,
+                                      read_latency, bootstrap_retries, clean, allowed_updates)
 
                 # Return the update queue so the main thread can insert updates
                 return self.update_queue
@@ -206,7 +255,11 @@ class Updater(object):
                       clean=False,
                       bootstrap_retries=0,
                       webhook_url=None,
-                      allowed_updates=None):
+                      allowed_updates=None,
+                      max_connections=40,
+                      reply_timeout=None,
+                      router=None,
+                      processes=1):
         """
         Starts a small http server to listen for updates via webhook. If cert
         and key are not provided, the webhook will be started directly on
@@ -233,20 +286,75 @@ class Updater(object):
                 NAT, reverse proxy, etc. Default is derived from `listen`, `port` & `url_path`.
             allowed_updates (List[:obj:`str`], optional): Passed to
                 :attr:`telegram.Bot.set_webhook`.
+            max_connections (:obj:`int`, optional): Passed to :attr:`telegram.Bot.set_webhook`
+                and the number of connections the server handles at the same time. Default
+                ``40``.
+            reply_timeout (:obj:`int` | :obj:`float`, optional): If set, the first call of a
+                method like :attr:`telegram.Bot.send_message` or
+                :attr:`telegram.Bot.answer_callback_query` made by a handler while it handles an
+                update is sent in the response to the webhook request of the update, if it's made
+                within this many seconds, which saves a round trip to Telegram. Such a call
+                returns ``True`` instead of its result, and the connection the update came in on
+                is busy until then. Calls of handlers run with ``run_async`` are always sent as
+                usual. Default ``None``, which means off.
+            router (:class:`telegram.ext.WebhookRouter`, optional): Receive the updates with this
+                router, which is shared with other updaters, instead of starting a server.
+                ``listen``, ``port``, ``cert``, ``key`` and ``reply_timeout`` are those of the
+                router then, and ``max_connections`` is only passed to
+                :attr:`telegram.Bot.set_webhook`.
+            processes (:obj:`int`, optional): Number of processes receiving and handling the
+                updates, for bots too busy for one process. If more than ``1``, the processes are
+                forked from this one and each of them binds the port with ``SO_REUSEPORT``, so
+                that the kernel spreads the connections of Telegram among them. Each process has
+                its own copy of the dispatcher, including ``user_data``, ``chat_data`` and the
+                states of conversations, and the updates of a chat may go to any of them. The
+                jobs already scheduled, the webhook bootstrap and :attr:`stop` are handled by this
+                process. The ``dedup_window`` of the dispatcher is per process as well, so an
+                update sent again to another process isn't dropped. Can't be used with a
+                ``persistence``, which each process would write to. Requires Linux. Default ``1``.
 
         Returns:
-            :obj:`Queue`: The update queue that can be filled from the main thread.
+            :obj:`Queue`: The update queue that can be filled from the main thread. It isn't
+            used if ``processes`` is more than ``1``.
         """
 
+        if processes > 1:
+            if router is not None:
+                raise ValueError('`router` and `processes` are mutually exclusive')
+            if not hasattr(socket, 'SO_REUSEPORT'):
+                raise ValueError('`processes` needs SO_REUSEPORT, which this platform lacks')
+            if self.dispatcher.persistence is not None:
+                # Each process would overwrite the data of the others
+                raise ValueError('`processes` can not be used with a `persistence`')
+
         with self.__lock:
             if not self.running:
                 self.running = True
 
+                if processes > 1:
+                    use_ssl = cert is not None and key is not None
+                    # Fork before this process starts any threads
+                    self._start_webhook_processes(
+                        processes, listen, port, url_path,
+                        self._ssl_context(cert, key) if use_ssl else None, max_connections,
+                        reply_timeout)
+                    self.job_queue.start()
+                    self._init_thread(self._set_webhook, "updater", listen, port, url_path,
+                                      cert if use_ssl else None, bootstrap_retries, clean,
+                                      webhook_url, allowed_updates, max_connections)
+                    return self.update_queue
+
                 # Create & start threads
                 self.job_queue.start()
                 self._init_thread(self.dispatcher.start, "dispatcher"),
-                self._init_thread(self._start_webhook, "updater", listen, port, url_path, cert,
-                                  key, bootstrap_retries, clean, webhook_url, allowed_updates)
+                if router is not None:
+                    self._init_thread(self._start_routed_webhook, "updater", router, url_path,
+                                      bootstrap_retries, clean, webhook_url, allowed_updates,
+                                      max_connections)
+                else:
+                    self._init_thread(self._start_webhook, "updater", listen, port, url_path,
+                                      cert, key, bootstrap_retries, clean, webhook_url,
+                                      allowed_updates, max_connections, reply_timeout)
 
                 # Return the update queue so the main thread can insert updates
                 return self.update_queue
@@ -298,6 +406,68 @@ class Updater(object):
 
             sleep(cur_interval)
 
+    def _start_pipelined_polling(self, poll_interval, timeout, read_latency, bootstrap_retries,
+                                 clean, allowed_updates, batches):
+        # Thread target of thread 'updater' with pipelined=True. Only fetches the updates, the
+        # batches are decoded and put into the update queue by _decode_updates meanwhile
+        self.logger.debug('Updater thread started')
+
+        # Bots overriding get_updates don't necessarily get them from the Bot API
+        get_updates_json = (self.bot._get_updates_json
+                            if type(self.bot).get_updates == Bot.get_updates else None)
+        cur_interval = poll_interval
+
+        try:
+            self._bootstrap(bootstrap_retries, clean=clean, webhook_url='', allowed_updates=None)
+
+            while self.running:
+                try:
+                    if get_updates_json is not None:
+                        updates = get_updates_json(self.last_update_id, 100, timeout,
+                                                   read_latency, allowed_updates)
+                    else:
+                        updates = self.bot.get_updates(
+                            self.last_update_id,
+                            timeout=timeout,
+                            read_latency=read_latency,
+                            allowed_updates=allowed_updates)
+                except RetryAfter as e:
+                    self.logger.info(str(e))
+                    sleep(0.5 + e.retry_after)
+                    continue
+                except TelegramError as te:
+                    self.logger.error("Error while getting Updates: {0}".format(te))
+                    self.update_queue.put(te)
+                    cur_interval = self._increase_poll_interval(cur_interval)
+                    sleep(cur_interval)
+                    continue
+
+                if not self.running:
+                    if len(updates) > 0:
+                        self.logger.debug('Updates ignored and will be pulled '
+                                          'again on restart.')
+                    break
+
+                if updates:
+                    last = updates[-1]
+                    self.last_update_id = (last['update_id'] if isinstance(last, dict)
+                                           else last.update_id) + 1
+                    batches.put(updates)
+                cur_interval = poll_interval
+        finally:
+            batches.put(None)
+
+    def _decode_updates(self, batches):
+        # Thread target of thread 'updater_decoder'
+        while 1:
+            updates = batches.get()
+            if updates is None:
+                break
+            for update in updates:
+                if isinstance(update, dict):
+                    update = Update.de_json(update, self.bot)
+                self.update_queue.put(update)
+
     @staticmethod
     def _increase_poll_interval(current_interval):
         # increase waiting times on subsequent errors up to 30secs
@@ -310,7 +480,7 @@ class Updater(object):
         return current_interval
 
     def _start_webhook(self, listen, port, url_path, cert, key, bootstrap_retries, clean,
-                       webhook_url, allowed_updates):
+                       webhook_url, allowed_updates, max_connections=40, reply_timeout=None):
         self.logger.debug('Updater thread started')
         use_ssl = cert is not None and key is not None
         if not url_path.startswith('/'):
@@ -318,11 +488,79 @@ class Updater(object):
 
         # Create and start server
         self.httpd = WebhookServer((listen, port), WebhookHandler, self.update_queue, url_path,
-                                   self.bot)
+                                   self.bot, max_connections=max_connections,
+                                   reply_timeout=reply_timeout)
 
         if use_ssl:
             self._check_ssl_cert(cert, key)
+        self._set_webhook(listen, port, url_path, cert if use_ssl else None, bootstrap_retries,
+                          clean, webhook_url, allowed_updates, max_connections)
+
+        self.httpd.serve_forever(poll_interval=1)
+
+    def _start_routed_webhook(self, router, url_path, bootstrap_retries, clean, webhook_url,
+                              allowed_updates, max_connections):
+        self.logger.debug('Updater thread started')
+        if not url_path.startswith('/'):
+            url_path = '/{0}'.format(url_path)
+
+        router.add_route(url_path, self.update_queue, self.bot)
+        self._route = (router, url_path)
 
+        self._set_webhook(router.listen, router.port, url_path, router.cert, bootstrap_retries,
+                          clean, webhook_url, allowed_updates, max_connections)
+
+    def _start_webhook_processes(self, processes, listen, port, url_path, ssl_context,
+                                 max_connections, reply_timeout):
+        if not url_path.startswith('/'):
+            url_path = '/{0}'.format(url_path)
+        # The processes inherit this one, including the handlers of the dispatcher
+        if hasattr(multiprocessing, 'get_context'):
+            context = multiprocessing.get_context('fork')
+        else:
+            context = multiprocessing
+        for i in range(processes):
+            process = context.Process(
+                target=self._webhook_process,
+                name='webhook_process_{0}'.format(i),
+                args=(listen, port, url_path, ssl_context, max_connections, reply_timeout))
+            process.daemon = True
+            process.start()
+            self._processes.append(process)
+
+    def _webhook_process(self, listen, port, url_path, ssl_context, max_connections,
+                         reply_timeout):
+        # Target of the forked processes. Shutting down is up to the parent process, e.g. on
+        # Ctrl-C in the terminal, which terminates them.
+        signal(SIGINT, SIG_IGN)
+        stop_event = Event()
+        signal(SIGTERM, lambda signum, frame: stop_event.set())
+        # The parent process held the lock when it forked, so this copy of it would stay locked
+        self.__lock = Lock()
+        self._processes = []
+        # Connections of the parent process must not be used by two processes
+        self.bot.request.stop()
+        # The jobs scheduled so far are run by the parent process
+        self.job_queue = self.dispatcher.job_queue = JobQueue(self.bot)
+
+        self.httpd = WebhookServer((listen, port), WebhookHandler, self.update_queue, url_path,
+                                   self.bot, max_connections=max_connections,
+                                   reply_timeout=reply_timeout, reuse_port=True)
+        self.httpd.ssl_context = ssl_context
+        self.job_queue.start()
+        self._init_thread(self.dispatcher.start, "dispatcher")
+        self._init_thread(self.httpd.serve_forever, "updater", poll_interval=1)
+
+        while not stop_event.wait(1):
+            pass
+        self.stop()
+
+    def _set_webhook(self, listen, port, url_path, cert, bootstrap_retries, clean, webhook_url,
+                     allowed_updates, max_connections):
+        if not url_path.startswith('/'):
+            url_path = '/{0}'.format(url_path)
+
+        if cert is not None:
             # DO NOT CHANGE: Only set webhook if SSL is handled by library
             if not webhook_url:
                 webhook_url = self._gen_webhook_url(listen, port, url_path)
@@ -332,14 +570,17 @@ class Updater(object):
                 clean=clean,
                 webhook_url=webhook_url,
                 cert=open(cert, 'rb'),
-                allowed_updates=allowed_updates)
+                allowed_updates=allowed_updates,
+                max_connections=max_connections)
         elif clean:
             self.logger.warning("cleaning updates is not supported if "
                                 "SSL-termination happens elsewhere; skipping")
 
-        self.httpd.serve_forever(poll_interval=1)
-
     def _check_ssl_cert(self, cert, key):
+        self.httpd.ssl_context = self._ssl_context(cert, key)
+
+    @staticmethod
+    def _ssl_context(cert, key):
         # Check SSL-Certificate with openssl, if possible
         try:
             exit_code = subprocess.call(
@@ -350,10 +591,13 @@ class Updater(object):
             exit_code = 0
         if exit_code is 0:
             try:
-                self.httpd.socket = ssl.wrap_socket(
-                    self.httpd.socket, certfile=cert, keyfile=key, server_side=True)
+                # The connections are wrapped by the threads of the server, so that the TLS
+                # handshake of one doesn't hold up the others
+                context = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
+                context.load_cert_chain(cert, key)
+                return context
             except ssl.SSLError as error:
-                self.logger.exception('Failed to init SSL socket')
+                logging.getLogger(__name__).exception('Failed to init SSL socket')
                 raise TelegramError(str(error))
         else:
             raise TelegramError('SSL Certificate invalid')
@@ -362,7 +606,8 @@ class Updater(object):
     def _gen_webhook_url(listen, port, url_path):
         return 'https://{listen}:{port}{path}'.format(listen=listen, port=port, path=url_path)
 
-    def _bootstrap(self, max_retries, clean, webhook_url, allowed_updates, cert=None):
+    def _bootstrap(self, max_retries, clean, webhook_url, allowed_updates, cert=None,
+                   max_connections=40):
         retries = 0
         while 1:
 
@@ -374,7 +619,10 @@ class Updater(object):
                     sleep(1)
 
                 self.bot.set_webhook(
-                    url=webhook_url, certificate=cert, allowed_updates=allowed_updates)
+                    url=webhook_url,
+                    certificate=cert,
+                    allowed_updates=allowed_updates,
+                    max_connections=max_connections)
             except (Unauthorized, InvalidToken):
                 raise
             except TelegramError:
@@ -409,6 +657,7 @@ class Updater(object):
                 self.running = False
 
                 self._stop_httpd()
+                self._stop_processes()
                 self._stop_dispatcher()
                 self._join_threads()
 
@@ -423,6 +672,17 @@ class Updater(object):
                               'immediately.')
             self.httpd.shutdown()
             self.httpd = None
+        if self._route:
+            router, url_path = self._route
+            router.remove_route(url_path)
+            self._route = None
+
+    def _stop_processes(self):
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            process.join()
+        self._processes = []
 
     def _stop_dispatcher(self):
         self.logger.debug('Requesting Dispatcher to stop...')
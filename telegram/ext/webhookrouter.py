@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+#
+# A library that provides a Python interface to the Telegram Bot API
+# Copyright (C) 2015-2017
+# Leandro Toledo de Souza <devs@python-telegram-bot.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser Public License for more details.
+#
+# You should have received a copy of the GNU Lesser Public License
+# along with this program.  If not, see [http://www.gnu.org/licenses/].
+"""This module contains the WebhookRouter class."""
+
+import logging
+from threading import Thread
+
+from telegram.ext.updater import Updater
+from telegram.utils.request import Request
+from telegram.utils.webhookhandler import WebhookServer, WebhookHandler
+
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+
+class WebhookRouter(object):
+    """
+    A webhook server shared by many bots. Each :class:`telegram.ext.Updater` started with
+    ``updater.start_webhook(url_path=..., router=router)`` adds its ``url_path`` to the router,
+    which puts the updates posted there into the queue of that updater. All bots share the
+    listening socket, the TLS context and the threads handling the connections, so that another
+    bot only costs an entry of a ``dict``.
+
+    The bots can also share the connection pool to the Bot API, :attr:`request`. Pass them to
+    the updaters as ``Updater(bot=Bot(token, request=router.request))``. An updater created from
+    a ``token`` has a pool of its own.
+
+    Note:
+        Telegram keeps up to ``max_connections`` connections per bot open, see
+        :attr:`telegram.Bot.set_webhook`. Pass a small ``max_connections`` to
+        :attr:`telegram.ext.Updater.start_webhook` so that the connections of all bots together
+        don't exceed the :attr:`max_connections` of the router, otherwise some of them wait until
+        another one is idle for :attr:`telegram.utils.webhookhandler.WebhookHandler.timeout`
+        seconds.
+
+    Attributes:
+        listen (:obj:`str`): IP-Address the router listens on.
+        port (:obj:`int`): Port the router listens on.
+        cert (:obj:`str`): Path to the SSL certificate file, ``None`` if SSL is handled by
+            another application.
+        max_connections (:obj:`int`): Number of connections handled at the same time.
+        httpd (:class:`telegram.utils.webhookhandler.WebhookServer`): The server.
+        request (:class:`telegram.utils.request.Request`): The connection pool for the bots.
+
+    Args:
+        listen (:obj:`str`, optional): IP-Address to listen on. Default ``127.0.0.1``.
+        port (:obj:`int`, optional): Port to listen on. Default ``80``.
+        cert (:obj:`str`, optional): Path to the SSL certificate file.
+        key (:obj:`str`, optional): Path to the SSL key file.
+        max_connections (:obj:`int`, optional): Number of connections handled at the same time.
+            Default ``100``.
+        reply_timeout (:obj:`int` | :obj:`float`, optional): See
+            :attr:`telegram.ext.Updater.start_webhook`.
+        request_kwargs (:obj:`dict`, optional): Keyword args for :attr:`request`. Its
+            ``con_pool_size`` defaults to ``max_connections``, as that many updates may be
+            handled at the same time.
+
+    """
+
+    def __init__(self,
+                 listen='127.0.0.1',
+                 port=80,
+                 cert=None,
+                 key=None,
+                 max_connections=100,
+                 reply_timeout=None,
+                 request_kwargs=None):
+        self.logger = logging.getLogger(__name__)
+        self.listen = listen
+        self.port = port
+        self.cert = cert if cert is not None and key is not None else None
+        self.max_connections = max_connections
+        if request_kwargs is None:
+            request_kwargs = {}
+        if 'con_pool_size' not in request_kwargs:
+            request_kwargs['con_pool_size'] = max_connections
+        self.request = Request(**request_kwargs)
+        self.httpd = WebhookServer((listen, port), WebhookHandler, None, None, None,
+                                   max_connections=max_connections, reply_timeout=reply_timeout)
+        if self.cert is not None:
+            self.httpd.ssl_context = Updater._ssl_context(cert, key)
+        self._thread = None
+
+    def start(self):
+        """Starts the server in a new thread."""
+        if self._thread is None:
+            self._thread = Thread(target=self.httpd.serve_forever, name='webhook_router',
+                                  kwargs={'poll_interval': 1})
+            self._thread.start()
+
+    def stop(self):
+        """Stops the server and closes the connections of :attr:`request`. The updaters using the
+        router are stopped independently."""
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.request.stop()
+
+    def add_route(self, url_path, update_queue, bot):
+        """
+        Puts the updates posted to ``url_path`` into ``update_queue``. Called by
+        :attr:`telegram.ext.Updater.start_webhook`.
+
+        Args:
+            url_path (:obj:`str`): Path inside the url, starting with ``/``.
+            update_queue (:obj:`Queue`): The queue of the updater.
+            bot (:class:`telegram.Bot`): The bot the updates are for.
+        """
+
+        self.logger.debug('Adding route %s', url_path)
+        self.httpd.add_route(url_path, update_queue, bot)
+
+    def remove_route(self, url_path):
+        """
+        Rejects the updates posted to ``url_path`` from now on. Called by
+        :attr:`telegram.ext.Updater.stop`.
+
+        Args:
+            url_path (:obj:`str`): Path inside the url, starting with ``/``.
+        """
+
+        self.logger.debug('Removing route %s', url_path)
+        self.httpd.remove_route(url_path)
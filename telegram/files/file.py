@@ -65,12 +65,13 @@ class File(TelegramObject):
 
         return cls(bot=bot, **data)
 
-    def download(self, custom_path=None, out=None, timeout=None):
+    def download(self, custom_path=None, out=None, timeout=None, progress=None, connections=1):
         """
         Download this file. By default, the file is saved in the current working directory with its
         original filename as reported by Telegram. If a :attr:`custom_path` is supplied, it will be
         saved to that path instead. If :attr:`out` is defined, the file contents will be saved to
-        that object using the ``out.write`` method.
+        that object using the ``out.write`` method. The content is written chunk by chunk while it
+        is being received.
 
         Note:
             `custom_path` and `out` are mutually exclusive.
@@ -82,6 +83,12 @@ class File(TelegramObject):
             timeout (:obj:`int` | :obj:`float`, optional): If this value is specified, use it as
                 the read timeout from the server (instead of the one specified during creation of
                 the connection pool).
+            progress (:obj:`callable`, optional): Called as ``progress(received, total)`` after
+                each received chunk. ``total`` is the size of the file in bytes, if known.
+            connections (:obj:`int`, optional): If greater than 1 and :attr:`file_size` is known,
+                the file is saved to disk with that many concurrent ranged requests, and an
+                interrupted download is resumed when called again. Ignored if :attr:`out` is
+                passed. Defaults to 1.
 
         Raises:
             ValueError: If both ``custom_path`` and ``out`` are passed.
@@ -96,8 +103,7 @@ class File(TelegramObject):
             sres.scheme, sres.netloc, urllib_parse.quote(sres.path), sres.query, sres.fragment))
 
         if out:
-            buf = self.bot.request.retrieve(url)
-            out.write(buf)
+            self.bot.request.download_to(url, out, timeout=timeout, progress=progress)
 
         else:
             if custom_path:
@@ -105,4 +111,9 @@ class File(TelegramObject):
             else:
                 filename = basename(self.file_path)
 
-            self.bot.request.download(url, filename, timeout=timeout)
+            if connections > 1 and self.file_size:
+                self.bot.request.download_ranged(url, filename, self.file_size,
+                                                 connections=connections, timeout=timeout,
+                                                 progress=progress)
+            else:
+                self.bot.request.download(url, filename, timeout=timeout, progress=progress)
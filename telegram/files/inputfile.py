@@ -29,7 +29,6 @@ except ImportError:
 import imghdr
 import mimetypes
 import os
-import sys
 
 from telegram import TelegramError
 
@@ -37,12 +36,17 @@ DEFAULT_MIME_TYPE = 'application/octet-stream'
 USER_AGENT = 'Python Telegram Bot (https://github.com/python-telegram-bot/python-telegram-bot)'
 FILE_TYPES = ('audio', 'document', 'photo', 'sticker', 'video', 'voice', 'certificate',
               'video_note', 'png_sticker')
+# imghdr never looks further than the first 32 bytes of a file
+IMAGE_HEADER_SIZE = 32
 
 
 class InputFile(object):
     """
     This object represents a Telegram InputFile.
 
+    If the file is seekable, its content is never loaded into memory as a whole: it is read in
+    chunks while the request body produced by :attr:`to_stream` is being sent.
+
     Attributes:
         data (:obj:`dict`): Data containing an inputfile.
 
@@ -56,6 +60,9 @@ class InputFile(object):
     def __init__(self, data):
         self.data = data
         self.boundary = choose_boundary()
+        self._content = None
+        self._start = None
+        self._size = None
 
         for t in FILE_TYPES:
             if t in data:
@@ -67,7 +74,15 @@ class InputFile(object):
 
         if hasattr(self.input_file, 'read'):
             self.filename = None
-            self.input_file_content = self.input_file.read()
+            self._start, self._size = self._get_position(self.input_file)
+            if self._size is None:
+                # Not seekable, the content has to be buffered to know its length
+                self._content = self.input_file.read()
+                header = self._content
+            else:
+                header = self.input_file.read(IMAGE_HEADER_SIZE)
+                self.input_file.seek(self._start)
+
             if 'filename' in data:
                 self.filename = self.data.pop('filename')
             elif hasattr(self.input_file, 'name'):
@@ -76,7 +91,7 @@ class InputFile(object):
                 self.filename = os.path.basename(self.input_file.name)
 
             try:
-                self.mimetype = self.is_image(self.input_file_content)
+                self.mimetype = self.is_image(header)
                 if not self.filename or '.' not in self.filename:
                     self.filename = self.mimetype.replace('/', '.')
             except TelegramError:
@@ -86,6 +101,21 @@ class InputFile(object):
                 else:
                     self.mimetype = DEFAULT_MIME_TYPE
 
+    @property
+    def input_file_content(self):
+        """
+        :obj:`bytes`: The whole content of the input file. Accessing this loads the file into
+        memory, prefer :attr:`to_stream` for sending it.
+        """
+
+        if self._content is not None:
+            return self._content
+
+        self.input_file.seek(self._start)
+        content = self.input_file.read()
+        self.input_file.seek(self._start)
+        return content
+
     @property
     def headers(self):
         """
@@ -110,6 +140,25 @@ class InputFile(object):
             :obj:`str`
         """
 
+        return self._form_head() + self.input_file_content + self._form_tail()
+
+    def to_stream(self):
+        """
+        Transform the inputfile to a file-like multipart/form data body. The input file is read
+        lazily, chunk by chunk, while the body is consumed.
+
+        Returns:
+            :class:`telegram.files.inputfile.MultipartStream`
+        """
+
+        if self._content is not None:
+            body = (self._content,)
+        else:
+            body = ((self.input_file, self._start, self._size),)
+
+        return MultipartStream((self._form_head(),) + body + (self._form_tail(),))
+
+    def _form_head(self):
         form = []
         form_boundary = '--' + self.boundary
 
@@ -123,28 +172,46 @@ class InputFile(object):
         # Add input_file to upload
         form.extend([
             form_boundary, 'Content-Disposition: form-data; name="%s"; filename="%s"' %
-            (self.input_name,
-             self.filename), 'Content-Type: %s' % self.mimetype, '', self.input_file_content
+            (self.input_name, self.filename), 'Content-Type: %s' % self.mimetype, ''
         ])
 
-        form.append('--' + self.boundary + '--')
-        form.append('')
+        return self._parse(form) + b'\r\n'
 
-        return self._parse(form)
+    def _form_tail(self):
+        return self._parse(['', '--' + self.boundary + '--', ''])
 
     @staticmethod
     def _parse(form):
-        if sys.version_info > (3,):
-            # on Python 3 form needs to be byte encoded
-            encoded_form = []
-            for item in form:
-                try:
-                    encoded_form.append(item.encode())
-                except AttributeError:
-                    encoded_form.append(item)
-
-            return b'\r\n'.join(encoded_form)
-        return '\r\n'.join(form)
+        encoded_form = []
+        for item in form:
+            if isinstance(item, bytes):
+                # on python 2 str is bytes
+                encoded_form.append(item)
+            else:
+                encoded_form.append(item.encode('utf-8'))
+
+        return b'\r\n'.join(encoded_form)
+
+    @staticmethod
+    def _get_position(input_file):
+        """
+        Find the current position of a file-like object and the amount of bytes left to read from
+        there.
+
+        Returns:
+            :obj:`tuple`: ``(position, remaining size)`` or ``(None, None)`` if the object is not
+            seekable.
+        """
+
+        try:
+            start = input_file.tell()
+            input_file.seek(0, os.SEEK_END)
+            end = input_file.tell()
+            input_file.seek(start)
+        except (AttributeError, IOError, OSError, ValueError):
+            return None, None
+
+        return start, end - start
 
     @staticmethod
     def is_image(stream):
@@ -185,3 +252,69 @@ class InputFile(object):
                 return hasattr(file_content, 'read')
 
         return False
+
+
+class MultipartStream(object):
+    """
+    A read-only file-like object which concatenates in-memory byte strings and slices of files.
+    It is used as a request body, so that ``httplib`` sends it in chunks instead of requiring the
+    whole body to be built in memory.
+
+    Note:
+        Only rewinding to the start (``seek(0)``) is supported, which is what ``urllib3`` needs to
+        retry a request.
+
+    Args:
+        parts (:obj:`tuple`): Each item is either :obj:`bytes` or a ``(file, offset, length)``
+            tuple.
+    """
+
+    def __init__(self, parts):
+        self.parts = parts
+        self.length = sum(len(part) if isinstance(part, bytes) else part[2] for part in parts)
+        self._index = 0
+        self._offset = 0
+        self._position = 0
+
+    def __len__(self):
+        return self.length
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if offset != 0 or whence != os.SEEK_SET:
+            raise IOError('MultipartStream can only be rewound to its start')
+        self._index = 0
+        self._offset = 0
+        self._position = 0
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.length - self._position
+
+        chunks = []
+        while size > 0 and self._index < len(self.parts):
+            part = self.parts[self._index]
+
+            if isinstance(part, bytes):
+                chunk = part[self._offset:self._offset + size]
+                left = len(part) - self._offset - len(chunk)
+            else:
+                input_file, start, length = part
+                if self._offset == 0:
+                    input_file.seek(start)
+                chunk = input_file.read(min(size, length - self._offset))
+                left = length - self._offset - len(chunk)
+                if not chunk and left:
+                    raise TelegramError('Input file was truncated while being uploaded')
+
+            chunks.append(chunk)
+            size -= len(chunk)
+            self._offset += len(chunk)
+            self._position += len(chunk)
+            if not left:
+                self._index += 1
+                self._offset = 0
+
+        return b''.join(chunks)
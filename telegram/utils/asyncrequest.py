@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+#
+# A library that provides a Python interface to the Telegram Bot API
+# Copyright (C) 2015-2017
+# Leandro Toledo de Souza <devs@python-telegram-bot.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser Public License for more details.
+#
+# You should have received a copy of the GNU Lesser Public License
+# along with this program.  If not, see [http://www.gnu.org/licenses/].
+"""This module contains methods to make POST and GET requests from an asyncio event loop"""
+import asyncio
+import os
+
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from telegram import InputFile
+from telegram.error import TimedOut, NetworkError
+from telegram.utils import webhookreply
+from telegram.utils.request import Request, DOWNLOAD_CHUNK_SIZE
+
+
+class _StreamReader(object):
+    """Asynchronously iterates over the chunks of a request body, reading them in the default
+    executor so that file reads don't block the event loop."""
+
+    def __init__(self, body, chunk_size=DOWNLOAD_CHUNK_SIZE):
+        self._body = body
+        self._chunk_size = chunk_size
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        loop = asyncio.get_event_loop()
+        chunk = await loop.run_in_executor(None, self._body.read, self._chunk_size)
+        if not chunk:
+            raise StopAsyncIteration
+        return chunk
+
+
+class AsyncRequest(object):
+    """
+    The asyncio counterpart of :class:`telegram.utils.request.Request`. Its methods are
+    coroutines with the same signatures and results, so that a single thread can keep many
+    requests in flight.
+
+    Note:
+        Requires Python 3.5+ and ``aiohttp`` (``pip install python-telegram-bot[async]``).
+        The underlying session is created on first use and bound to the running event loop.
+
+    Args:
+        con_pool_size (:obj:`int`, optional): Maximum number of simultaneous connections.
+            Defaults to 100.
+        proxy_url (:obj:`str`, optional): The URL to an HTTP proxy server. For example:
+            `http://127.0.0.1:3128`. Defaults to the ``HTTPS_PROXY`` environment variable.
+        connect_timeout (:obj:`int` | :obj:`float`, optional): The maximum amount of time (in
+            seconds) to wait for a connection attempt to a server to succeed. (default: 5.)
+        read_timeout (:obj:`int` | :obj:`float`, optional): The maximum amount of time (in
+            seconds) to wait between consecutive read operations for a response from the
+            server. (default: 5.)
+
+    Attributes:
+        bytes_uploaded (:obj:`int`): Total size of the file uploads sent by :attr:`post`.
+        bytes_downloaded (:obj:`int`): Total amount of bytes received by :attr:`download` and
+            :attr:`download_to`.
+
+    Raises:
+        RuntimeError: If ``aiohttp`` is not installed.
+
+    """
+
+    def __init__(self, con_pool_size=100, proxy_url=None, connect_timeout=5.,
+                 read_timeout=5.):
+        if aiohttp is None:
+            raise RuntimeError('aiohttp is missing')
+
+        self._con_pool_size = con_pool_size
+        self._proxy_url = (proxy_url or os.environ.get('HTTPS_PROXY')
+                           or os.environ.get('https_proxy'))
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._session = None
+        self.bytes_uploaded = 0
+        self.bytes_downloaded = 0
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._con_pool_size)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def stop(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _open(self, method, url, timeout=None, **kwargs):
+        """Performs an aiohttp request and raises the matching TelegramError on failure.
+
+        The response must be released by the caller.
+
+        Returns:
+            :obj:`aiohttp.ClientResponse`
+
+        Raises:
+            TelegramError
+
+        """
+        kwargs['timeout'] = aiohttp.ClientTimeout(
+            sock_connect=self._connect_timeout,
+            sock_read=timeout if timeout is not None else self._read_timeout)
+        if self._proxy_url:
+            kwargs['proxy'] = self._proxy_url
+
+        try:
+            resp = await self._get_session().request(method, url, **kwargs)
+            if 200 <= resp.status <= 299:
+                return resp
+            try:
+                body = await resp.read()
+            finally:
+                resp.release()
+        except asyncio.TimeoutError:
+            raise TimedOut()
+        except aiohttp.ClientError as error:
+            raise NetworkError('aiohttp ClientError {0}'.format(error))
+
+        Request._raise_for_status(resp.status, body)
+
+    async def _request_wrapper(self, method, url, timeout=None, **kwargs):
+        resp = await self._open(method, url, timeout=timeout, **kwargs)
+        try:
+            return await resp.read()
+        except asyncio.TimeoutError:
+            raise TimedOut()
+        except aiohttp.ClientError as error:
+            raise NetworkError('aiohttp ClientError {0}'.format(error))
+        finally:
+            resp.release()
+
+    async def get(self, url, timeout=None):
+        """Request an URL.
+
+        Args:
+            url (:obj:`str`): The web location we want to retrieve.
+            timeout (:obj:`int` | :obj:`float`): If this value is specified, use it as the read
+                timeout from the server.
+
+        Returns:
+          A JSON object.
+
+        """
+        return Request._parse(await self._request_wrapper('GET', url, timeout=timeout))
+
+    async def post(self, url, data, timeout=None):
+        """Request an URL.
+
+        Args:
+            url (:obj:`str`): The web location we want to retrieve.
+            data (dict[str, str|int]): A dict of key/value pairs.
+            timeout (:obj:`int` | :obj:`float`): If this value is specified, use it as the read
+                timeout from the server.
+
+        Returns:
+          A JSON object.
+
+        """
+        if InputFile.is_inputfile(data):
+            data = InputFile(data)
+            # The body is read from the input file by the executor while it is being sent
+            body = data.to_stream()
+            headers = data.headers
+            headers['Content-Length'] = str(len(body))
+            result = await self._request_wrapper(
+                'POST', url, timeout=timeout, headers=headers,
+                data=_StreamReader(body))
+            self.bytes_uploaded += len(body)
+        elif webhookreply.offer(url, data):
+            # See Request.post
+            return True
+        else:
+            result = await self._request_wrapper(
+                'POST', url, timeout=timeout, data=json.dumps(data).encode(),
+                headers={'Content-Type': 'application/json'})
+
+        return Request._parse(result)
+
+    async def retrieve(self, url, timeout=None):
+        """Retrieve the contents of a file by its URL.
+
+        Args:
+            url (:obj:`str`): The web location we want to retrieve.
+            timeout (:obj:`int` | :obj:`float`): If this value is specified, use it as the read
+                timeout from the server.
+
+        """
+        return await self._request_wrapper('GET', url, timeout=timeout)
+
+    async def download(self, url, filename, timeout=None, chunk_size=DOWNLOAD_CHUNK_SIZE,
+                       progress=None):
+        """Download a file by its URL. See :attr:`telegram.utils.request.Request.download`.
+
+        Returns:
+            :obj:`int`: The size of the downloaded file.
+
+        """
+        with open(filename, 'wb') as fobj:
+            return await self.download_to(url, fobj, timeout=timeout, chunk_size=chunk_size,
+                                          progress=progress)
+
+    async def download_to(self, url, out, timeout=None, chunk_size=DOWNLOAD_CHUNK_SIZE,
+                          progress=None):
+        """Download a file by its URL into a file-like object. See
+        :attr:`telegram.utils.request.Request.download_to`.
+
+        Returns:
+            :obj:`int`: The amount of bytes written to ``out``.
+
+        """
+        resp = await self._open('GET', url, timeout=timeout)
+        total = resp.content_length
+        received = 0
+
+        try:
+            while True:
+                chunk = await resp.content.read(chunk_size)
+                if not chunk:
+                    break
+                out.write(chunk)
+                received += len(chunk)
+                self.bytes_downloaded += len(chunk)
+                if progress is not None:
+                    progress(received, total)
+        except asyncio.TimeoutError:
+            raise TimedOut()
+        except aiohttp.ClientError as error:
+            raise NetworkError('aiohttp ClientError {0}'.format(error))
+        finally:
+            resp.release()
+
+        return received
@@ -19,7 +19,7 @@
 """ This module contains the Promise class """
 
 import logging
-from threading import Event
+from threading import Event, Lock
 
 
 logger = logging.getLogger(__name__)
@@ -36,6 +36,8 @@ class Promise(object):
         self.done = Event()
         self._result = None
         self._exception = None
+        self._callbacks = []
+        self._callbacks_lock = Lock()
 
     def run(self):
         try:
@@ -46,11 +48,31 @@ class Promise(object):
             self._exception = exc
 
         finally:
-            self.done.set()
+            with self._callbacks_lock:
+                self.done.set()
+                callbacks, self._callbacks = self._callbacks, []
+            for callback in callbacks:
+                self._run_callback(callback)
 
     def __call__(self):
         self.run()
 
+    def _run_callback(self, callback):
+        try:
+            callback(self)
+        except Exception:
+            logger.exception('An uncaught error was raised while running a callback of the '
+                             'promise')
+
+    def add_done_callback(self, callback):
+        """Calls ``callback`` with this promise once it is done, in the thread which ran it, or
+        right away if it is done already."""
+        with self._callbacks_lock:
+            if not self.done.is_set():
+                self._callbacks.append(callback)
+                return
+        self._run_callback(callback)
+
     def result(self, timeout=None):
         self.done.wait(timeout=timeout)
         if self._exception is not None:
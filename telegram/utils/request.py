@@ -18,10 +18,12 @@
 # along with this program.  If not, see [http://www.gnu.org/licenses/].
 """This module contains methods to make POST and GET requests"""
 import os
+import mmap
 import socket
 import sys
 import logging
 import warnings
+from threading import Lock, Thread
 
 try:
     import ujson as json
@@ -40,11 +42,19 @@ except ImportError:
     raise
 
 from telegram import (InputFile, TelegramError)
+from telegram.utils import webhookreply
 from telegram.error import (Unauthorized, NetworkError, TimedOut, BadRequest, ChatMigrated,
                             RetryAfter, InvalidToken)
 
 logging.getLogger('urllib3').setLevel(logging.WARNING)
 
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+RESUME_SUFFIX = '.resume'
+
+
+class _RangeNotSupported(Exception):
+    pass
+
 
 class Request(object):
     """
@@ -64,6 +74,11 @@ class Request(object):
             timeout. This value is usually overridden by the various ``telegram.Bot`` methods.
             (default: 5.)
 
+    Attributes:
+        bytes_uploaded (:obj:`int`): Total size of the file uploads sent by :attr:`post`.
+        bytes_downloaded (:obj:`int`): Total amount of bytes received by :attr:`download` and
+            :attr:`download_to`.
+
     """
 
     def __init__(self,
@@ -76,6 +91,9 @@ class Request(object):
             urllib3_proxy_kwargs = dict()
 
         self._connect_timeout = connect_timeout
+        self._counters_lock = Lock()
+        self.bytes_uploaded = 0
+        self.bytes_downloaded = 0
 
         sockopts = HTTPConnection.default_socket_options + [
             (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
@@ -171,6 +189,25 @@ class Request(object):
         Raises:
             TelegramError
 
+        """
+        return self._open(*args, **kwargs).data
+
+    def _open(self, *args, **kwargs):
+        """Performs a urllib3 request and raises the matching TelegramError on failure.
+
+        If ``preload_content=False`` is passed, the body of a successful response is left unread
+        and the caller must call ``release_conn()`` on the response once done with it.
+
+        Args:
+            args: unnamed arguments, passed to urllib3 request.
+            kwargs: keyword arguments, passed tp urllib3 request.
+
+        Returns:
+            :obj:`urllib3.response.HTTPResponse`
+
+        Raises:
+            TelegramError
+
         """
         # Make sure to hint Telegram servers that we reuse connections by sending
         # "Connection: keep-alive" in the HTTP headers.
@@ -189,27 +226,44 @@ class Request(object):
 
         if 200 <= resp.status <= 299:
             # 200-299 range are HTTP success statuses
-            return resp.data
+            return resp
 
         try:
-            message = self._parse(resp.data)
+            self._raise_for_status(resp.status, resp.data)
+        finally:
+            resp.release_conn()
+
+    @classmethod
+    def _raise_for_status(cls, status, body):
+        """Raises the TelegramError matching an unsuccessful HTTP response.
+
+        Args:
+            status (:obj:`int`): The HTTP status code.
+            body (:obj:`bytes`): The body of the response.
+
+        Raises:
+            TelegramError
+
+        """
+        try:
+            message = cls._parse(body)
         except ValueError:
             message = 'Unknown HTTPError'
 
-        if resp.status in (401, 403):
+        if status in (401, 403):
             raise Unauthorized(message)
-        elif resp.status == 400:
+        elif status == 400:
             raise BadRequest(message)
-        elif resp.status == 404:
+        elif status == 404:
             raise InvalidToken()
-        elif resp.status == 413:
+        elif status == 413:
             raise NetworkError('File too large. Check telegram api limits '
                                'https://core.telegram.org/bots/api#senddocument')
 
-        elif resp.status == 502:
+        elif status == 502:
             raise NetworkError('Bad Gateway')
         else:
-            raise NetworkError('{0} ({1})'.format(message, resp.status))
+            raise NetworkError('{0} ({1})'.format(message, status))
 
     def get(self, url, timeout=None):
         """Request an URL.
@@ -242,7 +296,8 @@ class Request(object):
                 connection pool).
 
         Returns:
-          A JSON object.
+          A JSON object, or ``True`` if the call was sent in the response to a webhook request,
+          see :class:`telegram.utils.webhookreply.WebhookReply`.
 
         """
         urlopen_kwargs = {}
@@ -252,8 +307,17 @@ class Request(object):
 
         if InputFile.is_inputfile(data):
             data = InputFile(data)
+            # The body is streamed from the input file, so its length must be sent upfront
+            body = data.to_stream()
+            headers = data.headers
+            headers['Content-length'] = str(len(body))
             result = self._request_wrapper(
-                'POST', url, body=data.to_form(), headers=data.headers, **urlopen_kwargs)
+                'POST', url, body=body, headers=headers, **urlopen_kwargs)
+            self._count('bytes_uploaded', len(body))
+        elif webhookreply.offer(url, data):
+            # Telegram executes the call when it gets the response to the webhook request, but
+            # doesn't tell the result
+            return True
         else:
             data = json.dumps(data)
             result = self._request_wrapper(
@@ -281,18 +345,257 @@ class Request(object):
 
         return self._request_wrapper('GET', url, **urlopen_kwargs)
 
-    def download(self, url, filename, timeout=None):
+    def download(self, url, filename, timeout=None, chunk_size=DOWNLOAD_CHUNK_SIZE,
+                 progress=None):
         """Download a file by its URL.
+
+        The file is written to disk chunk by chunk as it is received, so memory usage does not
+        depend on the size of the file.
+
         Args:
-            url (str): The web location we want to retrieve.
+            url (:obj:`str`): The web location we want to retrieve.
+            filename (:obj:`str`): The filename within the path to download the file.
             timeout (:obj:`int` | :obj:`float`): If this value is specified, use it as the read
                 timeout from the server (instead of the one specified during creation of the
                 connection pool).
+            chunk_size (:obj:`int`, optional): Maximum amount of bytes read from the connection
+                at once. Defaults to 64 KiB.
+            progress (:obj:`callable`, optional): Called as ``progress(received, total)`` after
+                each chunk, ``total`` being ``None`` if the server didn't send a Content-Length.
 
-          filename:
-            The filename within the path to download the file.
+        Returns:
+            :obj:`int`: The amount of bytes written to ``filename``.
 
         """
-        buf = self.retrieve(url, timeout=timeout)
         with open(filename, 'wb') as fobj:
-            fobj.write(buf)
+            return self.download_to(url, fobj, timeout=timeout, chunk_size=chunk_size,
+                                    progress=progress)
+
+    def download_to(self, url, out, timeout=None, chunk_size=DOWNLOAD_CHUNK_SIZE, progress=None):
+        """Download a file by its URL into a file-like object, chunk by chunk.
+
+        Args:
+            url (:obj:`str`): The web location we want to retrieve.
+            out (:obj:`object`): A file-like object with a ``write`` method. Must be opened in
+                binary mode, if applicable.
+            timeout (:obj:`int` | :obj:`float`): If this value is specified, use it as the read
+                timeout from the server (instead of the one specified during creation of the
+                connection pool).
+            chunk_size (:obj:`int`, optional): Maximum amount of bytes read from the connection
+                at once. Defaults to 64 KiB.
+            progress (:obj:`callable`, optional): Called as ``progress(received, total)`` after
+                each chunk, ``total`` being ``None`` if the server didn't send a Content-Length.
+
+        Returns:
+            :obj:`int`: The amount of bytes written to ``out``.
+
+        Raises:
+            TelegramError
+
+        """
+        urlopen_kwargs = {}
+        if timeout is not None:
+            urlopen_kwargs['timeout'] = Timeout(read=timeout, connect=self._connect_timeout)
+
+        resp = self._open('GET', url, preload_content=False, **urlopen_kwargs)
+        total = resp.headers.get('content-length')
+        total = int(total) if total is not None else None
+        received = 0
+
+        for chunk in self._iter_chunks(resp, chunk_size):
+            out.write(chunk)
+            received += len(chunk)
+            self._count('bytes_downloaded', len(chunk))
+            if progress is not None:
+                progress(received, total)
+
+        return received
+
+    def download_ranged(self, url, filename, size, connections=4, timeout=None,
+                        chunk_size=DOWNLOAD_CHUNK_SIZE, progress=None, max_retries=3,
+                        use_mmap=False):
+        """Download a file by its URL using several concurrent HTTP Range requests.
+
+        The target file is preallocated to ``size`` bytes and split into ``connections``
+        segments, each downloaded by its own thread over this object's connection pool. A segment
+        which fails with a :class:`telegram.error.NetworkError` (including
+        :class:`telegram.error.TimedOut`) is retried from where it stopped, up to ``max_retries``
+        times. If it still fails, the progress of all segments is kept in ``filename + '.resume'``
+        and the error is raised; calling this method again with the same arguments resumes the
+        download instead of starting over.
+
+        If the server ignores the ``Range`` header, the file is downloaded with :attr:`download`
+        instead.
+
+        Note:
+            The connection pool should hold at least ``connections`` connections (see
+            ``con_pool_size``), otherwise the extra connections are closed after use.
+
+        Args:
+            url (:obj:`str`): The web location we want to retrieve.
+            filename (:obj:`str`): The filename within the path to download the file.
+            size (:obj:`int`): The size of the file in bytes.
+            connections (:obj:`int`, optional): Number of concurrent requests. Defaults to 4.
+            timeout (:obj:`int` | :obj:`float`): If this value is specified, use it as the read
+                timeout from the server (instead of the one specified during creation of the
+                connection pool).
+            chunk_size (:obj:`int`, optional): Maximum amount of bytes read from a connection at
+                once. Defaults to 64 KiB.
+            progress (:obj:`callable`, optional): Called as ``progress(received, total)`` after
+                each chunk. ``received`` includes the bytes of a resumed download.
+            max_retries (:obj:`int`, optional): How many times a failing segment is retried
+                before giving up. Defaults to 3.
+            use_mmap (:obj:`bool`, optional): Write the segments through a memory map of the
+                target file instead of a file object per connection. Defaults to ``False``.
+
+        Returns:
+            :obj:`int`: The size of the downloaded file.
+
+        Raises:
+            TelegramError
+
+        """
+        if not size:
+            # Nothing to request, and no segments to split it into
+            open(filename, 'wb').close()
+            return 0
+
+        state_file = filename + RESUME_SUFFIX
+        segments = self._load_segments(filename, state_file, size)
+        if segments is None:
+            step = -(-size // max(connections, 1))
+            segments = [[start, start, min(start + step, size)] for start in range(0, size, step)]
+            with open(filename, 'wb') as fobj:
+                fobj.truncate(size)
+
+        lock = Lock()
+        errors = []
+        received = [sum(seg[1] - seg[0] for seg in segments)]
+
+        fobj = open(filename, 'r+b')
+        mapped = mmap.mmap(fobj.fileno(), size) if use_mmap else None
+
+        def write_to(position):
+            if mapped is not None:
+                def write(chunk):
+                    mapped[position[0]:position[0] + len(chunk)] = chunk
+                return write, None
+
+            out = open(filename, 'r+b')
+            out.seek(position[0])
+            return out.write, out
+
+        def fetch(segment):
+            retries = 0
+            while segment[1] < segment[2]:
+                position = [segment[1]]
+                write, out = write_to(position)
+                try:
+                    self._download_range(url, segment, position, write, timeout, chunk_size,
+                                         lock, received, size, progress)
+                except NetworkError as error:
+                    if retries >= max_retries:
+                        errors.append(error)
+                        return
+                    retries += 1
+                except Exception as error:
+                    errors.append(error)
+                    return
+                finally:
+                    if out is not None:
+                        out.close()
+
+        threads = [Thread(target=fetch, args=(segment,)) for segment in segments
+                   if segment[1] < segment[2]]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            if mapped is not None:
+                mapped.flush()
+                mapped.close()
+            fobj.close()
+
+        if any(isinstance(error, _RangeNotSupported) for error in errors):
+            self._remove(state_file)
+            return self.download(url, filename, timeout=timeout, chunk_size=chunk_size,
+                                 progress=progress)
+        if errors:
+            self._save_segments(state_file, size, segments)
+            raise errors[0]
+
+        self._remove(state_file)
+        return size
+
+    def _download_range(self, url, segment, position, write, timeout, chunk_size, lock,
+                        received, total, progress):
+        urlopen_kwargs = {}
+        if timeout is not None:
+            urlopen_kwargs['timeout'] = Timeout(read=timeout, connect=self._connect_timeout)
+
+        headers = {'Range': 'bytes={0}-{1}'.format(segment[1], segment[2] - 1)}
+        resp = self._open('GET', url, preload_content=False, headers=headers, **urlopen_kwargs)
+        if resp.status != 206 and not (segment[1] == 0 and segment[2] == total):
+            resp.release_conn()
+            raise _RangeNotSupported()
+
+        for chunk in self._iter_chunks(resp, chunk_size):
+            chunk = chunk[:segment[2] - position[0]]
+            write(chunk)
+            position[0] += len(chunk)
+            self._count('bytes_downloaded', len(chunk))
+            with lock:
+                # The segment only advances once its bytes are written, so a saved state never
+                # skips over missing data.
+                segment[1] = position[0]
+                received[0] += len(chunk)
+                if progress is not None:
+                    progress(received[0], total)
+            if segment[1] >= segment[2]:
+                break
+
+        if segment[1] < segment[2]:
+            # A short or empty response, which urllib3 doesn't complain about as it doesn't
+            # enforce the content length. Retried like a failed read.
+            raise NetworkError('Incomplete response for the range {0}'.format(headers['Range']))
+
+    @staticmethod
+    def _load_segments(filename, state_file, size):
+        try:
+            with open(state_file) as fobj:
+                state = json.load(fobj)
+            if state['size'] != size or os.path.getsize(filename) != size:
+                return None
+            return [list(segment) for segment in state['segments']]
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+
+    @staticmethod
+    def _save_segments(state_file, size, segments):
+        with open(state_file, 'w') as fobj:
+            json.dump({'size': size, 'segments': segments}, fobj)
+
+    @staticmethod
+    def _remove(filename):
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _iter_chunks(resp, chunk_size):
+        try:
+            for chunk in resp.stream(chunk_size):
+                yield chunk
+        except urllib3.exceptions.TimeoutError:
+            raise TimedOut()
+        except urllib3.exceptions.HTTPError as error:
+            raise NetworkError('urllib3 HTTPError {0}'.format(error))
+        finally:
+            resp.release_conn()
+
+    def _count(self, counter, amount):
+        with self._counters_lock:
+            setattr(self, counter, getattr(self, counter) + amount)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+#
+# A library that provides a Python interface to the Telegram Bot API
+# Copyright (C) 2015-2017
+# Leandro Toledo de Souza <devs@python-telegram-bot.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser Public License for more details.
+#
+# You should have received a copy of the GNU Lesser Public License
+# along with this program.  If not, see [http://www.gnu.org/licenses/].
+"""This module contains a cache which reuses the file_id of already uploaded files."""
+import hashlib
+import os
+import sqlite3
+from collections import OrderedDict
+from threading import Lock
+
+from future.utils import string_types
+
+# Parameters of the send methods whose file is returned in the Message attribute of the same name
+MEDIA_TYPES = ('audio', 'document', 'photo', 'sticker', 'video', 'voice', 'video_note')
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+class MemoryStore(object):
+    """
+    An in-memory store for :class:`UploadCache`, which forgets the least recently used entries
+    once it holds ``maxsize`` of them.
+
+    Args:
+        maxsize (:obj:`int`, optional): Maximum number of entries. Defaults to 1024.
+
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.pop(key, None)
+            if value is not None:
+                self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteStore(object):
+    """
+    A store for :class:`UploadCache` backed by an SQLite database, so that file_ids survive
+    restarts of the bot.
+
+    Args:
+        filename (:obj:`str`): Path of the database file. It is created if it doesn't exist.
+
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._lock = Lock()
+        self._conn = sqlite3.connect(filename, check_same_thread=False)
+        with self._conn:
+            self._conn.execute('CREATE TABLE IF NOT EXISTS uploads '
+                               '(key TEXT PRIMARY KEY, file_id TEXT NOT NULL)')
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute('SELECT file_id FROM uploads WHERE key = ?',
+                                     (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO uploads (key, file_id) VALUES (?, ?)',
+                               (key, value))
+
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM uploads WHERE key = ?', (key,))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM uploads').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class Upload(object):
+    """
+    A file about to be sent through :class:`UploadCache`.
+
+    Attributes:
+        media_type (:obj:`str`): The parameter the file is sent as, e.g. ``'photo'``.
+        input_file (:obj:`object`): The file object passed by the user.
+        key (:obj:`str`): The cache key of the file content.
+        file_id (:obj:`str`): The cached file_id which is sent instead of the file, or
+            :obj:`None` if the file is uploaded.
+
+    """
+
+    def __init__(self, media_type, input_file, key, file_id):
+        self.media_type = media_type
+        self.input_file = input_file
+        self.key = key
+        self.file_id = file_id
+
+
+class UploadCache(object):
+    """
+    Remembers the file_id Telegram assigns to uploaded files, so that sending the same content
+    again only sends the file_id instead of the file.
+
+    Files are identified by their path, modification time and size if they were opened from the
+    file system, otherwise by a SHA-1 hash of their content. Files which can't be rewound after
+    hashing (e.g. pipes) are never cached.
+
+    Pass an instance as ``upload_cache`` to :class:`telegram.Bot`. If Telegram rejects a cached
+    file_id, it is forgotten and the file is uploaded again.
+
+    Attributes:
+        store (:obj:`object`): The backing store.
+        hits (:obj:`int`): Number of successful sends which reused a file_id.
+        misses (:obj:`int`): Number of successful sends which uploaded the file.
+
+    Args:
+        store (:obj:`object`, optional): An object with ``get(key)``, ``set(key, file_id)`` and
+            ``delete(key)`` methods, e.g. :class:`MemoryStore` or :class:`SQLiteStore`. Defaults
+            to a new :class:`MemoryStore`.
+
+    """
+
+    def __init__(self, store=None):
+        self.store = store if store is not None else MemoryStore()
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+    def lookup(self, data):
+        """
+        Prepares the parameters of a send method. If the file in ``data`` is cached, it is
+        replaced by its file_id.
+
+        Args:
+            data (:obj:`dict`): The parameters of the request.
+
+        Returns:
+            :class:`Upload`: The file being sent, or :obj:`None` if ``data`` holds no cacheable
+            file.
+
+        """
+        for media_type in MEDIA_TYPES:
+            input_file = data.get(media_type)
+            if hasattr(input_file, 'read'):
+                break
+        else:
+            return None
+
+        key = self.key(input_file)
+        if key is None:
+            return None
+        key = '{0}:{1}'.format(media_type, key)
+
+        file_id = self.store.get(key)
+        if file_id is not None:
+            data[media_type] = file_id
+        return Upload(media_type, input_file, key, file_id)
+
+    def record(self, upload, message):
+        """
+        Counts a successful send and stores the file_id of the file if it was uploaded.
+
+        Args:
+            upload (:class:`Upload`): The file as returned by :attr:`lookup`.
+            message (:class:`telegram.Message`): The message returned by Telegram.
+
+        """
+        with self._lock:
+            if upload.file_id is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                return
+
+        sent = getattr(message, upload.media_type, None)
+        if upload.media_type == 'photo' and sent:
+            sent = sent[-1]
+        if sent:
+            self.store.set(upload.key, sent.file_id)
+
+    def forget(self, upload, data):
+        """
+        Forgets a file_id rejected by Telegram and puts the file back into ``data``, so that it is
+        uploaded again.
+
+        Args:
+            upload (:class:`Upload`): The file as returned by :attr:`lookup`.
+            data (:obj:`dict`): The parameters of the request.
+
+        """
+        self.store.delete(upload.key)
+        data[upload.media_type] = upload.input_file
+        upload.file_id = None
+
+    @staticmethod
+    def key(input_file):
+        """
+        Computes the cache key of a file object, leaving its position unchanged.
+
+        Args:
+            input_file (:obj:`object`): A file-like object.
+
+        Returns:
+            :obj:`str`: The key, or :obj:`None` if the file can't be identified.
+
+        """
+        try:
+            start = input_file.tell()
+        except (AttributeError, IOError, OSError):
+            return None
+
+        name = getattr(input_file, 'name', None)
+        if isinstance(name, string_types) and os.path.isfile(name):
+            stat = os.stat(name)
+            return 'path:{0}:{1}:{2}:{3}'.format(os.path.abspath(name), stat.st_mtime,
+                                                 stat.st_size, start)
+
+        digest = hashlib.sha1()
+        try:
+            chunk = input_file.read(HASH_CHUNK_SIZE)
+            while chunk:
+                digest.update(chunk if isinstance(chunk, bytes) else chunk.encode('utf-8'))
+                chunk = input_file.read(HASH_CHUNK_SIZE)
+        finally:
+            input_file.seek(start)
+        return 'sha1:{0}'.format(digest.hexdigest())
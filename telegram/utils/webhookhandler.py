@@ -1,8 +1,12 @@
 import logging
+import socket
+import ssl
 
 from telegram import Update
+from telegram.utils.webhookreply import WebhookReply
 from future.utils import bytes_to_native_str
-from threading import Lock
+from threading import Lock, Thread
+from queue import Queue
 try:
     import ujson as json
 except ImportError:
@@ -23,22 +27,73 @@ class _InvalidPost(Exception):
 
 
 class WebhookServer(BaseHTTPServer.HTTPServer, object):
+    """
+    Receives the updates posted by Telegram. Connections are handled by a pool of
+    ``max_connections`` threads, so that a slow client doesn't hold up the others. As Telegram
+    keeps its connections open, there should be at least as many threads as the
+    ``max_connections`` passed to :attr:`telegram.Bot.set_webhook`.
 
-    def __init__(self, server_address, RequestHandlerClass, update_queue, webhook_path, bot):
+    If :attr:`ssl_context` is set, the TLS handshake of a connection is done by the thread
+    handling it, too.
+
+    If :attr:`reply_timeout` is set, the response to a request is delayed until its update was
+    processed, at most :attr:`reply_timeout` seconds, so that the first Bot API call made while
+    it's processed can be sent in the response, see
+    :class:`telegram.utils.webhookreply.WebhookReply`.
+
+    The updates of several bots can be received by one server: :attr:`add_route` adds the path
+    and the update queue of another bot. The route given to the constructor is optional.
+
+    With ``reuse_port``, several processes can each run a server on the same port, among which
+    the kernel spreads the connections (``SO_REUSEPORT``, Linux only).
+    """
+
+    def __init__(self, server_address, RequestHandlerClass, update_queue, webhook_path, bot,
+                 max_connections=40, reply_timeout=None, reuse_port=False):
+        # Used by server_bind, which is called by the constructor of HTTPServer
+        self.reuse_port = reuse_port
         super(WebhookServer, self).__init__(server_address, RequestHandlerClass)
         self.logger = logging.getLogger(__name__)
         self.update_queue = update_queue
         self.webhook_path = webhook_path
         self.bot = bot
+        # path -> (update queue, bot)
+        self.routes = {}
+        if webhook_path is not None:
+            self.add_route(webhook_path, update_queue, bot)
+        self.max_connections = max_connections
+        self.reply_timeout = reply_timeout
+        self.ssl_context = None
         self.is_running = False
         self.server_lock = Lock()
         self.shutdown_lock = Lock()
+        self._requests = Queue()
+        self._workers = []
+        self._connections = set()
+        self._connections_lock = Lock()
+
+    def add_route(self, webhook_path, update_queue, bot):
+        """Puts the updates posted to ``webhook_path`` into ``update_queue``."""
+        self.routes[webhook_path] = (update_queue, bot)
+
+    def remove_route(self, webhook_path):
+        """Rejects the updates posted to ``webhook_path`` from now on."""
+        self.routes.pop(webhook_path, None)
+
+    def server_bind(self):
+        if self.reuse_port:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super(WebhookServer, self).server_bind()
 
     def serve_forever(self, poll_interval=0.5):
         with self.server_lock:
             self.is_running = True
+            self._start_workers()
             self.logger.debug('Webhook Server started.')
-            super(WebhookServer, self).serve_forever(poll_interval)
+            try:
+                super(WebhookServer, self).serve_forever(poll_interval)
+            finally:
+                self._stop_workers()
             self.logger.debug('Webhook Server stopped.')
 
     def shutdown(self):
@@ -50,51 +105,131 @@ class WebhookServer(BaseHTTPServer.HTTPServer, object):
                 super(WebhookServer, self).shutdown()
                 self.is_running = False
 
+    def _start_workers(self):
+        for i in range(self.max_connections):
+            worker = Thread(target=self._work, name='webhook_{0}'.format(i))
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def _stop_workers(self):
+        # Wake up the workers waiting for the next request of a kept-alive connection
+        with self._connections_lock:
+            for connection in self._connections:
+                try:
+                    connection.shutdown(socket.SHUT_RDWR)
+                except (OSError, socket.error):
+                    pass
+        for _ in self._workers:
+            self._requests.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def process_request(self, request, client_address):
+        # Called by serve_forever for each accepted connection
+        self._requests.put((request, client_address))
+
+    def _work(self):
+        while 1:
+            item = self._requests.get()
+            if item is None:
+                break
+
+            request, client_address = item
+            with self._connections_lock:
+                self._connections.add(request)
+            try:
+                if self.ssl_context is not None:
+                    request.settimeout(self.RequestHandlerClass.timeout)
+                    request = self.ssl_context.wrap_socket(request, server_side=True)
+                self.finish_request(request, client_address)
+            except (ssl.SSLError, socket.error) as exc:
+                self.logger.debug('Connection from %s failed: %s', client_address, exc)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                with self._connections_lock:
+                    self._connections.discard(item[0])
+                self.shutdown_request(request)
+
+    def handle_error(self, request, client_address):
+        self.logger.exception('An uncaught error was raised while handling the request from '
+                              '%s', client_address)
+
 
 # WebhookHandler, process webhook calls
 # Based on: https://github.com/eternnoir/pyTelegramBotAPI/blob/master/
 # examples/webhook_examples/webhook_cpython_echo_bot.py
 class WebhookHandler(BaseHTTPServer.BaseHTTPRequestHandler, object):
     server_version = 'WebhookHandler/1.0'
+    # Keep the connections of Telegram open for further updates
+    protocol_version = 'HTTP/1.1'
+    # Seconds a connection may be idle before it's closed
+    timeout = 60
 
     def __init__(self, request, client_address, server):
         self.logger = logging.getLogger(__name__)
         super(WebhookHandler, self).__init__(request, client_address, server)
 
     def do_HEAD(self):
-        self.send_response(200)
-        self.end_headers()
+        self._send_empty_response()
 
     def do_GET(self):
+        self._send_empty_response()
+
+    def _send_empty_response(self):
         self.send_response(200)
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
     def do_POST(self):
         self.logger.debug('Webhook triggered')
         try:
-            self._validate_post()
+            update_queue, bot = self._validate_post()
             clen = self._get_content_len()
         except _InvalidPost as e:
+            # The body, if any, wasn't read, so the connection can't be used any further
+            self.close_connection = True
             self.send_error(e.http_code)
-            self.end_headers()
         else:
             buf = self.rfile.read(clen)
             json_string = bytes_to_native_str(buf)
 
-            self.send_response(200)
-            self.end_headers()
+            if self.server.reply_timeout is None:
+                self._send_empty_response()
 
             self.logger.debug('Webhook received data: ' + json_string)
 
-            update = Update.de_json(json.loads(json_string), self.server.bot)
+            update = Update.de_json(json.loads(json_string), bot)
 
             self.logger.debug('Received Update with ID %d on Webhook' % update.update_id)
-            self.server.update_queue.put(update)
+            if self.server.reply_timeout is None:
+                update_queue.put(update)
+            else:
+                reply = WebhookReply()
+                reply.register(update, bot)
+                update_queue.put(update)
+                self._send_reply(reply.wait(self.server.reply_timeout))
+
+    def _send_reply(self, body):
+        if body is None:
+            self._send_empty_response()
+            return
+        self.logger.debug('Replying with %s on Webhook', body['method'])
+        body = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
 
     def _validate_post(self):
-        if not (self.path == self.server.webhook_path and 'content-type' in self.headers and
+        route = self.server.routes.get(self.path)
+        if not (route is not None and 'content-type' in self.headers and
                 self.headers['content-type'] == 'application/json'):
             raise _InvalidPost(403)
+        return route
 
     def _get_content_len(self):
         clen = self.headers.get('content-length')
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+#
+# A library that provides a Python interface to the Telegram Bot API
+# Copyright (C) 2015-2017
+# Leandro Toledo de Souza <devs@python-telegram-bot.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser Public License for more details.
+#
+# You should have received a copy of the GNU Lesser Public License
+# along with this program.  If not, see [http://www.gnu.org/licenses/].
+"""This module contains the WebhookReply class."""
+
+from contextlib import contextmanager
+from threading import Event, Lock, local
+
+try:
+    from contextvars import ContextVar
+except ImportError:
+    ContextVar = None
+
+# The Bot API methods which may be called in the response to a webhook request. Telegram doesn't
+# return their result then, so methods whose result is needed (``get*``) aren't included.
+METHODS = frozenset((
+    'sendMessage', 'forwardMessage', 'sendPhoto', 'sendAudio', 'sendDocument', 'sendSticker',
+    'sendVideo', 'sendVoice', 'sendVideoNote', 'sendLocation', 'sendVenue', 'sendContact',
+    'sendChatAction', 'sendGame', 'sendInvoice', 'editMessageText', 'editMessageCaption',
+    'editMessageReplyMarkup', 'deleteMessage', 'answerCallbackQuery', 'answerInlineQuery',
+    'answerShippingQuery', 'answerPreCheckoutQuery', 'kickChatMember', 'unbanChatMember',
+    'leaveChat'))
+
+# (token of the bot, id of the update) -> WebhookReply, while the webhook request of the update
+# waits for its reply
+_pending = {}
+
+
+class _ThreadVar(local):
+    """Stands in for a ``ContextVar`` before Python 3.7."""
+    value = None
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+# The reply the calls of the current thread are offered to. Unlike a thread local, a ContextVar
+# is also separate for each task of an asyncio event loop.
+_current = ContextVar('webhook_reply', default=None) if ContextVar is not None else _ThreadVar()
+
+
+class WebhookReply(object):
+    """
+    The reply to a webhook request. Telegram executes a Bot API call sent as the response to the
+    request which posted an update, which saves the bot the round trip of making the call itself.
+
+    The :class:`telegram.utils.webhookhandler.WebhookServer` registers a reply for each update
+    with :attr:`register` and waits for it with :attr:`wait`. While the
+    :class:`telegram.ext.Dispatcher` processes the update, the first call of one of
+    :attr:`METHODS` made by the thread processing it is handed to the reply by
+    :class:`telegram.utils.request.Request` instead of being sent. Only calls of the bot the
+    update was posted for are taken, those of other bots are always sent. Calls made after the
+    server stopped waiting are sent as usual.
+
+    Attributes:
+        body (:obj:`dict`): The call, ``None`` if there is none.
+        bot (:class:`telegram.Bot`): The bot the update was posted for, set by :attr:`register`.
+    """
+
+    def __init__(self):
+        self.body = None
+        self.bot = None
+        self._key = None
+        self._closed = False
+        self._lock = Lock()
+        self._done = Event()
+
+    def register(self, update, bot):
+        """Makes this the reply for ``update`` posted for ``bot``, until :attr:`wait` returns."""
+        self.bot = bot
+        self._key = (bot.token, id(update))
+        _pending[self._key] = self
+
+    def wait(self, timeout):
+        """
+        Waits until the update was processed or a call was handed to the reply, at most
+        ``timeout`` seconds.
+
+        Returns:
+            :obj:`dict`: The call, ``None`` if there is none.
+        """
+
+        self._done.wait(timeout)
+        _pending.pop(self._key, None)
+        with self._lock:
+            self._closed = True
+            return self.body
+
+    def offer(self, method, data):
+        """
+        Hands a call to the reply, if it's still waiting and there was none before.
+
+        Returns:
+            :obj:`bool`: Whether the reply took the call.
+        """
+
+        with self._lock:
+            if self._closed or self.body is not None:
+                return False
+            self.body = dict(data, method=method)
+        self._done.set()
+        return True
+
+    def finish(self):
+        """Notes that the update was processed, so no call will follow."""
+        self._done.set()
+
+
+@contextmanager
+def replying(update, bot):
+    """
+    Context manager used by the :class:`telegram.ext.Dispatcher` of ``bot`` while it processes
+    ``update``. Within it, the calls made by the current thread (or asyncio task) are offered to
+    the reply to the webhook request of the update, if there is one.
+    """
+
+    # Cheap for the updates which don't come from a webhook waiting for a reply
+    reply = _pending.pop((bot.token, id(update)), None) if _pending else None
+    if reply is None:
+        yield
+        return
+    _current.set(reply)
+    try:
+        yield
+    finally:
+        _current.set(None)
+        reply.finish()
+
+
+def offer(url, data):
+    """
+    Used by :class:`telegram.utils.request.Request` and
+    :class:`telegram.utils.asyncrequest.AsyncRequest` for each call without a file upload.
+
+    Returns:
+        :obj:`bool`: Whether the call was handed to the reply of the webhook request of the update
+        the current thread processes, in which case it must not be sent.
+    """
+
+    reply = _current.get()
+    if reply is None:
+        return False
+    base_url, method = url.rsplit('/', 1)
+    # A call of another bot, e.g. of one served by the same WebhookRouter, can't be executed by
+    # Telegram in the response for this one
+    return method in METHODS and base_url == reply.bot.base_url and reply.offer(method, data)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+#
+# A library that provides a Python interface to the Telegram Bot API
+# Copyright (C) 2015-2017
+# Leandro Toledo de Souza <devs@python-telegram-bot.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see [http://www.gnu.org/licenses/].
+"""This module contains an object that represents Tests for AsyncBot"""
+
+import json
+import sys
+import unittest
+from io import BytesIO
+from threading import Thread
+
+try:
+    import BaseHTTPServer
+except ImportError:
+    import http.server as BaseHTTPServer
+
+try:
+    import asyncio
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+sys.path.append('.')
+
+import telegram
+from tests.base import BaseTest
+
+USER = {'id': 123, 'first_name': 'Bot', 'username': 'async_bot', 'is_bot': True}
+
+
+class ApiHandler(BaseHTTPServer.BaseHTTPRequestHandler, object):
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        method = self.path.rsplit('/', 1)[-1]
+        chat = {'id': 1, 'type': 'private'}
+        if method == 'getMe':
+            response = {'ok': True, 'result': USER}
+        elif method == 'sendMessage':
+            data = json.loads(body.decode('utf-8'))
+            response = {'ok': True, 'result': {'message_id': 1, 'date': 0, 'chat': chat,
+                                               'text': data['text']}}
+        elif method == 'sendDocument':
+            file_id = 'id-{0}'.format(body.count(b'document-content'))
+            response = {'ok': True, 'result': {'message_id': 2, 'date': 0, 'chat': chat,
+                                               'document': {'file_id': file_id}}}
+        else:
+            self.send_response(400)
+            response = {'ok': False, 'description': 'Bad Request: chat not found'}
+        if response['ok']:
+            self.send_response(200)
+        body = json.dumps(response).encode('utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST
+
+    def log_message(self, format, *args):
+        pass
+
+
+@unittest.skipIf(sys.version_info < (3, 5) or aiohttp is None, 'requires Python 3.5+ and aiohttp')
+class AsyncBotTest(BaseTest, unittest.TestCase):
+    """This object represents Tests for AsyncBot."""
+
+    @classmethod
+    def setUpClass(cls):
+        super(AsyncBotTest, cls).setUpClass()
+        cls.httpd = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), ApiHandler)
+        cls.url = 'http://127.0.0.1:{0}/bot'.format(cls.httpd.server_address[1])
+        Thread(target=cls.httpd.serve_forever).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.httpd.shutdown()
+        cls.httpd.server_close()
+
+    def setUp(self):
+        from telegram.asyncbot import AsyncBot
+
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.bot = AsyncBot('123:abc', base_url=self.url)
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.bot.request.stop())
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def run_coroutine(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_get_me(self):
+        user = self.run_coroutine(self.bot.get_me())
+
+        self.assertIsInstance(user, telegram.User)
+        self.assertEqual(self.bot.username, 'async_bot')
+        self.assertIsInstance(self.bot.request, telegram.utils.asyncrequest.AsyncRequest)
+
+    def test_concurrent_send_message(self):
+        messages = self.run_coroutine(asyncio.gather(
+            *(self.bot.send_message(1, str(i)) for i in range(20))))
+
+        self.assertEqual([m.text for m in messages], [str(i) for i in range(20)])
+        self.assertTrue(all(isinstance(m, telegram.Message) for m in messages))
+
+    def test_send_document(self):
+        message = self.run_coroutine(self.bot.send_document(1, BytesIO(b'document-content')))
+
+        self.assertEqual(message.document.file_id, 'id-1')
+        self.assertEqual(self.bot.request.bytes_uploaded > len(b'document-content'), True)
+
+    def test_send_document_cached(self):
+        from telegram.asyncbot import AsyncBot
+        from telegram.utils.uploadcache import UploadCache
+
+        cache = UploadCache()
+        self.bot = AsyncBot('123:abc', base_url=self.url, upload_cache=cache)
+        contents = (b'document-content one', b'document-content two')
+        for _ in range(2):
+            for content in contents:
+                self.run_coroutine(self.bot.send_document(1, BytesIO(content)))
+
+        # Each file was uploaded once, under the key of its own content
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+        self.assertEqual(sorted(cache.store._data),
+                         sorted('document:' + UploadCache.key(BytesIO(content))
+                                for content in contents))
+
+    def test_error(self):
+        with self.assertRaisesRegexp(telegram.error.BadRequest, 'Chat not found'):
+            self.run_coroutine(self.bot.leave_chat(1))
+
+    def test_camel_case(self):
+        user = self.run_coroutine(self.bot.getMe())
+        self.assertEqual(user.id, 123)
+
+
+if __name__ == '__main__':
+    unittest.main()
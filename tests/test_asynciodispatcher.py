@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+#
+# A library that provides a Python interface to the Telegram Bot API
+# Copyright (C) 2015-2017
+# Leandro Toledo de Souza <devs@python-telegram-bot.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see [http://www.gnu.org/licenses/].
+"""This module contains an object that represents Tests for AsyncioDispatcher"""
+
+import sys
+import unittest
+from queue import Queue
+from time import sleep, time
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+sys.path.append('.')
+
+from telegram import Update, Message, User, Chat, TelegramError
+from telegram.ext import (Updater, ConversationHandler, CommandHandler, StringCommandHandler,
+                          MessageHandler, Filters, DispatcherHandlerStop)
+from telegram.utils import webhookreply
+from tests.base import BaseTest
+from tests.test_updater import MockBot
+
+
+@unittest.skipIf(sys.version_info < (3, 5), 'requires Python 3.5+')
+class AsyncioDispatcherTest(BaseTest, unittest.TestCase):
+    """This object represents Tests for AsyncioDispatcher."""
+
+    # Handler callbacks return awaitables instead of being coroutine functions, so that this
+    # module can still be collected by Python 2.
+
+    def setUp(self):
+        from telegram.ext.asynciodispatcher import AsyncioDispatcher
+
+        self.bot = MockBot('', messages=0)
+        self.dispatcher = AsyncioDispatcher(self.bot, Queue(), concurrency=50)
+        self.updater = Updater(dispatcher=self.dispatcher)
+        self.queue = self.updater.start_polling(0.01)
+        self.received = []
+        self.wait_for(lambda: self.dispatcher.running)
+
+    def tearDown(self):
+        self.updater.stop()
+        self.dispatcher._reset_singleton()
+
+    def update(self, text, user_id=0):
+        user = User(user_id, 'Testuser')
+        message = Message(0, user, None, Chat(user_id, Chat.PRIVATE), text=text, bot=self.bot)
+        return Update(update_id=0, message=message)
+
+    def wait_for(self, condition, timeout=2):
+        end = time() + timeout
+        while not condition() and time() < end:
+            sleep(0.01)
+
+    def test_updater_uses_dispatcher(self):
+        self.assertIs(self.updater.bot, self.bot)
+        self.assertIs(self.updater.update_queue, self.dispatcher.update_queue)
+        self.assertIs(self.updater.job_queue, self.dispatcher.job_queue)
+        self.assertRaises(ValueError, Updater, token='123:abcd', dispatcher=self.dispatcher)
+
+    def test_concurrent_coroutines(self):
+        def callback(bot, update):
+            task = asyncio.ensure_future(asyncio.sleep(0.3))
+            task.add_done_callback(lambda task: self.received.append(update))
+            return task
+
+        self.dispatcher.add_handler(StringCommandHandler('test', callback))
+        start = time()
+        for i in range(20):
+            self.queue.put('/test {0}'.format(i))
+
+        self.wait_for(lambda: len(self.received) == 20)
+        self.assertEqual(len(self.received), 20)
+        # 20 callbacks waiting 0.3s each were awaited concurrently
+        self.assertLess(time() - start, 1.5)
+
+    def test_handler_flow(self):
+        def stop(bot, update):
+            future = asyncio.Future()
+            future.set_exception(DispatcherHandlerStop())
+            return future
+
+        self.dispatcher.add_handler(StringCommandHandler('test', stop))
+        self.dispatcher.add_handler(
+            StringCommandHandler('test', lambda bot, update: self.received.append(update)), 1)
+        self.dispatcher.add_handler(
+            StringCommandHandler('other', lambda bot, update: self.received.append(update)), 1)
+        self.queue.put('/test')
+        self.queue.put('/other')
+
+        self.wait_for(lambda: self.received)
+        sleep(0.1)
+        self.assertEqual(self.received, ['/other'])
+
+    def test_error_handler(self):
+        def error_handler(bot, update, error):
+            return asyncio.ensure_future(asyncio.sleep(0)).add_done_callback(
+                lambda f: self.received.append(error))
+
+        def raise_error(bot, update):
+            raise TelegramError('Unauthorized')
+
+        self.dispatcher.add_error_handler(error_handler)
+        self.dispatcher.add_handler(StringCommandHandler('test', raise_error))
+        self.queue.put('/test')
+
+        self.wait_for(lambda: self.received)
+        self.assertEqual(str(self.received[0]), 'Unauthorized')
+
+    def test_conversation(self):
+        waiting = []
+        handler = ConversationHandler(
+            entry_points=[CommandHandler('start', lambda b, u: asyncio.sleep(0.2, result=1))],
+            states={1: [CommandHandler('end', lambda b, u: asyncio.sleep(0, result=-1))]},
+            fallbacks=[],
+            timed_out_behavior=[CommandHandler('end', lambda b, u: waiting.append(u))])
+        self.dispatcher.add_handler(handler)
+
+        self.queue.put(self.update('/start'))
+        sleep(0.1)
+        # The coroutine for /start is still running
+        self.queue.put(self.update('/end'))
+        self.wait_for(lambda: waiting)
+        self.assertEqual(len(waiting), 1)
+
+        self.wait_for(lambda: handler.conversations.get((0, 0)) == 1)
+        self.assertEqual(handler.conversations, {(0, 0): 1})
+
+        self.queue.put(self.update('/end'))
+        self.wait_for(lambda: not handler.conversations)
+        self.assertEqual(handler.conversations, {})
+
+    def test_webhook_reply(self):
+        def callback(bot, update):
+            # The update processed first finishes last
+            task = asyncio.ensure_future(asyncio.sleep(0.3 if update.message.text == 'a' else 0))
+            task.add_done_callback(lambda task: webhookreply.offer(
+                self.bot.base_url + '/sendMessage',
+                {'text': update.message.text}))
+            return task
+
+        self.dispatcher.add_handler(MessageHandler(Filters.text, callback))
+        replies = []
+        for text in ('a', 'b'):
+            update = self.update(text)
+            reply = webhookreply.WebhookReply()
+            reply.register(update, self.bot)
+            replies.append(reply)
+            self.queue.put(update)
+
+        self.assertEqual([reply.wait(2) for reply in replies],
+                         [{'method': 'sendMessage', 'text': 'a'},
+                          {'method': 'sendMessage', 'text': 'b'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
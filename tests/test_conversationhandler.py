@@ -23,6 +23,8 @@ This module contains an object that represents Tests for ConversationHandler
 import logging
 import sys
 import unittest
+from queue import Queue
+from threading import Event
 from time import sleep
 
 try:
@@ -36,8 +38,8 @@ except ImportError:
 sys.path.append('.')
 
 from telegram import Update, Message, TelegramError, User, Chat, Bot, CallbackQuery
-from telegram.ext import (Updater, ConversationHandler, CommandHandler, CallbackQueryHandler,
-                          InlineQueryHandler)
+from telegram.ext import (Updater, Dispatcher, ConversationHandler, CommandHandler,
+                          CallbackQueryHandler, InlineQueryHandler, MessageHandler, Filters)
 from tests.base import BaseTest
 from tests.test_updater import MockBot
 
@@ -309,18 +311,211 @@ class ConversationHandlerTest(BaseTest, unittest.TestCase):
         queue = self.updater.start_polling(0.01)
 
         # User starts the state machine with an async function that immediately ends the
-        # conversation. Async results are resolved when the users state is queried next time.
+        # conversation. Async results are resolved as soon as the function finished.
         message = Message(0, user, None, self.group, text="/start", bot=self.bot)
         queue.put(Update(update_id=0, message=message))
         sleep(.1)
-        # Assert that the Promise has been accepted as the new state
-        self.assertEquals(len(handler.conversations), 1)
+        # Assert that the Promise has been resolved and the conversation ended.
+        self.assertEquals(len(handler.conversations), 0)
+
+    def test_parkWhileAsync(self):
+        self._setup_updater('', messages=0)
+        d = self.updater.dispatcher
+        user = User(first_name="Misses Test", id=123)
+        second_user = User(first_name="Mister Test", id=124)
+        release = Event()
+        handled = []
+
+        def slow_brew(bot, update):
+            release.wait(5)
+            return self.brew(bot, update)
+
+        def pour(bot, update):
+            handled.append(update.message.text)
+            return self.drink(bot, update)
 
-        message = Message(0, user, None, self.group, text="resolve promise pls", bot=self.bot)
+        self.states[self.THIRSTY] = [
+            CommandHandler('brew', lambda bot, update: d.run_async(slow_brew, bot, update))
+        ]
+        self.states[self.BREWING] = [CommandHandler('pourCoffee', pour)]
+        handler = ConversationHandler(
+            entry_points=self.entry_points, states=self.states, fallbacks=self.fallbacks)
+        d.add_handler(handler)
+        queue = self.updater.start_polling(0.01)
+
+        for text in ('/start', '/brew', '/pourCoffee'):
+            message = Message(0, user, None, self.group, text=text, bot=self.bot)
+            queue.put(Update(update_id=0, message=message))
+        sleep(.1)
+        # The dispatcher isn't blocked by the pending brew, other users still get through
+        message = Message(0, second_user, None, self.group, text="/start", bot=self.bot)
         queue.put(Update(update_id=0, message=message))
         sleep(.1)
-        # Assert that the Promise has been resolved and the conversation ended.
-        self.assertEquals(len(handler.conversations), 0)
+        self.assertEqual(self.current_state[second_user.id], self.THIRSTY)
+        self.assertEqual(self.current_state[user.id], self.THIRSTY)
+        self.assertEqual(handled, [])
+
+        # The parked update is handled once the brew is done
+        release.set()
+        sleep(.1)
+        self.assertEqual(handled, ['/pourCoffee'])
+        self.assertEqual(self.current_state[user.id], self.DRINKING)
+        self.assertEqual(handler.conversations[(self.group.id, user.id)], self.DRINKING)
+
+    def test_parkedErrorsAndOtherUpdates(self):
+        self._setup_updater('', messages=0)
+        d = self.updater.dispatcher
+        user = User(first_name="Misses Test", id=123)
+        release = Event()
+        errors = []
+        others = []
+
+        def slow_brew(bot, update):
+            release.wait(5)
+            return self.brew(bot, update)
+
+        def pour(bot, update):
+            raise TelegramError('spilled')
+
+        self.states[self.THIRSTY] = [
+            CommandHandler('brew', lambda bot, update: d.run_async(slow_brew, bot, update))
+        ]
+        self.states[self.BREWING] = [CommandHandler('pourCoffee', pour)]
+        d.add_handler(ConversationHandler(
+            entry_points=self.entry_points, states=self.states, fallbacks=self.fallbacks))
+        d.add_handler(MessageHandler(Filters.text, lambda bot, update: others.append(
+            update.message.text)), group=1)
+        d.add_error_handler(lambda bot, update, error: errors.append(
+            (update.message.text, str(error))))
+        queue = self.updater.start_polling(0.01)
+
+        for text in ('/start', '/brew', '/pourCoffee', 'hello'):
+            message = Message(0, user, None, self.group, text=text, bot=self.bot)
+            queue.put(Update(update_id=0, message=message))
+        sleep(.1)
+        # No handler of the conversation takes plain text, so it isn't parked
+        self.assertEqual(others, ['hello'])
+
+        # The error of the parked update goes to the error handlers
+        release.set()
+        sleep(.1)
+        self.assertEqual(errors, [('/pourCoffee', 'spilled')])
+
+    def test_conversationTimeout(self):
+        self._setup_updater('', messages=0)
+        d = self.updater.dispatcher
+        user = User(first_name="Misses Test", id=123)
+        timed_out = []
+
+        self.states[ConversationHandler.TIMEOUT] = [
+            CommandHandler('brew', lambda bot, update: timed_out.append(update.message.text))
+        ]
+        handler = ConversationHandler(
+            entry_points=self.entry_points, states=self.states, fallbacks=self.fallbacks,
+            conversation_timeout=0.3)
+        d.add_handler(handler)
+        queue = self.updater.start_polling(0.01)
+
+        # Activity postpones the timeout
+        for text in ('/start', '/brew'):
+            message = Message(0, user, None, self.group, text=text, bot=self.bot)
+            queue.put(Update(update_id=0, message=message))
+            sleep(.2)
+        self.assertEqual(handler.conversations[(self.group.id, user.id)], self.BREWING)
+        self.assertEqual(len(handler.timeout_jobs), 1)
+
+        sleep(.3)
+        self.assertEqual(handler.conversations, {})
+        self.assertEqual(handler.timeout_jobs, {})
+        self.assertEqual(timed_out, ['/brew'])
+
+        # Ending the conversation cancels the timeout
+        self.states[self.THIRSTY].append(CommandHandler('end', self.start_end))
+        for text in ('/start', '/end'):
+            message = Message(0, user, None, self.group, text=text, bot=self.bot)
+            queue.put(Update(update_id=0, message=message))
+        sleep(.5)
+        self.assertEqual(handler.timeout_jobs, {})
+        self.assertEqual(timed_out, ['/brew'])
+
+    def test_interleavedUpdates(self):
+        handler = ConversationHandler(
+            entry_points=self.entry_points, states=self.states, fallbacks=self.fallbacks)
+        user = User(first_name="Misses Test", id=123)
+        second_user = User(first_name="Mister Test", id=124)
+        first = Update(0, message=Message(0, user, None, self.group, text="/start"))
+        second = Update(0, message=Message(0, second_user, None, self.group, text="/start"))
+
+        # The selected conversation travels with each update
+        self.assertTrue(handler.check_update(first))
+        self.assertTrue(handler.check_update(second))
+        dispatcher = Dispatcher(None, Queue())
+        dispatcher._reset_singleton()
+        handler.handle_update(first, dispatcher)
+        handler.handle_update(second, dispatcher)
+        self.assertEqual(handler.conversations, {(self.group.id, user.id): self.THIRSTY,
+                                                 (self.group.id, second_user.id): self.THIRSTY})
+
+    def test_parallelDispatch(self):
+        self._setup_updater('', messages=0)
+        self.updater.dispatcher.chat_lanes = 4
+        d = self.updater.dispatcher
+        users = [User(first_name="Test", id=i) for i in range(20)]
+
+        handler = ConversationHandler(
+            entry_points=self.entry_points, states=self.states, fallbacks=self.fallbacks,
+            per_chat=False)
+        d.add_handler(handler)
+        queue = self.updater.start_polling(0.01)
+
+        # The updates of a user come from different chats and so are processed in parallel, but
+        # still one at a time per conversation
+        for text in ('/start', '/brew', '/pourCoffee', '/startCoding'):
+            for i, user in enumerate(users):
+                message = Message(0, user, None, Chat(i % 4 + 2, Chat.GROUP), text=text,
+                                  bot=self.bot)
+                queue.put(Update(update_id=0, message=message))
+            sleep(.1)
+        sleep(.2)
+        self.assertEqual(handler.conversations,
+                         dict(((user.id,), self.CODING) for user in users))
+
+    def test_stateIndex(self):
+        self._setup_updater('', messages=0)
+        d = self.updater.dispatcher
+        user = User(first_name="Misses Test", id=123)
+        checked = []
+
+        def counting_filter(message):
+            checked.append(message.text)
+            return True
+
+        self.states[self.THIRSTY] = [CommandHandler('step%d' % i, self.brew) for i in range(20)]
+        self.states[self.THIRSTY].append(MessageHandler(counting_filter, self.code))
+        handler = ConversationHandler(
+            entry_points=self.entry_points, states=self.states, fallbacks=self.fallbacks)
+        d.add_handler(handler)
+        queue = self.updater.start_polling(0.01)
+
+        message = Message(0, user, None, self.group, text="/start", bot=self.bot)
+        queue.put(Update(update_id=0, message=message))
+        message = Message(0, user, None, self.group, text="/step19", bot=self.bot)
+        queue.put(Update(update_id=0, message=message))
+        sleep(.1)
+        self.assertEqual(self.current_state[user.id], self.BREWING)
+        # Only the handlers of the command were asked
+        self.assertEqual(checked, [])
+        self.assertEqual(handler._candidates(self.THIRSTY, self.states[self.THIRSTY],
+                                             ('message', 'step19')),
+                         [self.states[self.THIRSTY][19], self.states[self.THIRSTY][20]])
+
+        # Changing the handlers of a state is noticed
+        self.states[self.BREWING].insert(0, MessageHandler(counting_filter, self.start))
+        message = Message(0, user, None, self.group, text="/pourCoffee", bot=self.bot)
+        queue.put(Update(update_id=0, message=message))
+        sleep(.1)
+        self.assertEqual(self.current_state[user.id], self.THIRSTY)
+        self.assertEqual(checked, ['/pourCoffee'])
 
     def test_perChatMessageWithoutChat(self):
         handler = ConversationHandler(
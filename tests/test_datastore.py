@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+#
+# A library that provides a Python interface to the Telegram Bot API
+# Copyright (C) 2015-2017
+# Leandro Toledo de Souza <devs@python-telegram-bot.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see [http://www.gnu.org/licenses/].
+"""This module contains an object that represents Tests for DataStore"""
+import os
+import sys
+import tempfile
+import unittest
+from queue import Queue
+from time import sleep
+
+sys.path.append('.')
+
+from telegram.ext import DataStore, SQLiteBackend, Dispatcher
+from tests.base import BaseTest
+
+
+class Counted(object):
+    """Counts how often it was unpickled."""
+    loads = 0
+
+    def __init__(self):
+        self.value = 1
+
+    def __setstate__(self, state):
+        Counted.loads += 1
+        self.__dict__.update(state)
+
+
+class DataStoreTest(BaseTest, unittest.TestCase):
+    """This object represents Tests for DataStore."""
+
+    def setUp(self):
+        fd, self.filename = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_default_dict(self):
+        store = DataStore()
+        store[1]['a'] = 1
+        self.assertEqual(store[1], {'a': 1})
+        self.assertNotIn(2, store)
+        self.assertIsNone(store.get(2))
+        self.assertEqual(store[2], {})
+        self.assertEqual(sorted(store), [1, 2])
+        del store[2]
+        self.assertEqual(len(store), 1)
+        with self.assertRaises(KeyError):
+            del store[2]
+
+    def test_lru(self):
+        store = DataStore(maxsize=2)
+        store[1]['a'] = 1
+        store[2]['b'] = 2
+        store[1]
+        store[3]['c'] = 3
+        self.assertEqual(sorted(store), [1, 3])
+        self.assertEqual(store.evictions, 1)
+        self.assertEqual(store[2], {})
+
+    def test_ttl(self):
+        store = DataStore(ttl=0.2)
+        store[1]['a'] = 1
+        sleep(0.3)
+        store[2]['b'] = 2
+        self.assertEqual(list(store), [2])
+        sleep(0.3)
+        store.expire()
+        self.assertEqual(store.in_memory, 0)
+
+    def test_backend(self):
+        backend = SQLiteBackend(self.filename)
+        try:
+            store = DataStore(maxsize=2, backend=backend)
+            for i in range(5):
+                store[i]['value'] = i
+            self.assertEqual(store.in_memory, 2)
+            self.assertEqual(len(store), 5)
+            self.assertEqual(sorted(store), list(range(5)))
+
+            self.assertEqual(store[0], {'value': 0})
+            self.assertEqual(store.loads, 1)
+            self.assertIn(1, store)
+            del store[1]
+            self.assertNotIn(1, store)
+            self.assertEqual(len(store), 4)
+        finally:
+            backend.close()
+
+        # Evicted entries survive a restart
+        backend = SQLiteBackend(self.filename)
+        try:
+            store = DataStore(backend=backend)
+            self.assertEqual(store[2], {'value': 2})
+        finally:
+            backend.close()
+
+    def test_backend_without_loading(self):
+        backend = SQLiteBackend(self.filename)
+        try:
+            store = DataStore(maxsize=1, backend=backend)
+            store[1] = Counted()
+            store[2] = {}
+            loads = Counted.loads
+            # The evicted entry is only counted, looked up and deleted, so it isn't unpickled
+            self.assertEqual(len(store), 2)
+            self.assertIn(1, store)
+            del store[1]
+            self.assertNotIn(1, store)
+            self.assertEqual(len(store), 1)
+            self.assertEqual(Counted.loads, loads)
+        finally:
+            backend.close()
+
+    def test_dispatcher(self):
+        store = DataStore(maxsize=10)
+        dispatcher = Dispatcher(None, Queue(), user_data=store)
+        try:
+            self.assertIs(dispatcher.user_data, store)
+            self.assertEqual(dispatcher.chat_data[1], {})
+        finally:
+            dispatcher._reset_singleton()
+
+
+if __name__ == '__main__':
+    unittest.main()
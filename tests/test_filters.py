@@ -20,7 +20,9 @@
 This module contains an object that represents Tests for Filters for use with MessageHandler.
 """
 
+import os
 import sys
+import tempfile
 import unittest
 from datetime import datetime
 import functools
@@ -29,6 +31,7 @@ sys.path.append('.')
 
 from telegram import Message, User, Chat, MessageEntity
 from telegram.ext import Filters, BaseFilter
+from telegram.ext.filters import cached_results
 from tests.base import BaseTest
 
 
@@ -374,6 +377,152 @@ class FiltersTest(BaseTest, unittest.TestCase):
         unnamed = Unnamed()
         self.assertEqual(str(unnamed), Unnamed.__name__)
 
+    def test_filters_user_add_remove(self):
+        for compact in (False, True):
+            f = Filters.user(user_id=list(range(2, 1000)), compact=compact)
+            self.assertFalse(f(self.message))
+            f.add(ids=0)
+            self.assertTrue(f(self.message))
+            f.remove(ids=[0, 2])
+            self.assertFalse(f(self.message))
+            self.assertEqual(len(f.user_ids), 997)
+
+            self.message.from_user.username = 'user'
+            f.add(usernames='@user')
+            self.assertTrue(f(self.message))
+            self.assertEqual(list(f.usernames), ['user'])
+
+    def test_filters_user_attributes(self):
+        for compact in (False, True):
+            f = Filters.user(user_id=1, compact=compact)
+            self.assertEqual(f.user_ids, [1])
+            self.assertEqual(f.usernames, [])
+            f.user_ids = [0, 2]
+            self.assertTrue(f(self.message))
+            self.assertEqual(sorted(f.user_ids), [0, 2])
+            f.usernames = '@user'
+            self.assertEqual(f.usernames, ['user'])
+
+            # Changing the lists in place changes who is let through
+            f.user_ids.remove(0)
+            self.assertFalse(f(self.message))
+            f.user_ids.append(0)
+            self.assertTrue(f(self.message))
+            self.assertIn(0, f.user_ids)
+            del f.user_ids[:]
+            self.assertFalse(f(self.message))
+            self.assertEqual(len(f.user_ids), 0)
+            f.user_ids += [0, 3]
+            self.assertTrue(f(self.message))
+            with self.assertRaises(ValueError):
+                f.user_ids.remove(5)
+
+            self.message.from_user.username = 'other'
+            f.usernames.append('@other')
+            self.assertIn('other', f.usernames)
+            f.user_ids.clear()
+            self.assertTrue(f(self.message))
+            f.usernames.remove('other')
+            self.assertFalse(f(self.message))
+            self.message.from_user.username = None
+
+    def test_filters_compact_rebuilt_once(self):
+        f = Filters.user(user_id=list(range(2, 1000)), compact=True)
+        values = f._ids._values
+        for i in range(1000, 1100):
+            f.add(ids=i)
+        f.remove(ids=2)
+        # The sorted array is only rebuilt by the next lookup
+        self.assertIs(f._ids._values, values)
+        self.assertFalse(f(self.message))
+        self.assertIsNot(f._ids._values, values)
+        self.assertIn(1099, f._ids._values)
+        self.assertNotIn(2, f._ids._values)
+
+    def test_filters_chat_add_remove(self):
+        f = Filters.chat(username='chat', compact=True)
+        self.assertFalse(f(self.message))
+        f.add(ids=[0, -100123456789012])
+        self.assertTrue(f(self.message))
+        self.assertIn(-100123456789012, f.chat_ids)
+        f.remove(ids=0)
+        self.assertFalse(f(self.message))
+
+    def test_filters_user_file(self):
+        fd, filename = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, 'w') as fobj:
+                fobj.write('# Admins\n1\n\n@user\n')
+            with self.assertRaisesRegexp(ValueError, 'filename'):
+                Filters.user(user_id=1, filename=filename)
+            f = Filters.user(filename=filename)
+            self.assertFalse(f(self.message))
+            self.assertFalse(f.reload())
+
+            self.message.from_user.username = 'user'
+            self.assertTrue(f(self.message))
+            with open(filename, 'w') as fobj:
+                fobj.write('5\n')
+            self.assertTrue(f.reload(force=True))
+            self.assertFalse(f(self.message))
+            self.assertEqual(set(f.user_ids), {5})
+        finally:
+            os.remove(filename)
+
+    def test_filters_by_cost(self):
+        calls = []
+
+        class Counting(BaseFilter):
+
+            def __init__(self, name, cost, result=True):
+                self.name = name
+                self.cost = cost
+                self.result = result
+
+            def filter(self, message):
+                calls.append(self.name)
+                return self.result
+
+        slow = Counting('slow', 10, result=False)
+        fast = Counting('fast', 1, result=False)
+        other = Counting('other', 1)
+        f = (slow & fast) & other
+        self.assertEqual(f.cost, 12)
+        self.assertFalse(f(self.message))
+        self.assertEqual(calls, ['fast'])
+
+        del calls[:]
+        f = slow | ~fast | other
+        self.assertTrue(f(self.message))
+        self.assertEqual(calls, ['fast'])
+
+        # Chains of the other operator are kept together
+        del calls[:]
+        f = slow & (other | fast)
+        self.assertFalse(f(self.message))
+        self.assertEqual(calls, ['other', 'slow'])
+
+    def test_cached_results(self):
+        calls = []
+
+        class Counting(BaseFilter):
+
+            def filter(self, message):
+                calls.append(message)
+                return True
+
+        counting = Counting()
+        other = Message(1, User(0, "Testuser"), datetime.now(), Chat(0, 'private'))
+        with cached_results():
+            self.assertTrue(counting(self.message))
+            self.assertTrue((counting & Filters.all)(self.message))
+            self.assertFalse((~counting)(self.message))
+            self.assertEqual(len(calls), 1)
+            self.assertTrue(counting(other))
+            self.assertEqual(calls, [self.message, other])
+        self.assertTrue(counting(other))
+        self.assertEqual(len(calls), 3)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+#
+# A library that provides a Python interface to the Telegram Bot API
+# Copyright (C) 2015-2017
+# Leandro Toledo de Souza <devs@python-telegram-bot.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see [http://www.gnu.org/licenses/].
+"""This module contains an object that represents Tests for Telegram InputFile"""
+
+import io
+import sys
+import unittest
+
+sys.path.append('.')
+
+from telegram import InputFile
+from tests.base import BaseTest
+
+
+class _Unseekable(object):
+    """A file-like object that can only be read, like a socket or a pipe."""
+
+    def __init__(self, content):
+        self._content = io.BytesIO(content)
+
+    def read(self, size=-1):
+        return self._content.read(size)
+
+
+class InputFileTest(BaseTest, unittest.TestCase):
+    """This object represents Tests for Telegram InputFile."""
+
+    def setUp(self):
+        with open('tests/data/telegram.png', 'rb') as f:
+            self.content = f.read()
+
+    def _read_all(self, stream, chunk_size):
+        chunks = []
+        chunk = stream.read(chunk_size)
+        while chunk:
+            chunks.append(chunk)
+            chunk = stream.read(chunk_size)
+        return b''.join(chunks)
+
+    def test_stream_matches_form(self):
+        with open('tests/data/telegram.png', 'rb') as f:
+            inputfile = InputFile({'chat_id': 12, 'caption': 'test', 'photo': f})
+            stream = inputfile.to_stream()
+
+            self.assertEqual(inputfile.mimetype, 'image/png')
+            self.assertEqual(inputfile.filename, 'telegram.png')
+            body = self._read_all(stream, 1000)
+            self.assertEqual(body, inputfile.to_form())
+            self.assertEqual(len(body), len(stream))
+            self.assertEqual(stream.tell(), len(stream))
+
+    def test_stream_rewind(self):
+        with open('tests/data/telegram.png', 'rb') as f:
+            stream = InputFile({'chat_id': 12, 'document': f}).to_stream()
+
+            first = stream.read()
+            stream.seek(0)
+            self.assertEqual(self._read_all(stream, 7), first)
+            self.assertRaises(IOError, stream.seek, 10)
+
+    def test_stream_starts_at_current_position(self):
+        f = io.BytesIO(b'skip' + self.content)
+        f.seek(4)
+        inputfile = InputFile({'chat_id': 12, 'document': f})
+
+        self.assertEqual(inputfile.input_file_content, self.content)
+        self.assertEqual(self._read_all(inputfile.to_stream(), 512), inputfile.to_form())
+
+    def test_unseekable_file(self):
+        inputfile = InputFile({'chat_id': 12, 'document': _Unseekable(self.content)})
+        stream = inputfile.to_stream()
+
+        self.assertEqual(inputfile.mimetype, 'image/png')
+        self.assertEqual(inputfile.input_file_content, self.content)
+        self.assertEqual(stream.read(), inputfile.to_form())
+
+
+if __name__ == '__main__':
+    unittest.main()
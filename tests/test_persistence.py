@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+#
+# A library that provides a Python interface to the Telegram Bot API
+# Copyright (C) 2015-2017
+# Leandro Toledo de Souza <devs@python-telegram-bot.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see [http://www.gnu.org/licenses/].
+"""This module contains an object that represents Tests for the persistence classes"""
+import os
+import sys
+import tempfile
+import unittest
+from queue import Queue
+from time import sleep
+
+sys.path.append('.')
+
+from telegram import Update, Message, User, Chat
+from telegram.ext import (Dispatcher, Updater, CommandHandler, ConversationHandler,
+                          PicklePersistence, SQLitePersistence)
+from tests.base import BaseTest
+from tests.test_updater import MockBot
+
+
+class PersistenceTest(BaseTest, unittest.TestCase):
+    """This object represents Tests for the persistence classes."""
+
+    def setUp(self):
+        fd, self.filename = tempfile.mkstemp()
+        os.close(fd)
+        os.remove(self.filename)
+        self.user = User(first_name='Misses Test', id=123)
+        self.chat = Chat(456, Chat.GROUP)
+
+    def tearDown(self):
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+    def _dispatcher(self, persistence):
+        dispatcher = Dispatcher(None, Queue(), persistence=persistence)
+        dispatcher._reset_singleton()
+        return dispatcher
+
+    def _update(self, text):
+        return Update(0, message=Message(0, self.user, None, self.chat, text=text))
+
+    def _conversation(self):
+        def start(bot, update, user_data, chat_data):
+            user_data['started'] = True
+            chat_data['users'] = chat_data.get('users', 0) + 1
+            return 1
+
+        def stop(bot, update):
+            return ConversationHandler.END
+
+        return ConversationHandler(
+            entry_points=[
+                CommandHandler('start', start, pass_user_data=True, pass_chat_data=True)
+            ],
+            states={1: [CommandHandler('stop', stop)]},
+            fallbacks=[],
+            name='conversation',
+            persistent=True)
+
+    def _test_restart(self, persistence_class):
+        persistence = persistence_class(self.filename)
+        dispatcher = self._dispatcher(persistence)
+        dispatcher.add_handler(self._conversation())
+        dispatcher.process_update(self._update('/start'))
+        # Nothing is written before the flush
+        self.assertEqual(persistence_class(self.filename).get_user_data(), {})
+        dispatcher.flush_persistence()
+
+        persistence = persistence_class(self.filename)
+        dispatcher = self._dispatcher(persistence)
+        handler = self._conversation()
+        dispatcher.add_handler(handler)
+        self.assertEqual(dispatcher.user_data[self.user.id], {'started': True})
+        self.assertEqual(dispatcher.chat_data[self.chat.id], {'users': 1})
+        self.assertEqual(handler.conversations, {(self.chat.id, self.user.id): 1})
+
+        dispatcher.process_update(self._update('/stop'))
+        del dispatcher.user_data[self.user.id]
+        dispatcher.flush_persistence()
+        persistence = persistence_class(self.filename)
+        self.assertEqual(persistence.get_user_data(), {})
+        self.assertEqual(persistence.get_chat_data(), {self.chat.id: {'users': 1}})
+        self.assertEqual(persistence.get_conversations('conversation'), {})
+
+    def test_pickle_persistence(self):
+        self._test_restart(PicklePersistence)
+
+    def test_sqlite_persistence(self):
+        self._test_restart(SQLitePersistence)
+
+    def test_not_persistent(self):
+        with self.assertRaises(ValueError):
+            ConversationHandler([], {}, [], persistent=True)
+        dispatcher = self._dispatcher(None)
+        with self.assertRaises(ValueError):
+            dispatcher.add_handler(self._conversation())
+
+    def test_flush_on_stop(self):
+        persistence = PicklePersistence(self.filename, flush_interval=0.1)
+        updater = Updater(workers=2, bot=MockBot('', messages=0), persistence=persistence)
+        try:
+            updater.dispatcher.add_handler(self._conversation())
+            queue = updater.start_polling(0.01)
+            queue.put(self._update('/start'))
+            sleep(.5)
+            # Written by the background thread
+            self.assertEqual(PicklePersistence(self.filename).get_user_data(),
+                             {self.user.id: {'started': True}})
+
+            persistence.flush_interval = 60
+            sleep(.2)
+            queue.put(self._update('/stop'))
+            sleep(.2)
+        finally:
+            updater.stop()
+            updater.dispatcher._reset_singleton()
+        self.assertEqual(PicklePersistence(self.filename).get_conversations('conversation'), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+#
+# A library that provides a Python interface to the Telegram Bot API
+# Copyright (C) 2015-2017
+# Leandro Toledo de Souza <devs@python-telegram-bot.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see [http://www.gnu.org/licenses/].
+"""This module contains an object that represents Tests for ProcessDispatcher"""
+
+import multiprocessing
+import os
+import sys
+import unittest
+from functools import partial
+from queue import Queue, Empty
+from time import sleep
+
+sys.path.append('.')
+
+from telegram import Update, Message, User, Chat
+from telegram.error import BadRequest
+from telegram.ext import Updater, MessageHandler, Filters, ProcessDispatcher
+from tests.base import BaseTest
+from tests.test_updater import MockBot
+
+
+def setup(results, dispatcher):
+
+    def handler(bot, update):
+        if update.message.text == 'fail':
+            raise BadRequest('Chat not found')
+        elif update.message.text == 'pools':
+            results.put((update.effective_chat.id, len(bot.request._con_pool.pools), os.getpid()))
+            return
+        results.put((update.effective_chat.id, update.message.text, os.getpid()))
+
+    dispatcher.add_handler(MessageHandler(Filters.text, handler))
+
+
+@unittest.skipIf(sys.platform == 'win32', 'test relies on the fork start method')
+class ProcessDispatcherTest(BaseTest, unittest.TestCase):
+    """This object represents Tests for ProcessDispatcher."""
+
+    def setUp(self):
+        self.bot = MockBot('', messages=0)
+        self.results = multiprocessing.Queue()
+        self.dispatcher = ProcessDispatcher(self.bot, Queue(), partial(setup, self.results),
+                                            processes=2)
+        self.updater = Updater(dispatcher=self.dispatcher)
+        self.queue = self.updater.start_polling(0.01)
+        self.errors = []
+        self.dispatcher.add_error_handler(lambda bot, update, error: self.errors.append(
+            (update, error)))
+        for _ in range(50):
+            if self.dispatcher.running and self.dispatcher._processes:
+                break
+            sleep(0.1)
+
+    def tearDown(self):
+        self.updater.stop()
+        self.dispatcher._reset_singleton()
+
+    def update(self, chat_id, text):
+        message = Message(0, User(chat_id, 'Testuser'), None, Chat(chat_id, Chat.GROUP),
+                          text=text, bot=self.bot)
+        return Update(0, message=message)
+
+    def get_results(self, count):
+        results = []
+        try:
+            for _ in range(count):
+                results.append(self.results.get(timeout=5))
+        except Empty:
+            pass
+        return results
+
+    def test_sharding(self):
+        for i in range(5):
+            for chat_id in (1, 2, 3, 4):
+                self.queue.put(self.update(chat_id, str(i)))
+
+        results = self.get_results(20)
+
+        self.assertEqual(len(results), 20)
+        for chat_id in (1, 2, 3, 4):
+            updates = [r for r in results if r[0] == chat_id]
+            self.assertEqual([r[1] for r in updates], [str(i) for i in range(5)])
+            self.assertEqual(len(set(r[2] for r in updates)), 1)
+        pids = set(r[2] for r in results)
+        self.assertEqual(len(pids), 2)
+        self.assertNotIn(os.getpid(), pids)
+
+    def test_error_reported(self):
+        self.queue.put(self.update(1, 'fail'))
+        for _ in range(50):
+            if self.errors:
+                break
+            sleep(0.1)
+
+        update, error = self.errors[0]
+        self.assertIsInstance(update, Update)
+        self.assertEqual(update.message.text, 'fail')
+        self.assertIsInstance(error, BadRequest)
+        self.assertEqual(error.message, 'Chat not found')
+
+    def test_stop(self):
+        self.queue.put(self.update(1, 'last'))
+        processes = list(self.dispatcher._processes)
+        self.updater.stop()
+
+        self.assertEqual(self.get_results(1)[0][1], 'last')
+        self.assertFalse(any(process.is_alive() for process in processes))
+
+    def test_restart(self):
+        self.dispatcher._processes[0].terminate()
+        self.dispatcher._processes[0].join()
+        sleep(1.5)
+
+        for chat_id in (1, 2):
+            self.queue.put(self.update(chat_id, 'after restart'))
+        self.assertEqual(len(self.get_results(2)), 2)
+
+    def test_own_connections(self):
+        # A connection pool of the bot in this process, to a host the workers never used
+        self.bot.request._con_pool.connection_from_host('api.telegram.org', 443, 'https')
+        self.dispatcher._processes[0].terminate()
+        self.dispatcher._processes[0].join()
+        sleep(1.5)
+
+        # The restarted worker was forked with it, but dropped it
+        for chat_id in (1, 2, 3, 4):
+            self.queue.put(self.update(chat_id, 'pools'))
+        results = self.get_results(4)
+        self.assertEqual(len(results), 4)
+        self.assertEqual([r[1] for r in results], [0] * 4)
+        self.assertEqual(len(set(r[2] for r in results)), 2)
+
+    def test_restart_under_load(self):
+        process = self.dispatcher._processes[0]
+        process.terminate()
+        process.join()
+
+        # The update queue is never empty for long, but the process is restarted anyway
+        count = 0
+        for i in range(30):
+            for chat_id in (1, 2):
+                self.queue.put(self.update(chat_id, str(i)))
+                count += 1
+            sleep(0.1)
+        self.assertEqual(len(self.get_results(count)), count)
+        self.assertTrue(all(p.is_alive() for p in self.dispatcher._processes))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+#
+# A library that provides a Python interface to the Telegram Bot API
+# Copyright (C) 2015-2017
+# Leandro Toledo de Souza <devs@python-telegram-bot.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see [http://www.gnu.org/licenses/].
+"""This module contains an object that represents Tests for Request"""
+
+import os
+import sys
+import tempfile
+import unittest
+from io import BytesIO
+from threading import Thread
+
+try:
+    import BaseHTTPServer
+    from SocketServer import ThreadingMixIn
+except ImportError:
+    import http.server as BaseHTTPServer
+    from socketserver import ThreadingMixIn
+
+sys.path.append('.')
+
+from telegram.error import BadRequest, NetworkError
+from telegram.utils.request import Request
+from tests.base import BaseTest
+
+CONTENT = os.urandom(300 * 1024)
+
+
+class FileServer(ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    ranges = []
+    broken = False
+
+
+class FileHandler(BaseHTTPServer.BaseHTTPRequestHandler, object):
+
+    def do_GET(self):
+        byte_range = self.headers.get('Range')
+        if self.path == '/missing':
+            body = b'{"ok": false, "description": "Bad Request: file not found"}'
+            self.send_response(400)
+        elif byte_range and self.path != '/norange':
+            start, end = [int(i) for i in byte_range.split('=')[1].split('-')]
+            self.server.ranges.append((start, end))
+            body = CONTENT[start:end + 1]
+            self.send_response(206)
+            self.send_header('Content-Range',
+                             'bytes {0}-{1}/{2}'.format(start, end, len(CONTENT)))
+            if self.path == '/empty':
+                # A 206 without the bytes, which urllib3 doesn't complain about
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if start < len(CONTENT) // 4 and self.server.broken:
+                # Announce the rest of the first segment but drop the connection halfway
+                # through.
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body[:len(body) // 2])
+                return
+        else:
+            body = CONTENT
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RequestTest(BaseTest, unittest.TestCase):
+    """This object represents Tests for Request."""
+
+    @classmethod
+    def setUpClass(cls):
+        super(RequestTest, cls).setUpClass()
+        cls.httpd = FileServer(('127.0.0.1', 0), FileHandler)
+        cls.url = 'http://127.0.0.1:{0}'.format(cls.httpd.server_address[1])
+        Thread(target=cls.httpd.serve_forever).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.httpd.shutdown()
+        cls.httpd.server_close()
+
+    def setUp(self):
+        self.request = Request(con_pool_size=4)
+        fd, self.filename = tempfile.mkstemp()
+        os.close(fd)
+        FileServer.ranges = []
+        FileServer.broken = False
+
+    def tearDown(self):
+        self.request.stop()
+        for filename in (self.filename, self.filename + '.resume'):
+            if os.path.exists(filename):
+                os.remove(filename)
+
+    def _read(self):
+        with open(self.filename, 'rb') as f:
+            return f.read()
+
+    def test_download_to(self):
+        calls = []
+        out = BytesIO()
+
+        received = self.request.download_to(
+            self.url + '/file', out, chunk_size=64 * 1024,
+            progress=lambda done, total: calls.append((done, total)))
+
+        self.assertEqual(received, len(CONTENT))
+        self.assertEqual(out.getvalue(), CONTENT)
+        self.assertEqual(calls[-1], (len(CONTENT), len(CONTENT)))
+        self.assertTrue(len(calls) >= len(CONTENT) // (64 * 1024))
+        self.assertEqual(self.request.bytes_downloaded, len(CONTENT))
+
+    def test_download(self):
+        self.assertEqual(self.request.download(self.url + '/file', self.filename), len(CONTENT))
+        self.assertEqual(self._read(), CONTENT)
+
+    def test_download_error(self):
+        with self.assertRaises(BadRequest):
+            self.request.download_to(self.url + '/missing', BytesIO())
+        self.assertEqual(self.request.bytes_downloaded, 0)
+
+    def test_download_ranged(self):
+        for use_mmap in (False, True):
+            calls = []
+            FileServer.ranges = []
+            received = self.request.download_ranged(
+                self.url + '/file', self.filename, len(CONTENT), connections=4,
+                use_mmap=use_mmap, progress=lambda done, total: calls.append((done, total)))
+
+            self.assertEqual(received, len(CONTENT))
+            self.assertEqual(self._read(), CONTENT)
+            self.assertEqual(sorted(FileServer.ranges),
+                             [(0, 76799), (76800, 153599), (153600, 230399),
+                              (230400, 307199)])
+            self.assertEqual(calls[-1], (len(CONTENT), len(CONTENT)))
+            self.assertFalse(os.path.exists(self.filename + '.resume'))
+
+    def test_download_ranged_resume(self):
+        FileServer.broken = True
+        with self.assertRaises(NetworkError):
+            self.request.download_ranged(self.url + '/file', self.filename, len(CONTENT),
+                                         connections=4, max_retries=1)
+        self.assertTrue(os.path.exists(self.filename + '.resume'))
+        self.assertTrue(self.request.bytes_downloaded >= len(CONTENT) * 3 // 4)
+
+        FileServer.broken = False
+        FileServer.ranges = []
+        self.request.download_ranged(self.url + '/file', self.filename, len(CONTENT),
+                                     connections=4)
+
+        # Only what is missing from the first segment is requested again.
+        self.assertEqual([end for start, end in FileServer.ranges], [76799])
+        self.assertEqual(self._read(), CONTENT)
+        self.assertEqual(self.request.bytes_downloaded, len(CONTENT))
+        self.assertFalse(os.path.exists(self.filename + '.resume'))
+
+    def test_download_ranged_empty_response(self):
+        with self.assertRaises(NetworkError):
+            self.request.download_ranged(self.url + '/empty', self.filename, len(CONTENT),
+                                         connections=4, max_retries=2)
+        # Every segment was requested once and retried twice, not over and over
+        self.assertEqual(len(FileServer.ranges), 12)
+
+    def test_download_ranged_zero_size(self):
+        with open(self.filename, 'wb') as fobj:
+            fobj.write(b'old')
+        FileServer.ranges = []
+        received = self.request.download_ranged(self.url + '/file', self.filename, 0,
+                                                connections=4)
+        self.assertEqual(received, 0)
+        self.assertEqual(self._read(), b'')
+        self.assertEqual(FileServer.ranges, [])
+
+    def test_download_ranged_unsupported(self):
+        received = self.request.download_ranged(self.url + '/norange', self.filename,
+                                                len(CONTENT), connections=4)
+        self.assertEqual(received, len(CONTENT))
+        self.assertEqual(self._read(), CONTENT)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -23,12 +23,14 @@ WebhookServer and WebhookHandler
 """
 import logging
 import signal
+import socket
 import sys
 import os
 import re
+import json
 import unittest
 from datetime import datetime
-from time import sleep
+from time import sleep, time
 from queue import Queue
 from random import randrange
 
@@ -37,20 +39,25 @@ from future.builtins import bytes
 try:
     # python2
     from urllib2 import urlopen, Request, HTTPError
+    from httplib import HTTPConnection
 except ImportError:
     # python3
     from urllib.request import Request, urlopen
     from urllib.error import HTTPError
+    from http.client import HTTPConnection
 
 sys.path.append('.')
 
 from telegram import (Update, Message, TelegramError, User, Chat, Bot,
                       InlineQuery, CallbackQuery)
 from telegram.ext import *
-from telegram.ext.dispatcher import run_async
+from telegram.ext.dispatcher import run_async, _UNCOMBINABLE
 from telegram.error import Unauthorized, InvalidToken
 from tests.base import BaseTest
 from threading import Lock, Thread, current_thread
+from telegram.utils.request import Request as BotRequest
+from telegram.utils.webhookhandler import WebhookServer, WebhookHandler
+from telegram.utils.webhookreply import WebhookReply
 
 # Enable logging
 root = logging.getLogger()
@@ -460,6 +467,36 @@ class UpdaterTest(BaseTest, unittest.TestCase):
         sleep(.1)
         self.assertEqual(self.received_message, "Test Error 2")
 
+    def test_pipelinedPolling(self):
+        request = MockRequest(batches=[[1, 2, 3], [4], [5, 6]])
+        self.updater = Updater(workers=2, bot=Bot('123:zyxw', request=request))
+        received = []
+        self.updater.dispatcher.add_handler(
+            MessageHandler(Filters.text, lambda bot, update: received.append(update.message.text)))
+        self.updater.start_polling(0.01, pipelined=True)
+        sleep(.3)
+        self.assertEqual(received, ['1', '2', '3', '4', '5', '6'])
+        # Each request confirms the batch before
+        self.assertEqual(request.offsets[:4], [None, 4, 5, 7])
+        self.assertIsInstance(self.updater.update_queue, Queue)
+
+    def test_pipelinedPollingMockBot(self):
+        self._setup_updater('Test', messages=3)
+        d = self.updater.dispatcher
+        d.add_handler(MessageHandler(Filters.text, self.telegramHandlerTest))
+        self.updater.start_polling(0.01, pipelined=True)
+        sleep(.2)
+        self.assertEqual(self.received_message, 'Test')
+        self.assertEqual(self.message_count, 3)
+
+    def test_pipelinedPollingError(self):
+        self._setup_updater('', raise_error=True)
+        d = self.updater.dispatcher
+        d.add_error_handler(self.errorHandlerTest)
+        self.updater.start_polling(0.01, pipelined=True)
+        sleep(.1)
+        self.assertEqual(self.received_message, "Test Error 2")
+
     def test_addRemoveTypeHandler(self):
         self._setup_updater('', messages=0)
         d = self.updater.dispatcher
@@ -620,6 +657,250 @@ class UpdaterTest(BaseTest, unittest.TestCase):
         del d1
         del d2
 
+    def test_chat_lanes(self):
+        bot = MockBot('', messages=0)
+        d = Dispatcher(bot, Queue(), chat_lanes=4)
+        received = []
+
+        def handler(bot, update):
+            sleep(0.1)
+            with self.lock:
+                received.append((update.effective_chat.id, update.message.text,
+                                 current_thread().name))
+
+        d.add_handler(MessageHandler(Filters.text, handler))
+        thread = Thread(target=d.start, name='dispatcher')
+        thread.start()
+        try:
+            for i in range(5):
+                for chat_id in (-4, 1, 2, 3):
+                    message = Message(0, User(chat_id, 'Testuser'), None,
+                                      Chat(chat_id, Chat.GROUP), text=str(i), bot=bot)
+                    d.update_queue.put(Update(0, message=message))
+            sleep(1)
+        finally:
+            d.stop()
+            thread.join()
+            d._reset_singleton()
+
+        # 20 updates taking 0.1s each were processed by 4 lanes within a second
+        self.assertEqual(len(received), 20)
+        for chat_id in (-4, 1, 2, 3):
+            updates = [u for u in received if u[0] == chat_id]
+            # In order and always in the same lane
+            self.assertEqual([u[1] for u in updates], [str(i) for i in range(5)])
+            self.assertEqual(len(set(u[2] for u in updates)), 1)
+        self.assertEqual(len(set(u[2] for u in received)), 4)
+
+    def test_dedup_window(self):
+        bot = MockBot('', messages=0)
+        d = Dispatcher(bot, Queue(), dedup_window=3)
+        d._reset_singleton()
+        received = []
+        d.add_handler(MessageHandler(Filters.text,
+                                     lambda bot, update: received.append(update.update_id)))
+
+        for update_id in (1, 2, 1, 3, 2, 4, 1, 1):
+            message = Message(update_id, User(1, 'Testuser'), None, Chat(1, Chat.GROUP),
+                              text='test', bot=bot)
+            d.process_update(Update(update_id, message=message))
+
+        # Only the last three ids are remembered, so 1 is processed again after 4
+        self.assertEqual(received, [1, 2, 3, 4, 1])
+        self.assertEqual(d.duplicates, 3)
+
+        # The webhook request of a duplicate is answered at once, without a call
+        update = Update(4, message=Message(4, User(1, 'Testuser'), None, Chat(1, Chat.GROUP),
+                                           text='test', bot=bot))
+        reply = WebhookReply()
+        reply.register(update, bot)
+        d.process_update(update)
+        start = time()
+        self.assertIsNone(reply.wait(5))
+        self.assertLess(time() - start, 1)
+        self.assertEqual(d.duplicates, 4)
+
+        d = Dispatcher(bot, Queue())
+        d._reset_singleton()
+        self.assertEqual(d.duplicates, 0)
+        with self.assertRaises(ValueError):
+            Updater(dispatcher=d, dedup_window=10)
+
+    def test_update_type_index(self):
+        bot = MockBot('', messages=0)
+        d = Dispatcher(bot, Queue())
+        checked = []
+
+        class CountingHandler(CallbackQueryHandler):
+
+            def check_update(self, update):
+                checked.append(self)
+                return super(CountingHandler, self).check_update(update)
+
+        queries = [CountingHandler(self.telegramCallbackHandlerTest) for _ in range(3)]
+        for handler in queries:
+            d.add_handler(handler)
+        d.add_handler(InlineQueryHandler(self.telegramInlineHandlerTest))
+        d.add_handler(TypeHandler(Update, lambda bot, update: checked.append('type')), group=1)
+
+        d.process_update(Update(0, inline_query='testquery'))
+        self.assertEqual(self.received_message[0], 'testquery')
+        self.assertEqual(checked, ['type'])
+
+        # The index follows changes of the handlers
+        del checked[:]
+        d.remove_handler(queries[0])
+        d.process_update(Update(0, callback_query=CallbackQuery(1, User(1, 'Testuser'), None,
+                                                                data='test data')))
+        self.assertEqual(self.received_message.data, 'test data')
+        self.assertEqual(checked, [queries[1], 'type'])
+
+        # Strings still reach all handlers
+        del checked[:]
+        d.process_update('/test')
+        self.assertEqual(checked, queries[1:])
+        d._reset_singleton()
+
+    def test_command_routing(self):
+        bot = MockBot('', messages=0)
+        d = Dispatcher(bot, Queue())
+        checked = []
+
+        class CountingHandler(CommandHandler):
+
+            def check_update(self, update):
+                checked.append(self.command[0])
+                return super(CountingHandler, self).check_update(update)
+
+        received = []
+        for i in range(100):
+            d.add_handler(CommandHandler('cmd{0}'.format(i),
+                                         lambda bot, update, i=i: received.append(i)))
+        d.add_handler(CommandHandler('cmd5', lambda bot, update: received.append('filtered'),
+                                     filters=Filters.all), group=1)
+        d.add_handler(CountingHandler('counted', lambda bot, update: None), group=1)
+        d.add_handler(MessageHandler(Filters.all, lambda bot, update: received.append('text')),
+                      group=1)
+
+        def send(text):
+            message = Message(0, User(0, 'Testuser'), None, Chat(0, 'private'), text=text,
+                              bot=bot)
+            d.process_update(Update(0, message=message))
+
+        send('/CMD42 arg')
+        self.assertEqual(received, [42, 'text'])
+        self.assertEqual(checked, ['counted'])
+
+        del received[:]
+        send('/cmd5@mockbot')
+        send('/cmd6@OtherBot')
+        send('/unknown')
+        self.assertEqual(received, [5, 'filtered', 'text', 'text'])
+
+        # Commands addressed to another bot are routed past the CommandHandlers. The username of
+        # the bot was looked up once, for the first of them
+        self.assertEqual(d._bot_username, 'mockbot')
+        message = Message(0, User(0, 'Testuser'), None, Chat(0, 'private'),
+                          text='/cmd6@OtherBot', bot=bot)
+        self.assertEqual(d._route(Update(0, message=message), d._username_for),
+                         ('message', None))
+        self.assertEqual(d._route(Update(0, message=message)), ('message', 'cmd6'))
+        d._reset_singleton()
+
+    def test_command_routing_without_bot(self):
+        d = Dispatcher(MockBot('', messages=0), Queue())
+        d._reset_singleton()
+        received = []
+        d.add_handler(CommandHandler('start', lambda bot, update: received.append('start')))
+        d.add_handler(MessageHandler(Filters.all, lambda bot, update: received.append('all')),
+                      group=1)
+
+        # The username can't be looked up, which is handled like an error of the CommandHandler
+        message = Message(0, User(0, 'Testuser'), None, Chat(0, 'private'),
+                          text='/start@otherbot')
+        d.process_update(Update(0, message=message))
+        self.assertEqual(received, ['all'])
+        self.assertIsNone(d._bot_username)
+
+    def test_combined_regex_handlers(self):
+        bot = MockBot('', messages=0)
+        d = Dispatcher(bot, Queue())
+        received = []
+
+        def callback(name):
+
+            def handler(bot, update, groups):
+                received.append((name, groups))
+                if name == 'continue':
+                    raise DispatcherHandlerContinue
+
+            return handler
+
+        patterns = ['(c)(\\1)', '(?i)(Q)', 'a(b)', 'x(?P<x>y)', 'continue()', 'con(.*)', '(z)',
+                    '([a-z]+)']
+        for pattern in patterns:
+            name = pattern if pattern != 'continue()' else 'continue'
+            d.add_handler(RegexHandler(pattern, callback(name), pass_groups=True))
+        d.add_handler(RegexHandler('(x)', callback('edited'), pass_groups=True,
+                                   message_updates=False, edited_updates=True))
+        handlers = d._handlers_for(0, ('message', None))
+        # The patterns with a backreference and inline flags aren't combined
+        self.assertEqual(len(handlers), 3)
+        self.assertTrue(_UNCOMBINABLE.search('(a)?(?(1)b|c)'))
+
+        def send(text):
+            message = Message(0, User(0, 'Testuser'), None, Chat(0, 'private'), text=text,
+                              bot=bot)
+            d.process_update(Update(0, message=message))
+
+        for text in ('ab', 'xy', 'cc', 'qX', 'continue', 'zz', 'other', '1'):
+            send(text)
+        self.assertEqual(received, [('a(b)', ('b',)), ('x(?P<x>y)', ('y',)),
+                                    ('(c)(\\1)', ('c', 'c')), ('(?i)(Q)', ('q',)),
+                                    ('continue', ('',)), ('con(.*)', ('tinue',)),
+                                    ('(z)', ('z',)), ('([a-z]+)', ('other',))])
+        d._reset_singleton()
+
+    def test_string_regex_matched_once(self):
+        from telegram.ext import stringregexhandler
+        self._setup_updater('', messages=0)
+        d = self.updater.dispatcher
+        d.add_handler(StringRegexHandler('Te(.*)', self.stringHandlerTest))
+        matches = []
+
+        class CountingRe(object):
+
+            @staticmethod
+            def match(pattern, string):
+                matches.append(string)
+                return re.match(pattern, string)
+
+        stringregexhandler.re = CountingRe
+        try:
+            d.process_update('Test')
+        finally:
+            stringregexhandler.re = re
+        self.assertEqual(self.received_message, 'Test')
+        self.assertEqual(matches, ['Test'])
+
+    def test_check_result_per_thread(self):
+        handler = StringRegexHandler('.*', self.stringHandlerTest)
+        update = 'update'
+        handler.store_check_result(update, 1)
+
+        def other_thread():
+            self.received_message = handler.pop_check_result(update)
+            handler.store_check_result(update, 2)
+
+        thread = Thread(target=other_thread)
+        thread.start()
+        thread.join()
+        self.assertIsNone(self.received_message)
+        self.assertIsNone(handler.pop_check_result('other update'))
+        handler.store_check_result(update, 1)
+        self.assertEqual(handler.pop_check_result(update), 1)
+        self.assertIsNone(handler.pop_check_result(update))
+
     def test_additionalArgs(self):
         self._setup_updater('', messages=0)
         handler = StringCommandHandler(
@@ -863,6 +1144,230 @@ class UpdaterTest(BaseTest, unittest.TestCase):
             self.updater._stop_httpd()
             thr.join()
 
+    def test_webhook_concurrent_keep_alive(self):
+        self._setup_updater('', messages=0)
+        queue = Queue()
+        ip = '127.0.0.1'
+        port = randrange(1024, 49152)  # select random port for travis
+        httpd = WebhookServer((ip, port), WebhookHandler, queue, '/TOKEN', self.updater.bot,
+                              max_connections=4)
+        thr = Thread(target=httpd.serve_forever, kwargs={'poll_interval': 0.1})
+        thr.start()
+        sleep(0.2)
+
+        try:
+            # A client which never finishes its request doesn't hold up the others
+            slow = socket.create_connection((ip, port))
+            slow.sendall(b'POST /TOKEN HTTP/1.1\r\n')
+
+            conn = HTTPConnection(ip, port, timeout=5)
+            for i in range(3):
+                update = Update(i, message=Message(i, User(1, 'Tester'), datetime.now(),
+                                                   Chat(1, 'group'), text=str(i)))
+                conn.request('POST', '/TOKEN', update.to_json(),
+                             {'content-type': 'application/json'})
+                response = conn.getresponse()
+                self.assertEqual(response.status, 200)
+                self.assertEqual(response.read(), b'')
+            # All requests went over one connection
+            self.assertEqual(len(httpd._connections), 2)
+            self.assertEqual([queue.get(timeout=1).message.text for _ in range(3)],
+                             ['0', '1', '2'])
+            conn.close()
+            slow.close()
+        finally:
+            httpd.shutdown()
+            thr.join()
+
+    def test_webhook_reply(self):
+        request = RecordingRequest()
+        bot = Bot('123:TOKEN', request=request)
+        queue = Queue()
+        d = Dispatcher(bot, queue)
+        d._reset_singleton()
+        results = []
+
+        def reply(bot, update):
+            if update.message.text == 'slow':
+                sleep(0.5)
+            results.append(bot.send_message(update.message.chat_id, 'first'))
+            results.append(bot.send_chat_action(update.message.chat_id, 'typing'))
+
+        d.add_handler(MessageHandler(Filters.text, reply))
+        ip = '127.0.0.1'
+        port = randrange(1024, 49152)  # select random port for travis
+        httpd = WebhookServer((ip, port), WebhookHandler, queue, '/TOKEN', bot,
+                              max_connections=2, reply_timeout=0.3)
+        thr = Thread(target=httpd.serve_forever, kwargs={'poll_interval': 0.1})
+        thr.start()
+        dispatcher_thr = Thread(target=d.start)
+        dispatcher_thr.start()
+        sleep(0.2)
+
+        def post(update_id, **kwargs):
+            update = Update(update_id, message=Message(update_id, User(1, 'Tester'),
+                                                       datetime.now(), Chat(1, 'group'),
+                                                       **kwargs))
+            conn = HTTPConnection(ip, port, timeout=5)
+            conn.request('POST', '/TOKEN', update.to_json(), {'content-type': 'application/json'})
+            response = conn.getresponse()
+            self.assertEqual(response.status, 200)
+            body = response.read()
+            conn.close()
+            return json.loads(body.decode('utf-8')) if body else None
+
+        try:
+            # The first call goes into the response, the second one is sent
+            self.assertEqual(post(1, text='fast'),
+                             {'method': 'sendMessage', 'chat_id': 1, 'text': 'first'})
+            self.assertEqual(request.methods, ['sendChatAction'])
+            self.assertEqual(results, [True, True])
+
+            # Nothing to reply with
+            self.assertIsNone(post(2))
+
+            # The handler is too slow, so its calls are sent as usual
+            self.assertIsNone(post(3, text='slow'))
+            sleep(0.5)
+            self.assertEqual(request.methods, ['sendChatAction', 'sendMessage', 'sendChatAction'])
+        finally:
+            d.stop()
+            dispatcher_thr.join()
+            httpd.shutdown()
+            thr.join()
+
+    def test_webhook_router(self):
+        ip = '127.0.0.1'
+        port = randrange(1024, 49152)  # select random port for travis
+        router = WebhookRouter(ip, port, max_connections=4)
+        router.start()
+        received = Queue()
+        updaters = []
+        for name in ('bot1', 'bot2'):
+            updater = Updater(workers=2, bot=MockBot('', messages=0))
+            updater.dispatcher.add_handler(MessageHandler(
+                Filters.text,
+                lambda bot, update, name=name: received.put((name, update.message.text))))
+            updater.start_webhook(url_path=name, router=router)
+            updaters.append(updater)
+        Dispatcher._reset_singleton()
+        sleep(0.2)
+
+        def post(path, text):
+            update = Update(1, message=Message(1, User(1, 'Tester'), datetime.now(),
+                                               Chat(1, 'group'), text=text))
+            self._send_webhook_msg(ip, port, update.to_json(), url_path=path)
+
+        try:
+            post('bot1', 'a')
+            post('bot2', 'b')
+            self.assertEqual(sorted([received.get(timeout=1), received.get(timeout=1)]),
+                             [('bot1', 'a'), ('bot2', 'b')])
+            self.assertEqual(sorted(router.httpd.routes), ['/bot1', '/bot2'])
+            self.assertEqual(router.request._con_pool.connection_pool_kw['maxsize'], 4)
+
+            with self.assertRaises(HTTPError) as ctx:
+                post('bot3', 'c')
+            self.assertEqual(ctx.exception.code, 403)
+
+            # A stopped updater doesn't get updates anymore, the others still do
+            updaters[0].stop()
+            with self.assertRaises(HTTPError) as ctx:
+                post('bot1', 'd')
+            self.assertEqual(ctx.exception.code, 403)
+            post('bot2', 'e')
+            self.assertEqual(received.get(timeout=1), ('bot2', 'e'))
+        finally:
+            for updater in updaters:
+                updater.stop()
+            router.stop()
+
+    def test_webhook_reply_router(self):
+        ip = '127.0.0.1'
+        port = randrange(1024, 49152)  # select random port for travis
+        router = WebhookRouter(ip, port, max_connections=4, reply_timeout=1)
+        router.start()
+        bots = [Bot('123:ONE', request=RecordingRequest()),
+                Bot('456:TWO', request=RecordingRequest())]
+
+        def reply(bot, update):
+            # A call of the other bot must not go into the response for this one
+            bots[1].send_message(update.message.chat_id, 'other')
+            bot.send_message(update.message.chat_id, 'own')
+
+        updaters = []
+        for name, bot in zip(('bot1', 'bot2'), bots):
+            updater = Updater(workers=2, bot=bot)
+            updater.dispatcher.add_handler(MessageHandler(Filters.text, reply))
+            updater.start_webhook(url_path=name, router=router)
+            updaters.append(updater)
+        Dispatcher._reset_singleton()
+        sleep(0.2)
+
+        def post(path):
+            update = Update(1, message=Message(1, User(1, 'Tester'), datetime.now(),
+                                               Chat(1, 'group'), text='text'))
+            conn = HTTPConnection(ip, port, timeout=5)
+            conn.request('POST', path, update.to_json(), {'content-type': 'application/json'})
+            response = conn.getresponse()
+            self.assertEqual(response.status, 200)
+            body = response.read()
+            conn.close()
+            return json.loads(body.decode('utf-8'))
+
+        try:
+            own = {'method': 'sendMessage', 'chat_id': 1, 'text': 'own'}
+            self.assertEqual(post('/bot1'), own)
+            self.assertEqual(bots[0].request.methods, [])
+            self.assertEqual(bots[1].request.methods, ['sendMessage'])
+
+            self.assertEqual(post('/bot2'), {'method': 'sendMessage', 'chat_id': 1,
+                                             'text': 'other'})
+            sleep(0.1)
+            self.assertEqual(bots[1].request.methods, ['sendMessage', 'sendMessage'])
+        finally:
+            for updater in updaters:
+                updater.stop()
+            router.stop()
+
+    @unittest.skipIf(not hasattr(socket, 'SO_REUSEPORT'), 'needs SO_REUSEPORT')
+    def test_webhook_processes(self):
+        import multiprocessing
+        bot = Bot('123:TOKEN', request=RecordingRequest())
+        self.updater = Updater(workers=2, bot=bot)
+        received = multiprocessing.Queue()
+        self.updater.dispatcher.add_handler(MessageHandler(
+            Filters.text, lambda bot, update: received.put((os.getpid(), update.message.text))))
+
+        ip = '127.0.0.1'
+        port = randrange(1024, 49152)  # select random port for travis
+        self.updater.start_webhook(ip, port, url_path='TOKEN', processes=2)
+        processes = list(self.updater._processes)
+        sleep(0.5)
+
+        try:
+            for i in range(20):
+                update = Update(i, message=Message(i, User(1, 'Tester'), datetime.now(),
+                                                   Chat(1, 'group'), text=str(i)))
+                self._send_webhook_msg(ip, port, update.to_json(), url_path='TOKEN')
+            results = [received.get(timeout=2) for _ in range(20)]
+            self.assertEqual(sorted(int(text) for _, text in results), list(range(20)))
+            self.assertTrue(set(pid for pid, _ in results) <=
+                            set(process.pid for process in processes))
+        finally:
+            self.updater.stop()
+        self.assertEqual(len(processes), 2)
+        self.assertFalse(any(process.is_alive() for process in processes))
+        self.assertEqual(self.updater._processes, [])
+
+        # Each process would write its own data to the persistence
+        persistence = PicklePersistence(os.path.join('missing', 'data.pickle'))
+        self.updater = None
+        self.updater = Updater(workers=2, bot=bot, persistence=persistence)
+        with self.assertRaisesRegexp(ValueError, 'persistence'):
+            self.updater.start_webhook(ip, port, url_path='TOKEN', processes=2)
+        self.assertFalse(self.updater.running)
+
     def _send_webhook_msg(self,
                           ip,
                           port,
@@ -1015,6 +1520,43 @@ class UpdaterTest(BaseTest, unittest.TestCase):
         self.assertEqual(passed, ['start1'])
 
 
+class MockRequest(object):
+    """Answers getUpdates with the given batches of messages, by update_id."""
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.offsets = []
+
+    def post(self, url, data, timeout=None):
+        if not url.endswith('/getUpdates'):
+            return True
+        self.offsets.append(data.get('offset'))
+        if not self.batches:
+            sleep(.01)
+            return []
+        return [{
+            'update_id': update_id,
+            'message': {
+                'message_id': update_id,
+                'date': 0,
+                'chat': {'id': 1, 'type': 'private'},
+                'text': str(update_id)
+            }
+        } for update_id in self.batches.pop(0)]
+
+
+class RecordingRequest(BotRequest):
+    """Records the methods called instead of sending them to Telegram."""
+
+    def __init__(self):
+        super(RecordingRequest, self).__init__()
+        self.methods = []
+
+    def _request_wrapper(self, method, url, *args, **kwargs):
+        self.methods.append(url.rsplit('/', 1)[-1])
+        return b'{"ok": true, "result": true}'
+
+
 class MockBot(object):
     def __init__(self,
                  text,
@@ -1027,11 +1569,13 @@ class MockBot(object):
         self.send_messages = messages
         self.raise_error = raise_error
         self.token = "TOKEN"
+        self.base_url = 'https://api.telegram.org/botTOKEN'
         self.bootstrap_retries = bootstrap_retries
         self.bootstrap_attempts = 0
         self.bootstrap_err = bootstrap_err
         self.edited = edited
         self.username = "MockBot"
+        self.request = BotRequest()
 
     def mock_update(self, text):
         message = Message(0, User(0, 'Testuser'), None, Chat(0, Chat.GROUP), bot=self)
@@ -1045,7 +1589,8 @@ class MockBot(object):
 
         return update
 
-    def set_webhook(self, url=None, certificate=None, allowed_updates=None):
+    def set_webhook(self, url=None, certificate=None, allowed_updates=None,
+                    max_connections=40):
         if self.bootstrap_retries is None:
             return
 
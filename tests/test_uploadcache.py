@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+#
+# A library that provides a Python interface to the Telegram Bot API
+# Copyright (C) 2015-2017
+# Leandro Toledo de Souza <devs@python-telegram-bot.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see [http://www.gnu.org/licenses/].
+"""This module contains an object that represents Tests for UploadCache"""
+
+import os
+import sys
+import tempfile
+import unittest
+from io import BytesIO
+
+sys.path.append('.')
+
+import telegram
+from telegram.error import BadRequest
+from telegram.utils.uploadcache import UploadCache, MemoryStore, SQLiteStore
+from tests.base import BaseTest
+
+
+class MockRequest(object):
+
+    def __init__(self):
+        self.sent = []
+        self.rejected = set()
+
+    def post(self, url, data, timeout=None):
+        photo = data['photo']
+        if hasattr(photo, 'read'):
+            photo = 'id-{0}'.format(len(self.sent))
+        elif photo in self.rejected:
+            raise BadRequest('Wrong file identifier/http url specified')
+        self.sent.append(data['photo'])
+        return {'message_id': len(self.sent), 'date': 0,
+                'chat': {'id': data['chat_id'], 'type': 'private'},
+                'photo': [{'file_id': photo + '-small', 'width': 1, 'height': 1},
+                          {'file_id': photo, 'width': 2, 'height': 2}]}
+
+
+class UploadCacheTest(BaseTest, unittest.TestCase):
+    """This object represents Tests for UploadCache."""
+
+    def setUp(self):
+        self.request = MockRequest()
+        self.cache = UploadCache()
+        self.bot = telegram.Bot('123:abc', request=self.request, upload_cache=self.cache)
+
+    def test_reuse_file_id(self):
+        self.bot.send_photo(1, BytesIO(b'banner'))
+        message = self.bot.send_photo(2, BytesIO(b'banner'))
+        self.bot.send_photo(3, BytesIO(b'other'))
+
+        self.assertEqual(message.photo[-1].file_id, 'id-0')
+        self.assertEqual(self.request.sent[1], 'id-0')
+        self.assertTrue(hasattr(self.request.sent[2], 'read'))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_key_keeps_position(self):
+        photo = BytesIO(b'headerbanner')
+        photo.seek(6)
+        self.assertEqual(UploadCache.key(photo), UploadCache.key(BytesIO(b'banner')))
+        self.assertEqual(photo.tell(), 6)
+
+    def test_path_key(self):
+        fd, filename = tempfile.mkstemp()
+        os.write(fd, b'banner')
+        os.close(fd)
+        try:
+            with open(filename, 'rb') as f:
+                key = UploadCache.key(f)
+            self.assertTrue(key.startswith('path:'))
+            self.assertIn(os.path.abspath(filename), key)
+        finally:
+            os.remove(filename)
+
+    def test_rejected_file_id(self):
+        self.bot.send_photo(1, BytesIO(b'banner'))
+        self.request.rejected.add('id-0')
+
+        message = self.bot.send_photo(2, BytesIO(b'banner'))
+
+        self.assertEqual(message.photo[-1].file_id, 'id-1')
+        self.assertEqual(self.bot.send_photo(3, BytesIO(b'banner')).photo[-1].file_id, 'id-1')
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_memory_store_lru(self):
+        store = MemoryStore(maxsize=2)
+        store.set('a', '1')
+        store.set('b', '2')
+        store.get('a')
+        store.set('c', '3')
+        self.assertEqual((store.get('a'), store.get('b'), store.get('c')), ('1', None, '3'))
+
+    def test_sqlite_store(self):
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            store = SQLiteStore(filename)
+            store.set('a', '1')
+            store.close()
+
+            store = SQLiteStore(filename)
+            self.assertEqual(store.get('a'), '1')
+            store.delete('a')
+            self.assertIsNone(store.get('a'))
+            self.assertEqual(len(store), 0)
+            store.close()
+        finally:
+            os.remove(filename)
+
+
+if __name__ == '__main__':
+    unittest.main()